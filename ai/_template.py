@@ -123,6 +123,8 @@ state of the game:
           obstacles (aliases: free_space, free)
     line_of_sight([target]) -- returns whether there is a direct line of sight
           between this turtle and a target (aliases: line_of_sight, los)
+    visible_cells([target]) -- returns the center coordinates of all coarse
+          arena cells with line of sight to a target
 """
 
 # Title: ### AI name ###
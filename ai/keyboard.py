@@ -10,9 +10,8 @@
 # this class to override some of the hidden TurtleParent class methods, which
 # you SHOULD NOT do in your own custom AI modules.
 
-import math
 import game.tcturtle
-from game.obj.missile import Missile
+from game.util.trig import cos_deg, sin_deg
 
 class CombatTurtle(game.tcturtle.TurtleParent):
     """Keyboard combat turtle.
@@ -83,40 +82,9 @@ class CombatTurtle(game.tcturtle.TurtleParent):
             dir (int) -- 1 for forward, -1 for backward
         """
         
-        # Set new coordinates
-        self._x += int(dir*self.max_speed*
-                       math.cos(math.radians(self.heading)))
-        self._y -= int(dir*self.max_speed*
-                       math.sin(math.radians(self.heading)))
-
-        # Check whether the destination intersects any blocks
-        blocks = self._game.intersections((self.x, self.y))
-        if len(blocks) > 0:
-            # If so, check all intersecting blocks and move to outside
-            for b in blocks:
-                # Determine overlap on each side
-                overlap = [1000000 for i in range(4)] # ordered overlaps
-                if self.x >= b.left:
-                    overlap[0] = self.x - b.left
-                if self.x <= b.right:
-                    overlap[1] = b.right - self.x
-                if self.y >= b.bottom:
-                    overlap[2] = self.y - b.bottom
-                if self.y <= b.top:
-                    overlap[3] = b.top - self.y
-
-                # Find minimum nonzero overlap
-                mo = overlap.index(min(overlap))
-
-                # Reset coordinates based on minimum overlap
-                if mo == 0:
-                    self._x -= overlap[0] - 1
-                elif mo == 1:
-                    self._x += overlap[1] + 1
-                elif mo == 2:
-                    self._y -= overlap[2] - 1
-                else:
-                    self._y += overlap[3] + 1
+        # Move to new coordinates (pushed out of any blocks)
+        self._place((self._x + int(dir*self.max_speed*cos_deg(self.heading)),
+                     self._y - int(dir*self.max_speed*sin_deg(self.heading))))
     
     #-------------------------------------------------------------------------
     
@@ -130,6 +98,9 @@ class CombatTurtle(game.tcturtle.TurtleParent):
         
         # Change heading
         self._heading += int(dir*self.max_turn_speed)
+
+        # Forget any queries cached at the old heading
+        self._queries.clear()
     
     #-------------------------------------------------------------------------
     
@@ -142,7 +113,5 @@ class CombatTurtle(game.tcturtle.TurtleParent):
         if self.cooldown > 0:
             return None
 
-        # Otherwise create a missile object and add to the list
-        self._cooldown = self.shoot_delay # reset cooldown duration
-        self._missiles.append(Missile(self._game, self, self._other,
-                                      self.position, self.heading))
+        # Otherwise fire a missile
+        self._fire()
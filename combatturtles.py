@@ -11,8 +11,9 @@ import ai
 
 #=============================================================================
 
-def combat_turtles(tid1=-1, tid2=-1, aid=-1, cutoff=-1):
-    """combat_turtles() -> None
+def combat_turtles(tid1=-1, tid2=-1, aid=-1, cutoff=-1, step_time=33,
+                   fps=None, events=None, debug=False, watch=False):
+    """combat_turtles() -> MatchResult
     Combat Turtles game driver.
 
     If loading this package as a module this function should be used to
@@ -35,6 +36,22 @@ def combat_turtles(tid1=-1, tid2=-1, aid=-1, cutoff=-1):
         aid (int) [-1] -- index of arena layout (in the list of all available
             arena layouts)
         cutoff (int) [-1] -- iteration cutoff for game (negative for no limit)
+        step_time (int) [33] -- time per step (ms), or 0 to run the game as
+            fast as possible
+        fps (float) [None] -- maximum number of frames drawn per second (None
+            to draw after every step)
+        events (str) [None] -- path of a JSON Lines file to which the game's
+            events are appended (None to not record events)
+        debug (bool) [False] -- whether to start the game paused, with
+            controls for stepping forwards and backwards through it
+        watch (bool) [False] -- whether to watch the player 1 AI's module for
+            changes instead of playing a game, rerunning a headless benchmark
+            against the player 2 AI (or against every other AI if none is
+            given) on the chosen arena (or on every arena if none is given)
+            after each change (see game.watch)
+
+    Returns a record of the game's result once its window is closed (see
+    game.result), or None if no game was played.
     """
 
     # In order to allow the user to place additional AI modules inside the ai/
@@ -72,6 +89,11 @@ def combat_turtles(tid1=-1, tid2=-1, aid=-1, cutoff=-1):
     print()
     _ai_table(turtle_classes)
 
+    # Benchmark the player 1 AI after every change in watch mode
+    if watch == True:
+        _watch(turtle_classes, tid1, tid2, aid, cutoff)
+        return None
+
     # Ask the user to choose the turtle AIs (assuming more than one is loaded)
     choice1 = 0 # index of Player 1 AI
     choice2 = 0 # index of PLayer 2 AI
@@ -122,13 +144,60 @@ def combat_turtles(tid1=-1, tid2=-1, aid=-1, cutoff=-1):
     # Create game object with chosen turtles and arena
     print("\nOpening Combat Turtles.")
     print("Game in progress...")
+    sinks = []
+    if events != None:
+        sinks.append(game.events.JsonLinesSink(events))
     gm = game.tcgame.TurtleCombatGame(class1=turtle_classes[choice1],
                                       class2=turtle_classes[choice2],
-                                      layout=arena, cutoff=cutoff)
+                                      layout=arena, cutoff=cutoff,
+                                      step_time=step_time, fps=fps,
+                                      sinks=sinks, debug=debug)
+    for s in sinks:
+        s.close()
 
-    # Delete game object when done
+    # Delete game object when done, keeping only its result
     print("Closing Combat Turtles.")
+    result = gm.result()
     del gm
+    return result
+
+#-----------------------------------------------------------------------------
+
+def _watch(classes, tid1, tid2, aid, cutoff):
+    """_watch(classes, tid1, tid2, aid, cutoff) -> None
+    Runs the watch mode of the Combat Turtles driver.
+
+    Requires the following positional arguments:
+        classes (list (str)) -- list of full class name strings
+        tid1 (int) -- index of the AI to benchmark (negative to ask)
+        tid2 (int) -- index of the opponent AI (negative for all others)
+        aid (int) -- index of arena layout (negative for all layouts)
+        cutoff (int) -- iteration cutoff of each match (negative for the
+            default of the game.watch module)
+    """
+
+    # Ask for the AI to benchmark until getting a valid response
+    indices = {str(i) for i in range(len(classes))} # valid indices
+    choice = str(tid1)
+    while choice not in indices:
+        choice = input("Input an Index [0-" + str(len(classes)-1) +
+                       "] to choose the AI to watch, and then press" +
+                       " [Enter]: ")
+    cls = classes[int(choice)]
+
+    # Gather opponents and layouts
+    if tid2 in range(len(classes)):
+        opponents = [classes[tid2]]
+    else:
+        opponents = [c for c in classes if c != cls]
+    layouts = list(range(len(game.obj.arena.Arena.get_names())))
+    if aid in layouts:
+        layouts = [aid]
+    options = {}
+    if cutoff >= 0:
+        options["cutoff"] = cutoff
+
+    game.watch.Watcher(cls, opponents, layouts=layouts, **options).run()
 
 #-----------------------------------------------------------------------------
 
@@ -206,9 +275,29 @@ if __name__ == "__main__":
     parser.add_argument("-c", "--cutoff", action="store", default=-1,
                         type=int, dest="lim",
                         help="iteration cutoff (default: unlimited)")
+    parser.add_argument("-t", "--step-time", action="store", default=33,
+                        type=int, dest="st",
+                        help="time per step in ms (default: 33, 0 for " +
+                        "unlimited)")
+    parser.add_argument("-r", "--fps", action="store", default=None,
+                        type=float, dest="fps",
+                        help="maximum frames drawn per second (default: " +
+                        "one per step)")
+    parser.add_argument("-e", "--events", action="store", default=None,
+                        type=str, dest="ev",
+                        help="append game events to a JSON Lines file")
+    parser.add_argument("-d", "--debug", action="store_true", dest="dbg",
+                        help="start paused, with controls to step forwards " +
+                        "and backwards")
+    parser.add_argument("-w", "--watch", action="store_true", dest="watch",
+                        help="instead of playing, rerun a headless " +
+                        "benchmark of player 1 against player 2 (default: " +
+                        "all other AIs) whenever ai/ changes")
 
     # Parse command line arguments
     args = parser.parse_args()
 
     # Run game
-    combat_turtles(tid1=args.p1, tid2=args.p2, aid=args.a, cutoff=args.lim)
+    combat_turtles(tid1=args.p1, tid2=args.p2, aid=args.a, cutoff=args.lim,
+                   step_time=args.st, fps=args.fps, events=args.ev,
+                   debug=args.dbg, watch=args.watch)
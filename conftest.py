@@ -0,0 +1 @@
+"""Lets pytest import the game and ai packages from the repository root."""
@@ -1,4 +1,22 @@
+import importlib
+
 from . import tcgame
 from . import tcturtle
 from . import obj
 from . import util
+
+# Optional tools, imported when first accessed (see __getattr__()) so that
+# importing the game does not load asyncio, multiprocessing, and the like
+_LAZY = ("remote", "server", "shared", "events", "telemetry", "dashboard",
+         "timeline", "debugger", "lookahead", "rules", "sweep", "tournament",
+         "watch", "result")
+
+def __getattr__(name):
+    """__getattr__(name) -> module
+    Imports an optional tool module the first time it is accessed.
+    """
+
+    if name in _LAZY:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " +
+                         repr(name))
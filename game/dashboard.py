@@ -0,0 +1,121 @@
+"""Defines a dashboard window for watching several games at once."""
+
+import time
+from .tcgame import TurtleCombatGame
+from .util.canvas import load_tkinter
+
+#=============================================================================
+
+class Dashboard:
+    """Multi-game dashboard class.
+
+    Shows any number of games side by side in a single window, each drawn on
+    its own scaled-down arena canvas with the usual name and health
+    displays. This is meant for watching a whole round of a tournament at
+    once.
+
+    All of the games are driven by a single timer. Each tick runs one step
+    of every unfinished game and draws a frame for each game that is due for
+    one (according to that game's fps or render_every options), so the games
+    advance together no matter how many are shown.
+
+    Keyboard-controlled turtles are not supported, since they need a window
+    of their own to receive key presses.
+
+    For example, the following shows four matches of the same pair of AIs on
+    each of the first four arena layouts:
+
+        board = Dashboard([{"class1": "ai.direct.CombatTurtle",
+                            "class2": "ai.wall.CombatTurtle",
+                            "layout": i} for i in range(4)])
+        board.play()
+
+    The following public attributes and methods can be used to run the
+    dashboard:
+        root -- dashboard window
+        games -- list of TurtleCombatGame objects, in the order given
+        play() -- plays all games and runs the window until it is closed
+    """
+
+    #=========================================================================
+
+    def __init__(self, matches, columns=None, scale=0.4, step_time=33,
+                 title="Turtle Combat Dashboard"):
+        """Dashboard(matches, [columns], [scale], [step_time], [title]) ->
+        Dashboard
+        Multi-game dashboard constructor.
+
+        Requires the following positional arguments:
+            matches (list (dict)) -- keyword arguments of each game's
+                TurtleCombatGame constructor (such as class1, class2,
+                layout, and cutoff)
+
+        Accepts the following optional keyword arguments:
+            columns (int) [None] -- number of games per row (by default the
+                games are arranged in a roughly square grid)
+            scale (float) [0.4] -- ratio of the displayed arena size to the
+                actual arena size
+            step_time (int) [33] -- time per step (ms), or 0 to run steps as
+                fast as possible
+            title (str) ["Turtle Combat Dashboard"] -- window title
+        """
+
+        tk = load_tkinter()
+
+        self._step_time = step_time # time per step (ms)
+        if columns == None:
+            columns = 1
+            while columns*columns < len(matches):
+                columns += 1
+
+        # Set up Tkinter window
+        self.root = tk.Tk()
+        self.root.title(title)
+
+        # Set up a panel for each game
+        self.games = []
+        for i in range(len(matches)):
+            panel = tk.Frame(self.root, bd=2, relief="groove")
+            panel.grid(column=i % columns, row=i//columns, padx=4, pady=4)
+            self.games.append(TurtleCombatGame(master=panel, scale=scale,
+                                               **matches[i]))
+
+    #-------------------------------------------------------------------------
+
+    def play(self):
+        """Dashboard.play() -> None
+        Plays all games and runs the window until it is closed.
+        """
+
+        # Begin games (after a delay, to allow the arenas to initialize)
+        self.root.after(500, self._tick)
+        self.root.mainloop()
+
+    #-------------------------------------------------------------------------
+
+    def _tick(self):
+        """Dashboard._tick() -> None
+        Runs one step of every unfinished game.
+
+        Implemented as a handler for a timer event.
+
+        Games which have just ended are drawn one last time and announce
+        their results. The timer is reset until every game has ended.
+        """
+
+        start = time.perf_counter()
+        for g in self.games:
+            if g.over == True:
+                continue
+            g._step()
+            now = time.perf_counter()
+            if g.over == True:
+                g._redraw(now)
+                g._finish()
+            elif g._frame_due(now) == True:
+                g._redraw(now)
+
+        # Continue loop by resetting timer
+        if any(g.over == False for g in self.games):
+            elapsed = int(1000*(time.perf_counter() - start))
+            self.root.after(max(1, self._step_time - elapsed), self._tick)
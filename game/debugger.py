@@ -0,0 +1,145 @@
+"""Defines step-by-step debugging controls for the game window."""
+
+import time
+from .timeline import Timeline
+from .util.canvas import load_tkinter
+
+#=============================================================================
+
+class Debugger:
+    """Game debugger class.
+
+    Adds a row of controls beneath the arena of a windowed game, which can be
+    used to pause the game, step forwards and backwards one step at a time,
+    and jump directly to any step. This makes it possible to rewind a game to
+    the moment that an AI began to misbehave and watch it again.
+
+    The debugger takes over the game's timer from play_game(), running one
+    step per tick at the game's usual step time while it is not paused. Its
+    Timeline records snapshots as the game is played, which are used to
+    rewind (see game.timeline).
+
+    The following controls are shown:
+        Run/Pause -- resumes or pauses the game
+        Step -- runs a single step
+        Back -- returns to the previous step
+        Go to -- jumps to the step entered in the neighboring box
+    """
+
+    #=========================================================================
+
+    def __init__(self, game, every=50, capacity=64):
+        """Debugger(game, [every], [capacity]) -> Debugger
+        Game debugger constructor.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- windowed game to debug (which should
+                not have begun yet)
+
+        Accepts the following optional keyword arguments:
+            every (int) [50] -- number of steps between snapshots
+            capacity (int) [64] -- maximum number of snapshots kept
+        """
+
+        tk = load_tkinter()
+
+        self.game = game
+        self.timeline = Timeline(game, every=every, capacity=capacity)
+        self.running = False # whether the game is currently playing
+
+        # Set up controls beneath the arena
+        rows = 2*max(1, (len(game._players)+1)//2) # game display rows
+        panel = tk.Frame(game.root)
+        panel.grid(column=0, row=rows+1, columnspan=3, pady=4)
+        self._run = tk.Button(panel, text="Run", width=6,
+                              command=self.toggle)
+        self._run.grid(column=0, row=0, padx=2)
+        tk.Button(panel, text="Step", width=6,
+                  command=self.step).grid(column=1, row=0, padx=2)
+        tk.Button(panel, text="Back", width=6,
+                  command=self.back).grid(column=2, row=0, padx=2)
+        self._target = tk.Entry(panel, width=8)
+        self._target.grid(column=3, row=0, padx=2)
+        tk.Button(panel, text="Go to", width=6,
+                  command=self.go).grid(column=4, row=0, padx=2)
+        self._status = tk.StringVar(value="Step 0")
+        tk.Label(panel, textvariable=self._status, width=12).grid(
+            column=5, row=0, padx=2)
+
+    #-------------------------------------------------------------------------
+
+    def toggle(self):
+        """Debugger.toggle() -> None
+        Resumes or pauses the game.
+        """
+
+        self.running = (self.running == False and self.game.over == False)
+        self._run.configure(text="Pause" if self.running == True else "Run")
+
+    #-------------------------------------------------------------------------
+
+    def step(self):
+        """Debugger.step() -> None
+        Runs a single step of the game.
+        """
+
+        if self.game.over == False:
+            self.game._step()
+            self.timeline.record()
+        self._show()
+
+    #-------------------------------------------------------------------------
+
+    def back(self):
+        """Debugger.back() -> None
+        Returns the game to its previous step.
+        """
+
+        self.timeline.back()
+        self._show()
+
+    #-------------------------------------------------------------------------
+
+    def go(self):
+        """Debugger.go() -> None
+        Jumps to the step entered in the step box.
+
+        Entries which are not integers are ignored.
+        """
+
+        try:
+            iteration = int(self._target.get())
+        except ValueError:
+            return None
+        self.timeline.seek(iteration)
+        self._show()
+
+    #-------------------------------------------------------------------------
+
+    def _tick(self):
+        """Debugger._tick() -> None
+        Runs a single step of the game if it is playing.
+
+        Implemented as a handler for a timer event, which keeps running for
+        as long as the window is open.
+        """
+
+        if self.running == True:
+            self.step()
+        self.game.root.after(max(1, self.game.step_time), self._tick)
+
+    #-------------------------------------------------------------------------
+
+    def _show(self):
+        """Debugger._show() -> None
+        Draws the game's current step and updates the controls.
+        """
+
+        game = self.game
+        game._clear_announcement()
+        game._redraw(time.perf_counter())
+        if game.over == True:
+            game._finish()
+            if self.running == True:
+                self.toggle()
+        self._status.set("Step " + str(game.iteration))
@@ -0,0 +1,418 @@
+"""Defines the match event stream and its sinks.
+
+While a match is played, the game engine emits an event for each notable
+occurrence. Each event is a dictionary containing its kind, the game
+iteration during which it occurred, and a few kind-specific fields:
+    shot -- a turtle fired a missile (turtle, ai, team, x, y, heading)
+    explosion -- a missile exploded (turtle, ai, team, x, y, cause), where
+        turtle is the shooter and cause is one of "timer", "wall", "enemy",
+        or "block"
+    damage -- a missile explosion damaged a turtle (turtle, ai, team,
+        target_turtle, target_ai, target_team, amount, hit), where turtle is
+        the shooter and hit is True only for the first enemy turtle damaged
+        by the missile (so counting these counts the missiles which hit)
+    collision -- a turtle ran into a block (turtle, ai, team, x, y, left,
+        right, bottom, top)
+    end -- the match ended (winner, timeout, winners), where winner is the
+        winning team ID (None for a tie) and winners lists the AI names of
+        the winning team's turtles
+
+Turtles are identified by their player names ("Player 1", "Player 2", ...),
+along with the names of their AIs and their team IDs.
+
+Events are delivered to sinks, which are callables that accept a single
+event. Sinks may be any function, or one of the classes defined here:
+    JsonLinesSink -- writes one JSON object per line to a file
+    CsvSink -- writes one row per event to a CSV file
+    Aggregator -- keeps running totals in memory
+    QueuedSink -- passes events to another sink from a background thread
+
+Both file sinks take a mode argument, which is either "a" (the default) to
+append to an existing file, so that the events of several matches can be
+collected in a single file, or "w" to overwrite it. CsvSink only writes its
+header row when the file is empty.
+"""
+
+import csv
+import json
+import queue
+import threading
+
+#=============================================================================
+
+# Event kinds
+SHOT = "shot"
+EXPLOSION = "explosion"
+DAMAGE = "damage"
+COLLISION = "collision"
+END = "end"
+
+# Columns written by CsvSink (fields an event lacks are left blank)
+_CSV_FIELDS = ["event", "step", "turtle", "ai", "team", "target_turtle",
+               "target_ai", "target_team", "amount", "hit", "x", "y",
+               "heading", "cause", "left", "right", "bottom", "top",
+               "winner", "timeout", "winners"]
+
+#=============================================================================
+
+def _open(path, mode, newline=None):
+    """_open(path, mode[, newline]) -> file
+    Opens the output file of a file sink.
+
+    Raises ValueError for any mode other than "a" or "w".
+    """
+
+    if mode not in ("a", "w"):
+        raise ValueError("file sink mode must be 'a' or 'w'")
+    return open(path, mode, newline=newline)
+
+#=============================================================================
+
+class EventStream:
+    """Match event stream class.
+
+    Dispatches the events of a game to any number of subscribed sinks. Each
+    game has its own event stream, which can be accessed through its events
+    attribute.
+
+    Emitting an event while nothing is subscribed costs only a length check,
+    so the engine emits events unconditionally.
+
+    The following public methods can be used to manage the stream:
+        subscribe(sink[, kinds]) -- delivers events to a sink
+        unsubscribe(sink) -- stops delivering events to a sink
+        emit(kind, step, **fields) -- delivers an event to all interested
+            sinks
+    """
+
+    #=========================================================================
+
+    def __init__(self, sinks=None):
+        """EventStream([sinks]) -> EventStream
+        Event stream constructor.
+
+        Accepts the following optional keyword arguments:
+            sinks (list) [None] -- list of sinks to subscribe to all events
+        """
+
+        self._subscribers = [] # (sink, kinds) pairs, in subscription order
+        for sink in (sinks or []):
+            self.subscribe(sink)
+
+    #-------------------------------------------------------------------------
+
+    def subscribe(self, sink, kinds=None):
+        """EventStream.subscribe(sink[, kinds]) -> None
+        Delivers events to a sink.
+
+        Requires the following positional arguments:
+            sink (function) -- callable that accepts a single event
+
+        Accepts the following optional keyword arguments:
+            kinds (set (str)) [None] -- set of event kinds to deliver (all
+                kinds by default)
+        """
+
+        self._subscribers.append((sink, None if kinds == None else
+                                  set(kinds)))
+
+    #-------------------------------------------------------------------------
+
+    def unsubscribe(self, sink):
+        """EventStream.unsubscribe(sink) -> None
+        Stops delivering events to a sink.
+        """
+
+        self._subscribers = [s for s in self._subscribers if s[0] != sink]
+
+    #-------------------------------------------------------------------------
+
+    def emit(self, kind, step, **fields):
+        """EventStream.emit(kind, step, **fields) -> None
+        Delivers an event to all interested sinks.
+
+        Requires the following positional arguments:
+            kind (str) -- event kind
+            step (int) -- game iteration during which the event occurred
+
+        Any keyword arguments are included as fields of the event.
+        """
+
+        if len(self._subscribers) == 0:
+            return None
+
+        event = {"event": kind, "step": step}
+        event.update(fields)
+        for (sink, kinds) in self._subscribers:
+            if kinds == None or kind in kinds:
+                sink(event)
+
+#=============================================================================
+
+class JsonLinesSink:
+    """JSON Lines event sink class.
+
+    Writes each event to a file as a single line of JSON. Tuples (such as
+    tuple team IDs) are written as JSON arrays, and any other values which
+    JSON cannot represent are written as strings.
+    """
+
+    #=========================================================================
+
+    def __init__(self, path, mode="a"):
+        """JsonLinesSink(path[, mode]) -> JsonLinesSink
+        JSON Lines event sink constructor.
+
+        Requires the following positional arguments:
+            path (str) -- output file path
+
+        Accepts the following optional keyword arguments:
+            mode (str) ["a"] -- "a" to append to the file, or "w" to
+                overwrite it (see module documentation)
+        """
+
+        self._file = _open(path, mode)
+
+    #-------------------------------------------------------------------------
+
+    def __call__(self, event):
+        """JsonLinesSink(event) -> None
+        Writes an event.
+        """
+
+        self._file.write(json.dumps(event, default=str) + "\n")
+
+    #-------------------------------------------------------------------------
+
+    def close(self):
+        """JsonLinesSink.close() -> None
+        Closes the output file.
+        """
+
+        self._file.close()
+
+#=============================================================================
+
+class CsvSink:
+    """CSV event sink class.
+
+    Writes each event to a CSV file as a single row, with a fixed set of
+    columns covering the fields of every event kind.
+    """
+
+    #=========================================================================
+
+    def __init__(self, path, mode="a"):
+        """CsvSink(path[, mode]) -> CsvSink
+        CSV event sink constructor.
+
+        Requires the following positional arguments:
+            path (str) -- output file path
+
+        Accepts the following optional keyword arguments:
+            mode (str) ["a"] -- "a" to append to the file, or "w" to
+                overwrite it (see module documentation)
+        """
+
+        self._file = _open(path, mode, newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=_CSV_FIELDS,
+                                      restval="", extrasaction="ignore")
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    #-------------------------------------------------------------------------
+
+    def __call__(self, event):
+        """CsvSink(event) -> None
+        Writes an event.
+        """
+
+        self._writer.writerow(event)
+
+    #-------------------------------------------------------------------------
+
+    def close(self):
+        """CsvSink.close() -> None
+        Closes the output file.
+        """
+
+        self._file.close()
+
+#=============================================================================
+
+class Aggregator:
+    """In-memory event aggregator class.
+
+    Keeps running totals of the events of any number of matches, keyed by
+    AI name, so that tournament statistics are available while the matches
+    are still being played. Totals may be read from another thread.
+
+    The following attributes hold the totals:
+        matches -- number of matches ended
+        wins -- number of matches won by each AI
+        shots -- number of missiles fired by each AI
+        hits -- number of missiles fired by each AI which damaged an enemy
+            turtle (a missile damaging several enemies is one hit, as in
+            game.result)
+        damage_dealt -- damage dealt to enemy turtles by each AI
+        damage_taken -- damage taken by each AI (from any source)
+        explosions -- number of missile explosions of each cause
+        collisions -- number of block collisions of each AI
+    """
+
+    #=========================================================================
+
+    def __init__(self):
+        """Aggregator() -> Aggregator
+        In-memory event aggregator constructor.
+        """
+
+        self._lock = threading.Lock()
+        self.matches = 0
+        self.wins = {}
+        self.shots = {}
+        self.hits = {}
+        self.damage_dealt = {}
+        self.damage_taken = {}
+        self.explosions = {}
+        self.collisions = {}
+
+    #-------------------------------------------------------------------------
+
+    def _add(self, totals, key, amount=1):
+        """Aggregator._add(totals, key[, amount]) -> None
+        Adds an amount to one of the running totals.
+        """
+
+        totals[key] = totals.get(key, 0) + amount
+
+    #-------------------------------------------------------------------------
+
+    def __call__(self, event):
+        """Aggregator(event) -> None
+        Adds an event to the running totals.
+        """
+
+        kind = event["event"]
+        with self._lock:
+            if kind == SHOT:
+                self._add(self.shots, event["ai"])
+            elif kind == EXPLOSION:
+                self._add(self.explosions, event["cause"])
+            elif kind == DAMAGE:
+                self._add(self.damage_taken, event["target_ai"],
+                          event["amount"])
+                if event["team"] != event["target_team"]:
+                    self._add(self.damage_dealt, event["ai"],
+                              event["amount"])
+                if event["hit"] == True:
+                    self._add(self.hits, event["ai"])
+            elif kind == COLLISION:
+                self._add(self.collisions, event["ai"])
+            elif kind == END:
+                self.matches += 1
+                for name in event["winners"]:
+                    self._add(self.wins, name)
+
+    #-------------------------------------------------------------------------
+
+    def summary(self):
+        """Aggregator.summary() -> dict
+        Returns a copy of all running totals.
+        """
+
+        with self._lock:
+            return {"matches": self.matches, "wins": dict(self.wins),
+                    "shots": dict(self.shots), "hits": dict(self.hits),
+                    "damage_dealt": dict(self.damage_dealt),
+                    "damage_taken": dict(self.damage_taken),
+                    "explosions": dict(self.explosions),
+                    "collisions": dict(self.collisions)}
+
+#=============================================================================
+
+class QueuedSink:
+    """Queued event sink class.
+
+    Passes events on to another sink from a background thread, so that slow
+    sinks (such as those writing to disk) do not hold up the game. Events
+    are held in a bounded queue. If the queue fills up, the game waits for
+    room rather than dropping events.
+
+    If the sink raises an exception, the background thread keeps draining
+    the queue (so the game never waits forever), and the exception is raised
+    again from the next call to the queued sink or from close().
+    """
+
+    #=========================================================================
+
+    def __init__(self, sink, maxsize=1024):
+        """QueuedSink(sink[, maxsize]) -> QueuedSink
+        Queued event sink constructor.
+
+        Requires the following positional arguments:
+            sink (function) -- sink to pass events to
+
+        Accepts the following optional keyword arguments:
+            maxsize (int) [1024] -- maximum number of queued events
+        """
+
+        self.sink = sink
+        self._queue = queue.Queue(maxsize)
+        self._error = None # unreported exception raised by the sink
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    #-------------------------------------------------------------------------
+
+    def __call__(self, event):
+        """QueuedSink(event) -> None
+        Queues an event.
+        """
+
+        self._raise()
+        self._queue.put(event)
+
+    #-------------------------------------------------------------------------
+
+    def _drain(self):
+        """QueuedSink._drain() -> None
+        Passes queued events on to the sink until closed.
+        """
+
+        while True:
+            event = self._queue.get()
+            if event == None:
+                return None
+            try:
+                self.sink(event)
+            except Exception as e:
+                if self._error == None:
+                    self._error = e
+
+    #-------------------------------------------------------------------------
+
+    def _raise(self):
+        """QueuedSink._raise() -> None
+        Raises the first exception that the sink raised since the last call.
+        """
+
+        error = self._error
+        if error != None:
+            self._error = None
+            raise error
+
+    #-------------------------------------------------------------------------
+
+    def close(self):
+        """QueuedSink.close() -> None
+        Passes on all remaining events and then closes the sink (if it can be
+        closed), and then raises any exception that the sink raised which has
+        not yet been reported.
+        """
+
+        self._queue.put(None)
+        self._thread.join()
+        if hasattr(self.sink, "close") == True:
+            self.sink.close()
+        self._raise()
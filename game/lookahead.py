@@ -0,0 +1,357 @@
+"""Defines a lookahead API for search-based Combat Turtle AIs.
+
+An AI can use a Lookahead object to fork the game it is playing and simulate
+what would happen over the next several steps if it followed a hypothetical
+plan, using the game's own movement, missile, and damage rules. For example,
+an AI could compare a few plans each step and follow the best one:
+
+    import game.lookahead as la
+
+    def setup(self):
+        self.look = la.Lookahead(self, budget=50)
+
+    def step(self):
+        plans = [la.steady(forward=1, left=1, shoot=True),
+                 la.steady(forward=1, left=-1, shoot=True),
+                 la.steady(forward=-1)]
+        scores = []
+        for plan in plans:
+            f = self.look.rollout(plan, steps=30)
+            if f == None:
+                break # out of rollouts for this step
+            scores.append(f.turtle.health - f.turtle.other_health)
+        ...
+
+In a forked game every turtle is a puppet. The forking turtle follows the
+given policy, and every other turtle follows an opponent model, which by
+default keeps moving and turning at its most recent speeds without shooting.
+Policies and opponent models are functions which accept a turtle and choose
+its actions for the current step with the usual action methods, such as
+forward(), left(), and shoot(). The AI's own step() method is never called
+within a forked game, and forked games emit no events and draw nothing.
+"""
+
+import copy
+from .events import EventStream
+
+#=============================================================================
+
+def steady(forward=0, left=0, shoot=False):
+    """steady([forward], [left], [shoot]) -> function
+    Returns a policy which repeats the same actions every step.
+
+    Accepts the following optional keyword arguments:
+        forward (float) [0] -- movement rate (see TurtleParent.forward())
+        left (float) [0] -- turning rate (see TurtleParent.left())
+        shoot (bool) [False] -- whether to shoot whenever possible
+    """
+
+    def policy(turtle):
+        turtle.forward(forward)
+        turtle.left(left)
+        if shoot == True:
+            turtle.shoot()
+
+    return policy
+
+#-----------------------------------------------------------------------------
+
+def _hold_course(turtle):
+    """_hold_course(turtle) -> function
+    Returns the default opponent model for a turtle.
+
+    The turtle keeps moving and turning at the speeds that it used in its
+    most recent step, and does not shoot.
+    """
+
+    (speed, turn) = (turtle._speed, turtle._speed_turn)
+
+    def policy(t):
+        t._speed = speed
+        t._speed_turn = turn
+
+    return policy
+
+#-----------------------------------------------------------------------------
+
+def _stand_still(turtle):
+    """_stand_still(turtle) -> None
+    Policy which takes no actions.
+    """
+
+    pass
+
+#-----------------------------------------------------------------------------
+
+def fork(game):
+    """fork(game) -> TurtleCombatGame
+    Returns a headless copy of a game in its current state.
+
+    Requires the following positional arguments:
+        game (TurtleCombatGame) -- game to copy
+
+    The copy shares the original game's arena, but has no window, canvas, or
+    event sinks. Turtles and missiles are copied along with all of their
+    attributes (including any defined by the turtles' AIs).
+    """
+
+    memo = {id(game._arena): game._arena, id(game.root): None,
+            id(game._canvas): None, id(game._events): EventStream(),
+            id(game.p1_health): None, id(game.p2_health): None}
+    for var in game._health_vars:
+        memo[id(var)] = None
+    clone = copy.deepcopy(game, memo)
+    clone.headless = True
+    return clone
+
+#=============================================================================
+
+class Forecast:
+    """Forked game forecast class.
+
+    Holds a forked copy of a game, which can be simulated forwards without
+    affecting the original game.
+
+    The following public attributes and methods can be used to inspect and
+    advance the forecast:
+        game -- forked TurtleCombatGame
+        turtle -- forked copy of the turtle that requested the forecast
+        steps -- number of steps simulated so far
+        over -- whether the forked game has ended
+        winner -- winning team ID of the forked game (None if a tie or
+            unfinished)
+        run(policy[, steps]) -- simulates steps with a given policy
+    """
+
+    #=========================================================================
+
+    def __init__(self, game, turtle, opponent=None):
+        """Forecast(game, turtle[, opponent]) -> Forecast
+        Forked game forecast constructor.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- forked game
+            turtle (TurtleParent) -- turtle within the forked game that the
+                policy will control
+
+        Accepts the following optional keyword arguments:
+            opponent (function) [None] -- opponent model to control all other
+                turtles (by default each holds its current course)
+        """
+
+        self.game = game
+        self.turtle = turtle
+        self.steps = 0
+
+        # The step is unfinished if the turtle forked the game from within
+        # its own step() method
+        self._partial = turtle._time < game.iteration
+
+        # Make every other turtle a puppet of the opponent model
+        for t in game._turtles:
+            if t is not turtle:
+                model = opponent if opponent != None else _hold_course(t)
+                t.step = (lambda t=t, model=model: model(t))
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def over(self):
+        """Forecast.over -> bool
+        Returns whether the forked game has ended.
+        """
+
+        return self.game.over
+
+    @over.setter
+    def over(self, value):
+        """Do-nothing game over setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def winner(self):
+        """Forecast.winner -> int
+        Returns the winning team ID of the forked game.
+        """
+
+        return self.game.winner
+
+    @winner.setter
+    def winner(self, value):
+        """Do-nothing winner setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    def run(self, policy=None, steps=1):
+        """Forecast.run([policy], [steps]) -> Forecast
+        Simulates steps of the forked game.
+
+        Accepts the following optional keyword arguments:
+            policy (function) [None] -- policy to control the forecast's
+                turtle (None to take no actions)
+            steps (int) [1] -- number of steps to simulate (stopping early if
+                the game ends)
+
+        Returns this forecast, so that calls can be chained.
+        """
+
+        t = self.turtle
+        policy = policy if policy != None else _stand_still
+        t.step = (lambda: policy(t))
+
+        game = self.game
+        for i in range(steps):
+            if game.over == True:
+                break
+            if self._partial == True:
+                self._finish_step()
+            else:
+                game._step()
+            self.steps += 1
+
+        return self
+
+    #-------------------------------------------------------------------------
+
+    def _finish_step(self):
+        """Forecast._finish_step() -> None
+        Completes the step that was in progress when the game was forked.
+
+        The forecast's turtle chooses its actions afresh with the policy,
+        while its cooldown and every turtle which already moved during the
+        step are left as they were.
+        """
+
+        game = self.game
+        t = self.turtle
+        t._speed = 0
+        t._speed_turn = 0
+        t._shooting = False
+        t._queries.clear()
+        t.step()
+        t._apply()
+        for other in game._alive:
+            if other._time < game.iteration:
+                other._step()
+        game._end_step()
+        self._partial = False
+
+#=============================================================================
+
+class Lookahead:
+    """Lookahead helper class.
+
+    Forks the game of a given turtle, subject to a budget on the number of
+    forks per step, so that an AI's search stays within a predictable amount
+    of time however many plans it considers.
+
+    A Lookahead object is meant to be created in an AI's setup() method and
+    kept as one of its attributes. It is not copied into forked games.
+
+    The following public attributes and methods can be used to look ahead:
+        remaining -- number of forks remaining in the current step
+        fork([opponent]) -- returns a Forecast of the current game state
+        rollout(policy[, steps], [opponent]) -- returns a Forecast that has
+            been simulated for a number of steps
+    """
+
+    #=========================================================================
+
+    def __init__(self, turtle, budget=100):
+        """Lookahead(turtle[, budget]) -> Lookahead
+        Lookahead helper constructor.
+
+        Requires the following positional arguments:
+            turtle (TurtleParent) -- turtle whose game will be forked
+
+        Accepts the following optional keyword arguments:
+            budget (int) [100] -- maximum number of forks per step (None for
+                no limit)
+        """
+
+        self.turtle = turtle
+        self.budget = budget
+        self._time = turtle.time # step in which forks were last counted
+        self._used = 0 # number of forks during that step
+
+    #-------------------------------------------------------------------------
+
+    def __deepcopy__(self, memo):
+        """Lookahead.__deepcopy__(memo) -> Lookahead
+        Lookahead objects are shared with forked games rather than copied.
+        """
+
+        return self
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def remaining(self):
+        """Lookahead.remaining -> int
+        Returns the number of forks remaining in the current step.
+
+        Returns None if there is no budget.
+        """
+
+        if self.turtle.time != self._time:
+            self._time = self.turtle.time
+            self._used = 0
+        if self.budget == None:
+            return None
+        return max(0, self.budget - self._used)
+
+    @remaining.setter
+    def remaining(self, value):
+        """Do-nothing remaining fork setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    def fork(self, opponent=None):
+        """Lookahead.fork([opponent]) -> Forecast
+        Returns a Forecast of the turtle's game in its current state.
+
+        Accepts the following optional keyword arguments:
+            opponent (function) [None] -- opponent model to control all other
+                turtles (by default each holds its current course)
+
+        Returns None if this step's budget has been used up.
+        """
+
+        if self.remaining == 0:
+            return None
+        self._used += 1
+
+        game = self.turtle._game
+        clone = fork(game)
+        turtle = clone._turtles[game._turtles.index(self.turtle)]
+        return Forecast(clone, turtle, opponent)
+
+    #-------------------------------------------------------------------------
+
+    def rollout(self, policy, steps=30, opponent=None):
+        """Lookahead.rollout(policy, [steps], [opponent]) -> Forecast
+        Returns a Forecast which has followed a policy for a number of steps.
+
+        Requires the following positional arguments:
+            policy (function) -- policy to control the turtle
+
+        Accepts the following optional keyword arguments:
+            steps (int) [30] -- number of steps to simulate (stopping early
+                if the game ends)
+            opponent (function) [None] -- opponent model to control all other
+                turtles (by default each holds its current course)
+
+        Returns None if this step's budget has been used up.
+        """
+
+        forecast = self.fork(opponent)
+        if forecast == None:
+            return None
+        return forecast.run(policy, steps)
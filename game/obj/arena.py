@@ -3,6 +3,7 @@
 import math
 import random
 from .block import Block
+from ..util.visibility import VisibilityTable
 
 class Arena:
     """Arena class.
@@ -82,10 +83,54 @@ class Arena:
         # All currently-defined arenas use the same initial headings
         return 90
 
+    #-------------------------------------------------------------------------
+
+    def get_ring_coords(index, player, count, size=(800, 800), radius=200):
+        """Arena.get_ring_coords(index, player, count, [size], [radius]) ->
+        (int, int)
+        Static method to return a starting position on a ring of players.
+
+        Requires the following positional arguments:
+            index (int) -- arena layout index
+            player (int) -- player index (starting from 0)
+            count (int) -- total number of players
+
+        Accepts the following optional keyword arguments:
+            size (tuple (int, int)) [(800, 800)] -- arena width/height (px)
+            radius (int) [200] -- distance of the ring from the arena center
+
+        Games with more than two players place the players evenly around a
+        ring centered on the arena, beginning at the left and proceeding
+        counterclockwise. For two players this reproduces the default
+        starting coordinates.
+        """
+
+        angle = math.pi + 2*math.pi*player/count
+        return (int(round(size[0]/2 + radius*math.cos(angle))),
+                int(round(size[1]/2 - radius*math.sin(angle))))
+
+    #-------------------------------------------------------------------------
+
+    def get_ring_heading(index, player, count):
+        """Arena.get_ring_heading(index, player, count) -> int
+        Static method to return a starting heading on a ring of players.
+
+        Requires the following positional arguments:
+            index (int) -- arena layout index
+            player (int) -- player index (starting from 0)
+            count (int) -- total number of players
+
+        Players on the ring initially face counterclockwise around it. For two
+        players this reproduces the default starting headings.
+        """
+
+        return (int(round(270 + 360*player/count)) + 180) % 360 - 180
+
     #=========================================================================
 
-    def __init__(self, game, size=(800, 800), layout=0):
-        """Arena([size], [layout], [walls]) -> Arena
+    def __init__(self, game, size=(800, 800), layout=0, players=2,
+                 blocks=None):
+        """Arena([size], [layout], [players], [blocks]) -> Arena
         Arena constructor, including obstacle setup.
 
         Requires the following positional arguments:
@@ -94,6 +139,10 @@ class Arena:
         Accepts the following optional keyword arguments:
             size (tuple (int, int)) [(800, 800)] -- arena width/height (px)
             layout (int) [0] -- arena obstacle layout ID (see class docstring)
+            players (int) [2] -- number of players in the game
+            blocks (list (tuple (int, int, int, int))) [None] -- explicit
+                list of block boundaries, each given as (left, right, bottom,
+                top), which replaces the blocks of the layout if given
 
         The arena is centered at the origin and has the specified total width
         and height.
@@ -102,12 +151,22 @@ class Arena:
         # Assign given attributes
         self.game = game
         self.size = size
+        self.players = players
 
         # Initialize block object list
         self._blocks = []
 
+        # Block boundaries and line of sight lookup table (built on first
+        # request)
+        self._rects = None
+        self._visibility = None
+
         # Generate the walls defined by the layout (default to empty)
-        if layout == 1:
+        if blocks != None:
+            # Explicit block list
+            for b in blocks:
+                self._blocks.append(Block(self.game, *b))
+        elif layout == 1:
             # Large square in middle
             self._single_block()
         elif layout == 2:
@@ -236,7 +295,11 @@ class Arena:
             
             # Test whether the starting coordinates are free
             if (self.blocked(self.get_p1_coords()) or
-                self.blocked(self.get_p2_coords())):
+                self.blocked(self.get_p2_coords()) or
+                (self.players > 2 and
+                 any(self.blocked(self.get_ring_coords(i, self.players,
+                                                       self.size))
+                     for i in range(self.players)))):
                 
                 # If not, delete the tentative blocks and retry
                 del self._blocks[-1]
@@ -250,6 +313,40 @@ class Arena:
 
     #-------------------------------------------------------------------------
 
+    def get_starts(self, index):
+        """Arena.get_starts(index) -> list
+        Returns the starting coordinates and headings of all players.
+
+        Requires the following positional arguments:
+            index (int) -- arena layout index
+
+        Returns a list of (coords, heading) tuples, one for each player. Games
+        with up to two players use the default Player 1 and Player 2 starting
+        positions. Larger games place players on a ring around the center of
+        the arena, moving any blocked positions inwards or outwards along the
+        ring's radius until they are free.
+        """
+
+        # Use the default positions for two-player games
+        if self.players <= 2:
+            starts = [(Arena.get_p1_coords(index), Arena.get_p1_heading(index)),
+                      (Arena.get_p2_coords(index), Arena.get_p2_heading(index))]
+            return starts[:self.players]
+
+        # Otherwise find a free position on or near the ring for each player
+        starts = []
+        for i in range(self.players):
+            heading = Arena.get_ring_heading(index, i, self.players)
+            for r in (200, 260, 140, 320, 80, 380, 20):
+                coords = Arena.get_ring_coords(index, i, self.players,
+                                               self.size, r)
+                if self.blocked(coords) == False:
+                    break
+            starts.append((coords, heading))
+        return starts
+
+    #-------------------------------------------------------------------------
+
     def intersections(self, coords):
         """Arena.intersections(coords) -> list
         Returns a list of block objects that intersect a given coordinate.
@@ -287,6 +384,38 @@ class Arena:
 
     #-------------------------------------------------------------------------
 
+    def rects(self):
+        """Arena.rects() -> list
+        Returns the boundaries of every block in the arena.
+
+        Each block is given as a tuple (left, right, bottom, top). The list is
+        built the first time this method is called, since blocks do not move.
+        """
+
+        if self._rects == None:
+            self._rects = [(b.left, b.right, b.bottom, b.top)
+                           for b in self.blocks]
+        return self._rects
+
+    #-------------------------------------------------------------------------
+
+    def visibility(self):
+        """Arena.visibility() -> VisibilityTable
+        Returns the line of sight lookup table for this arena's layout.
+
+        The table is built (or loaded from the disk cache) the first time this
+        method is called, and the same table is returned afterwards. Its
+        sample spacing matches the missile speed used by the exact line of
+        sight test in TurtleParent.
+        """
+
+        if self._visibility == None:
+            self._visibility = VisibilityTable(self.size, self.rects(),
+                                               self.game.rules.missile_speed)
+        return self._visibility
+
+    #-------------------------------------------------------------------------
+
     @property
     def blocks(self):
         """Arena.blocks -> list
@@ -1,6 +1,6 @@
 """Defines the block class."""
 
-import tkinter as tk
+from ..util.canvas import tcl_error
 
 class Block:
     """Block class.
@@ -66,7 +66,7 @@ class Block:
             self.canvas.delete(self.sprite)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
 
     #-------------------------------------------------------------------------
@@ -103,9 +103,12 @@ class Block:
 
     def _draw(self):
         """Block._draw() -> None
-        Draws a block on the game canvas.
+        Draws a block on the game canvas (if the game has one).
         """
 
+        if self.canvas == None:
+            return None
+
         # Draw a rectangle on the game's canvas
         self.sprite = self.canvas.create_rectangle(self.left, self.bottom,
                           self.right, self.top, fill=self.color)
@@ -1,7 +1,9 @@
 """Defines the missile class."""
 
-import math
-import tkinter as tk
+from .. import events
+from ..rules import DEFAULT_RULES
+from ..util.canvas import tcl_error
+from ..util.trig import COS, SIN
 
 class Missile:
     """Missile class.
@@ -15,9 +17,15 @@ class Missile:
     has fired. The missile's step() method is called during its owner's
     _step() method. Its owner also handles the deletion of the missile object
     after it explodes.
+
+    Missiles are triggered by proximity to any turtle on a team other than
+    the shooter's. Nearby turtles are found through the game's spatial hash
+    rather than by measuring the distance to every turtle.
     """
 
-    # Static methods declare class constants to be accessed by other classes
+    # Static methods declare the class constants of the standard game, for
+    # use by other classes (games with other rules read their constants from
+    # the game's Rules object instead)
 
     #-------------------------------------------------------------------------
 
@@ -29,7 +37,7 @@ class Missile:
         heading.
         """
 
-        return 10
+        return DEFAULT_RULES.missile_speed
 
     #-------------------------------------------------------------------------
 
@@ -41,7 +49,7 @@ class Missile:
         after this number of steps.
         """
 
-        return 40
+        return DEFAULT_RULES.missile_lifespan
 
     #-------------------------------------------------------------------------
 
@@ -53,7 +61,7 @@ class Missile:
         Combat Turtle.
         """
 
-        return 20
+        return DEFAULT_RULES.missile_proximity
 
     #-------------------------------------------------------------------------
 
@@ -65,7 +73,7 @@ class Missile:
         (including the missile's shooter).
         """
 
-        return 20
+        return DEFAULT_RULES.missile_radius
 
     #-------------------------------------------------------------------------
 
@@ -77,7 +85,7 @@ class Missile:
         explosive radius.
         """
 
-        return 20
+        return DEFAULT_RULES.missile_damage
 
     #=========================================================================
 
@@ -89,8 +97,9 @@ class Missile:
             game (tcgame.TurtleCombatGame) -- game driver object
             shooter (tkturtle.CombatTurtle) -- combat turtle that shot this
                 missile (missile maintained in its shooter's list)
-            target (tkturtle.CombatTurtle) -- combat turtle to treat as the
-                target (missile explodes when close enough to target)
+            target (tkturtle.CombatTurtle) -- combat turtle that the shooter
+                is currently targeting (the missile explodes when close enough
+                to any enemy turtle, including this one)
             coords (tuple (int, int)) -- initial coordinates of missile
             heading (int) -- constant heading for missile
         """
@@ -104,17 +113,20 @@ class Missile:
         self.y = coords[1]
         self.heading = heading
 
-        # Assign constant attributes
+        # Assign constant attributes (from the rules of the game)
+        rules = game.rules
         self.sprite_radius = 4 # radius of circular missile sprite
-        self.speed = Missile.get_speed() # constant travel speed (px/step)
-        self.proximity = Missile.get_proximity() # missile explodes when
+        self.speed = rules.missile_speed # constant travel speed (px/step)
+        self.proximity = rules.missile_proximity # missile explodes when
             # within this distance (px) of the target turtle
-        self.radius = Missile.get_lifespan() # radius of explosion (px)
-        self.damage = Missile.get_damage() # damage on hit
+        self.radius = rules.missile_lifespan # radius of explosion (px)
+            # (the standard game has always used the missile lifespan here,
+            # rather than the documented missile_radius)
+        self.damage = rules.missile_damage # damage on hit
         self.exploding_frames = 4 # number of steps for explosion animation
 
         # Initialize countdown timer
-        self.countdown = Missile.get_lifespan() # time until explosion (steps)
+        self.countdown = rules.missile_lifespan # time until explosion (steps)
         self.exploding = 0 # time since explosion began (steps)
         
         # Initialize list of points to define smoke trail line
@@ -135,7 +147,7 @@ class Missile:
             self.canvas.delete(self.sprite)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
         
         # Delete smoke trail (if it has been defined)
@@ -143,7 +155,7 @@ class Missile:
             self.canvas.delete(self.trail)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
 
     #-------------------------------------------------------------------------
@@ -165,35 +177,35 @@ class Missile:
             # If not already exploding, move and test for collisions/timers
 
             # Move forward
-            self.x += self.speed*math.cos(math.radians(self.heading))
-            self.y -= self.speed*math.sin(math.radians(self.heading))
+            self.x += self.speed*COS[self.heading]
+            self.y -= self.speed*SIN[self.heading]
             
             # Add point to smoke trail
             self.path += [self.x, self.y]
 
-            # Determine whether to explode
-            explode = False
+            # Determine whether to explode (and why)
+            cause = None
 
             # If timer has expired, explode
             if self.countdown == 0:
-                explode = True
+                cause = "timer"
 
             # Test for wall collisions
-            elif (self.x < 0 or self.x > int(self.game.canvas["width"]) or
-                  self.y < 0 or self.y > int(self.game.canvas["height"])):
-                explode = True
+            elif (self.x < 0 or self.x > int(self.game.size[0]) or
+                  self.y < 0 or self.y > int(self.game.size[1])):
+                cause = "wall"
 
-            # Test for proximity to target turtle
-            elif self.target.distance((self.x, self.y)) < self.proximity:
-                explode = True
+            # Test for proximity to enemy turtles
+            elif self._enemy_near() == True:
+                cause = "enemy"
 
             # Test for block collisions
             elif len(self.game.intersections((self.x, self.y))) > 0:
-                explode = True
+                cause = "block"
 
             # If any explosion trigger is activated, explode
-            if explode == True:
-                self._explode()
+            if cause != None:
+                self._explode(cause)
 
         else:
             # If already exploding, increment counter
@@ -203,9 +215,6 @@ class Missile:
         if self.exploding >= self.exploding_frames:
             self._remove()
 
-        # Update sprite
-        self._redraw()
-
     #-------------------------------------------------------------------------
 
     def _redraw(self):
@@ -216,16 +225,21 @@ class Missile:
             should call -- no
             should overwrite -- no
 
-        This method is called at the end of each step to update the missile's
-        appearance on the screen.
+        This method is called by the game driver whenever it draws a frame
+        (by default at the end of each step) to update the missile's
+        appearance on the screen. Nothing is drawn in headless games, which
+        have no canvas.
         """
 
+        if self.canvas == None:
+            return None
+
         # Delete sprite (if it has been defined)
         try:
             self.canvas.delete(self.sprite)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
         
         # Delete smoke trail (if it has been defined)
@@ -233,7 +247,7 @@ class Missile:
             self.canvas.delete(self.trail)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
         
         # Draw smoke trail
@@ -260,10 +274,14 @@ class Missile:
 
     #-------------------------------------------------------------------------
 
-    def _explode(self):
-        """Missile._explode() -> None
+    def _explode(self, cause):
+        """Missile._explode(cause) -> None
         Causes an explosion at the missile's location.
 
+        Requires the following positional arguments:
+            cause (str) -- what triggered the explosion ("timer", "wall",
+                "enemy", or "block")
+
         Missiles explode on contact with the enemy turtle or an obstacle, or
         when their timer expires.
 
@@ -272,19 +290,82 @@ class Missile:
         list.
         """
 
-        # Damage shooter if close enough
-        if self.shooter.distance((self.x, self.y)) < self.radius:
-            self.shooter._damage(self.damage)
-
-        # Damage target if close
-        if self.target.distance((self.x, self.y)) < self.radius:
-            self.target._damage(self.damage)
+        stream = self.game.events
+        step = self.game.iteration
+        self.shooter._explosions[cause] += 1
+        stream.emit(events.EXPLOSION, step, x=self.x, y=self.y, cause=cause,
+                    **self.shooter._identity())
+
+        # Damage all turtles which are close enough (including the shooter),
+        # counting a hit for the first enemy damaged
+        hit = False # whether an enemy was damaged
+        for t in self.game._turtles_near((self.x, self.y), self.radius):
+            if t._distance(t.position, (self.x, self.y)) < self.radius:
+                t._damage(self.damage)
+                if t == self.shooter:
+                    t._self_damage += self.damage
+                first = (hit == False and t._team != self.shooter._team)
+                if t._team != self.shooter._team:
+                    hit = True
+                    self.shooter._damage_dealt += self.damage
+                if first == True:
+                    self.shooter._hits += 1
+                stream.emit(events.DAMAGE, step, amount=self.damage,
+                            hit=first, **self.shooter._identity(),
+                            **t._identity("target_"))
 
         # Increment exploding timer
         self.exploding += 1
 
     #-------------------------------------------------------------------------
 
+    def _flight_path(self):
+        """Missile._flight_path() -> list
+        Predicts the missile's positions over the rest of its flight.
+
+        Returns a list of the coordinates that the missile will reach in each
+        upcoming step, following the same movement and explosion rules as
+        _step(), and ending with the position at which it would explode on
+        reaching a wall or block or when its timer expires. Proximity to
+        turtles is not considered, so the missile may explode sooner. Returns
+        an empty list for a missile which has already exploded.
+        """
+
+        if self.exploding > 0:
+            return []
+
+        (x, y) = (self.x, self.y)
+        dx = self.speed*COS[self.heading]
+        dy = self.speed*SIN[self.heading]
+        (width, height) = (int(self.game.size[0]), int(self.game.size[1]))
+        path = []
+        for countdown in range(self.countdown - 1, -1, -1):
+            x += dx
+            y -= dy
+            path.append((x, y))
+            if (countdown == 0 or x < 0 or x > width or y < 0 or
+                y > height or len(self.game.intersections((x, y))) > 0):
+                break
+        return path
+
+    #-------------------------------------------------------------------------
+
+    def _enemy_near(self):
+        """Missile._enemy_near() -> bool
+        Determines whether the missile is within proximity of an enemy.
+
+        Enemies are all turtles on a different team than the shooter.
+        """
+
+        for t in self.game._turtles_near((self.x, self.y), self.proximity):
+            if (t._team != self.shooter._team and
+                t._distance(t.position, (self.x, self.y)) <
+                self.proximity):
+                return True
+        return False
+
+    #-------------------------------------------------------------------------
+
     def _remove(self):
         """Missile._remove() -> None
         Removes a missile after its explosion animation has completed.
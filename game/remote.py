@@ -0,0 +1,391 @@
+"""Defines the message protocol used to play Combat Turtles remotely.
+
+A remote AI plays through a RemoteTurtle, which stands in for it inside the
+game engine. Each step the engine sends the remote AI an observation of its
+turtle's state, and the AI answers with an action to apply on its turtle's
+behalf. The asyncio match server in game.server carries these messages over
+TCP or Unix domain sockets.
+
+Every message is a frame made up of a 4-byte big-endian payload length
+followed by the payload, and every payload begins with a 1-byte message type:
+    HELLO (client -> server) -- match ID, player slot, and AI name
+    SETUP (server -> client) -- arena size, starting state, and blocks
+    OBS (server -> client) -- per-step observation of the turtle's state
+    ACT (client -> server) -- per-step action of the turtle
+    END (server -> client) -- result of the match
+
+All fields are packed with the struct module in network byte order, so the
+protocol can be implemented in any language. See the pack_*() and unpack_*()
+functions for the field layout of each message.
+"""
+
+import collections
+import struct
+from .tcgame import TurtleCombatGame
+from .tcturtle import TurtleParent
+from .util.angles import Angle
+
+#=============================================================================
+
+# Message type codes
+HELLO = 1
+SETUP = 2
+OBS = 3
+ACT = 4
+END = 5
+
+# Frame header (payload length)
+_LENGTH = struct.Struct("!I")
+
+# Message layouts (the HELLO name and SETUP block list follow the fixed part)
+_HELLO = struct.Struct("!BIB") # type, match, slot
+_SETUP = struct.Struct("!BHHBddhBddhH") # type, width, height, slot, x, y,
+    # heading, has other, other x, other y, other heading, block count
+_BLOCK = struct.Struct("!dddd") # left, right, bottom, top
+_OBS = struct.Struct("!BIddhiiBddhiiii") # type, time, x, y, heading, health,
+    # cooldown, has other, other x, other y, other heading, other speed,
+    # other turn speed, other health, other cooldown
+_ACT = struct.Struct("!BIiiB") # type, time, speed, turn speed, shoot
+_END = struct.Struct("!BbI") # type, result, iterations
+
+# Decoded message contents
+Setup = collections.namedtuple("Setup", ["size", "slot", "start",
+                                         "other_start", "blocks"])
+Observation = collections.namedtuple("Observation", [
+    "time", "x", "y", "heading", "health", "cooldown", "has_other",
+    "other_x", "other_y", "other_heading", "other_speed",
+    "other_turn_speed", "other_health", "other_cooldown"])
+Action = collections.namedtuple("Action", ["time", "speed", "turn_speed",
+                                           "shoot"])
+
+#=============================================================================
+
+def frame(payload):
+    """frame(payload) -> bytes
+    Prefixes a message payload with its length.
+    """
+
+    return _LENGTH.pack(len(payload)) + payload
+
+#-----------------------------------------------------------------------------
+
+def frame_length(header):
+    """frame_length(header) -> int
+    Returns the payload length given by a 4-byte frame header.
+    """
+
+    return _LENGTH.unpack(header)[0]
+
+#-----------------------------------------------------------------------------
+
+def message_type(payload):
+    """message_type(payload) -> int
+    Returns the type code of a message payload.
+    """
+
+    return payload[0]
+
+#-----------------------------------------------------------------------------
+
+def pack_hello(match, slot, name):
+    """pack_hello(match, slot, name) -> bytes
+    Packs a HELLO message, sent by a client to claim a player slot.
+
+    Requires the following positional arguments:
+        match (int) -- match ID
+        slot (int) -- player index within the match
+        name (str) -- name of the client's AI
+    """
+
+    return _HELLO.pack(HELLO, match, slot) + name.encode("utf-8")
+
+#-----------------------------------------------------------------------------
+
+def unpack_hello(payload):
+    """unpack_hello(payload) -> tuple
+    Unpacks a HELLO message into a (match, slot, name) tuple.
+    """
+
+    (_, match, slot) = _HELLO.unpack_from(payload)
+    return (match, slot, payload[_HELLO.size:].decode("utf-8", "replace"))
+
+#-----------------------------------------------------------------------------
+
+def pack_setup(turtle, slot):
+    """pack_setup(turtle, slot) -> bytes
+    Packs a SETUP message describing a turtle's game before the first step.
+
+    Requires the following positional arguments:
+        turtle (TurtleParent) -- turtle controlled by the client
+        slot (int) -- player index within the match
+    """
+
+    game = turtle._game
+    other = turtle._other
+    if other == None:
+        other_state = (0, 0.0, 0.0, 0)
+    else:
+        other_state = (1, other.x, other.y, other.heading)
+    out = [_SETUP.pack(SETUP, game.size[0], game.size[1], slot, turtle.x,
+                       turtle.y, turtle.heading, *other_state,
+                       len(game.blocks))]
+    for b in game.blocks:
+        out.append(_BLOCK.pack(b.left, b.right, b.bottom, b.top))
+    return b"".join(out)
+
+#-----------------------------------------------------------------------------
+
+def unpack_setup(payload):
+    """unpack_setup(payload) -> Setup
+    Unpacks a SETUP message.
+
+    The starting states are given as ((x, y), heading) tuples, with the
+    opponent's starting state None if the turtle has no opponent.
+    """
+
+    f = _SETUP.unpack_from(payload)
+    other_start = None
+    if f[7] == 1:
+        other_start = ((f[8], f[9]), f[10])
+    blocks = [_BLOCK.unpack_from(payload, _SETUP.size + i*_BLOCK.size)
+              for i in range(f[11])]
+    return Setup((f[1], f[2]), f[3], ((f[4], f[5]), f[6]), other_start,
+                 blocks)
+
+#-----------------------------------------------------------------------------
+
+def pack_observation(turtle):
+    """pack_observation(turtle) -> bytes
+    Packs an OBS message describing a turtle's state for the coming step.
+
+    Requires the following positional arguments:
+        turtle (TurtleParent) -- turtle controlled by the client
+
+    This should be called between the missile and turtle phases of a step
+    (see TurtleCombatGame._step()). The observation then contains exactly
+    what the turtle's step() method would see, including the cooldown that
+    the turtle is about to reduce.
+    """
+
+    other = (0, 0.0, 0.0, 0, 0, 0, 0, 0)
+    if turtle._other != None:
+        other = (1, turtle.other_x, turtle.other_y, turtle.other_heading,
+                 turtle.other_speed, turtle.other_turn_speed,
+                 turtle.other_health, turtle.other_cooldown)
+    return _OBS.pack(OBS, turtle.time, turtle.x, turtle.y, turtle.heading,
+                     turtle.health, max(0, turtle.cooldown - 1), *other)
+
+#-----------------------------------------------------------------------------
+
+def unpack_observation(payload):
+    """unpack_observation(payload) -> Observation
+    Unpacks an OBS message.
+    """
+
+    return Observation(*_OBS.unpack_from(payload)[1:])
+
+#-----------------------------------------------------------------------------
+
+def pack_action(time, speed, turn_speed, shoot):
+    """pack_action(time, speed, turn_speed, shoot) -> bytes
+    Packs an ACT message, sent by a client in reply to an observation.
+
+    Requires the following positional arguments:
+        time (int) -- time of the observation being answered
+        speed (int) -- movement speed (px/step, negative for backwards)
+        turn_speed (int) -- CCW turning speed (deg/step, negative for CW)
+        shoot (bool) -- whether to attempt to shoot
+    """
+
+    return _ACT.pack(ACT, time, int(speed), int(turn_speed),
+                     1 if shoot == True else 0)
+
+#-----------------------------------------------------------------------------
+
+def unpack_action(payload):
+    """unpack_action(payload) -> Action
+    Unpacks an ACT message.
+    """
+
+    (_, time, speed, turn_speed, shoot) = _ACT.unpack_from(payload)
+    return Action(time, speed, turn_speed, shoot == 1)
+
+#-----------------------------------------------------------------------------
+
+def pack_end(result, iterations):
+    """pack_end(result, iterations) -> bytes
+    Packs an END message, sent to each client when its match ends.
+
+    Requires the following positional arguments:
+        result (int) -- 1 for a win, 0 for a tie, or -1 for a loss
+        iterations (int) -- number of steps played
+    """
+
+    return _END.pack(END, result, iterations)
+
+#-----------------------------------------------------------------------------
+
+def unpack_end(payload):
+    """unpack_end(payload) -> tuple
+    Unpacks an END message into a (result, iterations) tuple.
+    """
+
+    return _END.unpack_from(payload)[1:]
+
+#=============================================================================
+
+class RemoteTurtle(TurtleParent):
+    """Remote combat turtle.
+
+    Stands in for an AI that runs outside of the game engine. Rather than
+    deciding its own moves, this turtle applies whichever action was last
+    received for the current step. If no action arrived in time, the turtle
+    stays still for the step.
+
+    Requested speeds are clamped to the turtle's maximum speeds, and shooting
+    is subject to the usual cooldown.
+    """
+
+    #-------------------------------------------------------------------------
+
+    def class_name():
+        """RemoteTurtle.class_name() -> str
+        Static method to return the name of the Combat Turtle AI.
+        """
+
+        return "RemoteTurtle"
+
+    #-------------------------------------------------------------------------
+
+    def class_desc():
+        """RemoteTurtle.class_desc() -> str
+        Static method to return a description of the Combat Turtle AI.
+        """
+
+        return "Controlled by an AI client over a socket."
+
+    #-------------------------------------------------------------------------
+
+    def class_shape():
+        """RemoteTurtle.class_shape() -> (int or tuple)
+        Static method to define the Combat Turtle's shape image.
+        """
+
+        return 0
+
+    #=========================================================================
+
+    def setup(self):
+        """RemoteTurtle.setup() -> None
+        Initialization code for remote turtle.
+        """
+
+        self._action = None # pending action (speed, turn speed, shoot)
+
+    #-------------------------------------------------------------------------
+
+    def step(self):
+        """RemoteTurtle.step() -> None
+        Step event code for remote turtle.
+
+        Applies the pending action, if any, and then clears it.
+        """
+
+        if self._action == None:
+            return None
+
+        (speed, turn_speed, shoot) = self._action
+        self._action = None
+        self._speed = max(-self.max_speed, min(self.max_speed, speed))
+        self._speed_turn = max(-self.max_turn_speed,
+                               min(self.max_turn_speed, turn_speed))
+        if shoot == True:
+            self.shoot()
+
+#=============================================================================
+
+class Pilot:
+    """Remote AI pilot class.
+
+    Runs a local Combat Turtle AI on behalf of a remote client. The pilot
+    keeps a headless shadow game containing the AI's turtle and a stand-in
+    for its opponent, copies each received observation into them, and then
+    calls the AI's step() method to decide on an action.
+
+    Since the shadow game has the same arena as the real one, any AI built on
+    TurtleParent can be played remotely without modification, and it makes
+    the same decisions as it would in a local game.
+
+    The following public methods can be used to drive the AI:
+        act(obs) -- returns the AI's action for an observation
+    """
+
+    #=========================================================================
+
+    def __init__(self, cls, setup):
+        """Pilot(cls, setup) -> Pilot
+        Remote AI pilot constructor.
+
+        Requires the following positional arguments:
+            cls (str or class) -- Combat Turtle AI class (or its full class
+                name)
+            setup (Setup) -- unpacked SETUP message of the match
+
+        The AI's setup() method is called once the shadow game is ready.
+        """
+
+        # Build the shadow game, with the AI in the first slot
+        classes = [cls]
+        starts = [setup.start]
+        if setup.other_start != None:
+            classes.append(TurtleParent)
+            starts.append(setup.other_start)
+        self.game = TurtleCombatGame(size=setup.size, classes=classes,
+                                     blocks=setup.blocks, starts=starts,
+                                     headless=True)
+        self.turtle = self.game.p1 # AI turtle
+        self.other = self.game.p2 # stand-in for the opponent
+
+    #-------------------------------------------------------------------------
+
+    def act(self, obs):
+        """Pilot.act(obs) -> tuple
+        Returns the AI's action for an observation.
+
+        Requires the following positional arguments:
+            obs (Observation) -- unpacked OBS message
+
+        Returns a tuple of the form (speed, turn_speed, shoot), as expected
+        by pack_action().
+        """
+
+        # Copy the observed state into the shadow game
+        t = self.turtle
+        (t._x, t._y) = (obs.x, obs.y)
+        t._heading = Angle(obs.heading, "degrees")
+        t._health = obs.health
+        t._cooldown = obs.cooldown
+        t._time = obs.time
+        if obs.has_other == 1 and self.other != None:
+            o = self.other
+            (o._x, o._y) = (obs.other_x, obs.other_y)
+            o._heading = Angle(obs.other_heading, "degrees")
+            o._health = obs.other_health
+            t._other_prev_position = (obs.other_x, obs.other_y)
+            t._other_prev_heading = obs.other_heading
+            t._other_prev_speed = obs.other_speed
+            t._other_prev_turn_speed = obs.other_turn_speed
+            t._other_prev_health = obs.other_health
+            t._other_cooldown = obs.other_cooldown
+
+        # Forget any queries cached in the previous state
+        t._queries.clear()
+        if self.other != None:
+            self.other._queries.clear()
+
+        # Let the AI decide
+        t._speed = 0
+        t._speed_turn = 0
+        t._shooting = False
+        t.step()
+        return (t._speed, t._speed_turn, t._shooting)
@@ -0,0 +1,105 @@
+"""Defines the result record of a match.
+
+Every game can report its result as a MatchResult record (see
+TurtleCombatGame.result()), which holds the following fields:
+    winner -- winning team ID (None for a tie or an unfinished game)
+    winners -- AI names of the winning team's turtles
+    reason -- why the game ended, which is one of:
+        "kill" -- a single team has surviving turtles
+        "tie" -- no turtles survived
+        "cutoff" -- the iteration cutoff was reached (the team with the most
+            total remaining health wins, unless there is a tie)
+        None -- the game has not ended (for example because its window was
+            closed early)
+    steps -- number of steps played
+    players -- a PlayerResult record for each turtle, in player order
+
+Each PlayerResult record holds the following fields:
+    name -- player name ("Player 1", "Player 2", ...)
+    ai -- AI name
+    team -- team ID
+    health -- remaining health (0 if destroyed)
+    shots -- number of missiles fired
+    hits -- number of missiles fired which damaged an enemy turtle (a
+        missile damaging several enemies is one hit, as in the hits totals of
+        game.events.Aggregator)
+    damage_dealt -- damage dealt to enemy turtles
+    damage_taken -- damage taken (from any source, including its own
+        missiles)
+    self_damage -- damage taken from its own missiles
+    explosions -- number of its missiles which exploded for each cause (see
+        game.events), where "enemy" means near an enemy turtle, and "wall",
+        "block", and "timer" mean missiles which missed
+    steps -- number of steps survived
+    sight_steps -- number of steps ending with the turtle in line of sight of
+        its opponent (as reported by TurtleParent.line_of_sight())
+    distance -- total distance moved (px)
+    moves -- histogram of the distance moved in each step, where entry i
+        counts the steps in which the turtle moved i px (rounded), and the
+        last entry counts all steps with more movement than the maximum
+        speed (such as being pushed out of a block)
+
+The statistics are kept by the engine as counters which are updated while
+the match is played (for example when a missile is fired or explodes), so
+building a record costs no more than reading a few attributes of each turtle,
+and no replay of the match is needed to analyze it. Accuracy, for example, is
+hits/shots, and the fraction of time spent in sight of the opponent is
+sight_steps/steps.
+
+Records consist only of tuples, lists, dictionaries, strings, and numbers, so
+they can be pickled compactly (for example to return them from worker
+processes) or written directly as JSON. The to_dict() and from_dict()
+functions convert records to and from dictionaries with named fields, for
+JSON output that is easier to read.
+"""
+
+import collections
+
+#=============================================================================
+
+# Reasons for the end of a game
+KILL = "kill"
+TIE = "tie"
+CUTOFF = "cutoff"
+
+# Result of a single turtle (see module documentation)
+PlayerResult = collections.namedtuple("PlayerResult", [
+    "name", "ai", "team", "health", "shots", "hits", "damage_dealt",
+    "damage_taken", "self_damage", "explosions", "steps", "sight_steps",
+    "distance", "moves"])
+
+# Result of a match (see module documentation)
+MatchResult = collections.namedtuple("MatchResult", [
+    "winner", "winners", "reason", "steps", "players"])
+
+#=============================================================================
+
+def to_dict(result):
+    """to_dict(result) -> dict
+    Converts a match result record to a dictionary.
+
+    Requires the following positional arguments:
+        result (MatchResult) -- match result
+
+    Returns a dictionary of the record's fields, with the players given as a
+    list of dictionaries.
+    """
+
+    d = result._asdict()
+    d["players"] = [p._asdict() for p in result.players]
+    return d
+
+#-----------------------------------------------------------------------------
+
+def from_dict(d):
+    """from_dict(d) -> MatchResult
+    Converts a dictionary made by to_dict() back to a match result record.
+
+    Requires the following positional arguments:
+        d (dict) -- dictionary of the record's fields
+    """
+
+    fields = dict(d)
+    fields["players"] = [PlayerResult(**p) for p in d["players"]]
+    fields["winners"] = list(d["winners"])
+    return MatchResult(**fields)
@@ -0,0 +1,41 @@
+"""Defines the rules of the game.
+
+All of the constants that govern a game (turtle movement limits, missile
+behavior, arena size, and timing) are collected in a single immutable Rules
+object, which is given to TurtleCombatGame and read by every game object. The
+default rules are those of the standard game:
+
+    DEFAULT_RULES = Rules()
+
+A variant can be made by giving only the fields that change, for example
+faster missiles in a larger arena:
+
+    fast = Rules(missile_speed=15, size=(1200, 1200))
+    game = TurtleCombatGame(class1=..., class2=..., rules=fast)
+
+or equivalently with DEFAULT_RULES._replace(missile_speed=15, ...). Since
+Rules objects are plain tuples, they can be compared, hashed, and sent to
+other processes (for example to play batches of rule variants in parallel).
+"""
+
+import collections
+
+#=============================================================================
+
+# Game rules, with the standard game's values as defaults
+Rules = collections.namedtuple("Rules", [
+    "max_speed", # maximum movement speed of a turtle (px/step)
+    "max_turn_speed", # maximum turning speed of a turtle (deg/step)
+    "shoot_delay", # delay between missile shots (steps)
+    "health", # starting health of a turtle (hp)
+    "missile_speed", # constant travel speed of a missile (px/step)
+    "missile_lifespan", # number of steps before a missile explodes
+    "missile_proximity", # distance (px) at which a missile is triggered
+    "missile_radius", # explosive radius of a missile (px)
+    "missile_damage", # damage dealt by a missile explosion (hp)
+    "size", # arena width/height (px)
+    "step_time"], # time per step (ms), or 0 for as fast as possible
+    defaults=[4, 15, 60, 100, 10, 40, 20, 20, 20, (800, 800), 33])
+
+# Rules of the standard game
+DEFAULT_RULES = Rules()
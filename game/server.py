@@ -0,0 +1,409 @@
+"""Defines an asyncio match server for remote Combat Turtle AIs.
+
+The server runs any number of headless matches concurrently within a single
+process. Each match may mix local AIs with remote ones, which connect over
+TCP or a Unix domain socket and exchange the messages defined in game.remote.
+
+A typical orchestrator creates its matches, starts listening, and then plays
+every match concurrently:
+
+    server = MatchServer(timeout=0.05)
+    address = await server.listen(port=0)
+    ids = [server.create_match([None, "ai.direct.CombatTurtle"])
+           for i in range(100)]
+    games = await asyncio.gather(*(server.play(i) for i in ids))
+
+where each None entry leaves a player slot open for a remote client, such as
+the stand-in client run_client(), which plays any local AI built on
+TurtleParent through the server.
+"""
+
+import asyncio
+from . import remote
+from .rules import DEFAULT_RULES
+from .tcgame import TurtleCombatGame
+
+#=============================================================================
+
+async def _read_message(reader):
+    """_read_message(reader) -> bytes
+    Reads the payload of a single framed message from a stream.
+
+    Raises asyncio.IncompleteReadError if the stream ends first.
+    """
+
+    header = await reader.readexactly(4)
+    return await reader.readexactly(remote.frame_length(header))
+
+#=============================================================================
+
+class _Seat:
+    """Remote player slot class.
+
+    Tracks the connection of the client controlling one RemoteTurtle, along
+    with a queue of the actions received from it.
+    """
+
+    #=========================================================================
+
+    def __init__(self, turtle, slot):
+        """_Seat(turtle, slot) -> _Seat
+        Remote player slot constructor.
+        """
+
+        self.turtle = turtle
+        self.slot = slot
+        self.writer = None # stream to the client (None until connected)
+        self.ready = asyncio.Event() # set once the client has connected
+        self.closed = False # whether the client has disconnected
+        self.actions = asyncio.Queue() # received actions (None on close)
+
+#=============================================================================
+
+class MatchServer:
+    """Asyncio match server class.
+
+    Hosts headless Combat Turtles matches in which some or all of the players
+    are controlled by remote clients.
+
+    Each step of a match is run in two phases (see TurtleCombatGame._step()).
+    After the missile phase, every remote turtle still in play is sent an
+    observation of its state. The server then waits for each client's action
+    until a shared deadline, after which the turtle phase is run. A client
+    that misses the deadline simply stands still for that step, and any late
+    action is discarded once it arrives. A client that disconnects, or that
+    stops reading its messages for longer than the step timeout, stands
+    still for the rest of the match. A slot that is not claimed within the
+    connection timeout is forfeited: its turtle is destroyed before the
+    first step.
+
+    All remote turtles in a match observe the same snapshot, taken before
+    any turtle moves. In a local game, a turtle that steps later in the
+    player order sees the positions that earlier turtles have just moved to
+    through distance(), so a match between two remote AIs can play out
+    slightly differently from the same match played locally.
+
+    Matches only wait on their own clients, so many matches can be played
+    concurrently on one event loop.
+
+    The following public methods can be used to run the server:
+        listen([host], [port], [path]) -- starts accepting client connections
+        create_match(classes, ...) -- creates a new match and returns its ID
+        play(match) -- plays a match once its clients have connected
+        close() -- stops accepting client connections
+    """
+
+    #=========================================================================
+
+    def __init__(self, timeout=0.05, connect_timeout=10.0):
+        """MatchServer([timeout], [connect_timeout]) -> MatchServer
+        Match server constructor.
+
+        Accepts the following optional keyword arguments:
+            timeout (float) [0.05] -- time to wait for actions each step (s)
+            connect_timeout (float) [10.0] -- time to wait for clients to
+                claim the remote slots of a match (s)
+        """
+
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._matches = {} # remote seats of each unfinished match, by ID
+        self._games = {} # game of each unfinished match, by ID
+        self._next_id = 0 # ID of the next match to be created
+        self._servers = [] # listening asyncio servers
+
+    #-------------------------------------------------------------------------
+
+    async def listen(self, host="127.0.0.1", port=0, path=None):
+        """MatchServer.listen([host], [port], [path]) -> (tuple or str)
+        Starts accepting client connections.
+
+        Accepts the following optional keyword arguments:
+            host (str) ["127.0.0.1"] -- TCP host address
+            port (int) [0] -- TCP port (0 to choose any free port)
+            path (str) [None] -- Unix domain socket path, which is used
+                instead of TCP if given
+
+        Returns the (host, port) address or socket path being listened on.
+        This may be called more than once to listen on several addresses.
+        """
+
+        if path != None:
+            server = await asyncio.start_unix_server(self._connect,
+                                                     path=path)
+            address = path
+        else:
+            server = await asyncio.start_server(self._connect, host, port)
+            address = server.sockets[0].getsockname()[:2]
+        self._servers.append(server)
+        return address
+
+    #-------------------------------------------------------------------------
+
+    async def close(self):
+        """MatchServer.close() -> None
+        Stops accepting client connections.
+        """
+
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        del self._servers[:]
+
+    #-------------------------------------------------------------------------
+
+    def create_match(self, classes, teams=None, layout=0, cutoff=-1,
+                     size=(800, 800), los_table=False, rules=None):
+        """MatchServer.create_match(classes, [teams], [layout], [cutoff],
+        [size], [los_table], [rules]) -> int
+        Creates a new headless match and returns its ID.
+
+        Requires the following positional arguments:
+            classes (list) -- list of player classes (or full class names),
+                with None for each slot to be controlled by a remote client
+
+        Accepts the following optional keyword arguments:
+            teams (list) [None] -- list of team IDs for each player
+            layout (int) [0] -- arena obstacle layout ID
+            cutoff (int) [-1] -- game time cutoff (negative for no limit)
+            size (tuple (int, int)) [(800, 800)] -- arena width/height (px)
+            los_table (bool) [False] -- whether to use a line of sight lookup
+                table
+            rules (Rules) [None] -- rules of the game (see game.rules), which
+                must match the standard rules apart from the arena size and
+                step time
+
+        Clients claim a remote slot by sending the returned match ID and the
+        slot's index within the class list.
+
+        Raises ValueError if the rules differ from the standard rules in any
+        other way, since the SETUP message only tells clients the arena size,
+        and their shadow games would otherwise play by different rules than
+        the server.
+        """
+
+        # Only the arena size and step time may differ from the standard game
+        if rules != None:
+            variant = rules._replace(size=DEFAULT_RULES.size,
+                                     step_time=DEFAULT_RULES.step_time)
+            if variant != DEFAULT_RULES:
+                raise ValueError("remote matches only support the standard "
+                                 "rules")
+        classes = [remote.RemoteTurtle if c == None else c for c in classes]
+        game = TurtleCombatGame(size=size, layout=layout, classes=classes,
+                                teams=teams, cutoff=cutoff,
+                                los_table=los_table, headless=True,
+                                rules=rules)
+        seats = {}
+        for i in range(len(classes)):
+            if classes[i] == remote.RemoteTurtle:
+                seats[i] = _Seat(game._players[i], i)
+
+        match = self._next_id
+        self._next_id += 1
+        self._matches[match] = seats
+        self._games[match] = game
+        return match
+
+    #-------------------------------------------------------------------------
+
+    async def play(self, match):
+        """MatchServer.play(match) -> TurtleCombatGame
+        Plays a match through to the end.
+
+        Requires the following positional arguments:
+            match (int) -- match ID
+
+        Waits for every remote slot to be claimed, plays the match, sends
+        each client the result, and then returns the finished game. Slots
+        that are not claimed within the connection timeout are forfeited.
+        """
+
+        seats = list(self._matches[match].values())
+        game = self._games[match]
+        loop = asyncio.get_running_loop()
+
+        # Wait for all clients, forfeiting the slots of any that are late
+        deadline = loop.time() + self.connect_timeout
+        for seat in seats:
+            try:
+                await asyncio.wait_for(seat.ready.wait(),
+                                       max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                seat.closed = True
+                seat.turtle._health = 0
+
+        while game.over == False:
+            game._step_missiles()
+
+            # Send observations to all connected clients still in play
+            alive = set(game._alive)
+            waiting = [s for s in seats
+                       if s.turtle in alive and s.closed == False]
+            for seat in waiting:
+                await self._send(seat, remote.pack_observation(seat.turtle))
+
+            # Collect actions until the deadline
+            deadline = loop.time() + self.timeout
+            for seat in waiting:
+                await self._receive(seat, deadline)
+
+            game._step_turtles()
+
+            # Give other matches a turn
+            await asyncio.sleep(0)
+
+        # Report the result and disconnect
+        for seat in seats:
+            result = -1
+            if game.winner == None:
+                result = 0
+            elif game.winner == seat.turtle._team:
+                result = 1
+            await self._send(seat, remote.pack_end(result, game.iteration))
+            if seat.writer != None:
+                seat.writer.close()
+
+        del self._matches[match]
+        del self._games[match]
+        return game
+
+    #-------------------------------------------------------------------------
+
+    async def _send(self, seat, payload):
+        """MatchServer._send(seat, payload) -> None
+        Sends a message to a seat's client, if it is still connected.
+
+        Waits until the message has been handed to the connection, unless
+        the client has stopped reading for longer than the step timeout, in
+        which case it is treated as disconnected.
+        """
+
+        if seat.closed == True or seat.writer == None:
+            return None
+        try:
+            seat.writer.write(remote.frame(payload))
+            await asyncio.wait_for(seat.writer.drain(), self.timeout)
+        except (ConnectionError, RuntimeError, asyncio.TimeoutError):
+            seat.closed = True
+
+    #-------------------------------------------------------------------------
+
+    async def _receive(self, seat, deadline):
+        """MatchServer._receive(seat, deadline) -> None
+        Waits for a seat's action for the current step.
+
+        Actions for earlier steps are discarded. If no action for the current
+        step arrives before the deadline, the seat's turtle is left without
+        an action.
+        """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                action = await asyncio.wait_for(seat.actions.get(),
+                                                remaining)
+            except asyncio.TimeoutError:
+                return None
+            if action == None:
+                return None
+            if action.time == seat.turtle.time:
+                seat.turtle._action = (action.speed, action.turn_speed,
+                                       action.shoot)
+                return None
+
+    #-------------------------------------------------------------------------
+
+    async def _connect(self, reader, writer):
+        """MatchServer._connect(reader, writer) -> None
+        Handles a client connection.
+
+        The client must begin by claiming an open slot of an unfinished
+        match, after which it is sent the match setup and every action it
+        sends is queued for its seat. Connections which do not claim a valid
+        slot are closed.
+        """
+
+        # Claim a slot
+        try:
+            payload = await _read_message(reader)
+            if remote.message_type(payload) != remote.HELLO:
+                raise ValueError("expected HELLO message")
+            (match, slot, name) = remote.unpack_hello(payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+            return None
+        seat = self._matches.get(match, {}).get(slot)
+        if seat == None or seat.writer != None or seat.closed == True:
+            writer.close()
+            return None
+        seat.writer = writer
+        self._games[match].names[slot] = name
+
+        # Send the setup and begin the match once all clients are ready
+        await self._send(seat, remote.pack_setup(seat.turtle, slot))
+        seat.ready.set()
+
+        # Queue actions until the client disconnects
+        try:
+            while True:
+                payload = await _read_message(reader)
+                if remote.message_type(payload) == remote.ACT:
+                    seat.actions.put_nowait(remote.unpack_action(payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            seat.closed = True
+            seat.actions.put_nowait(None)
+
+#=============================================================================
+
+async def run_client(cls, match, slot, host="127.0.0.1", port=None,
+                     path=None):
+    """run_client(cls, match, slot, [host], [port], [path]) -> tuple
+    Plays a local Combat Turtle AI in a remote match.
+
+    Requires the following positional arguments:
+        cls (str or class) -- Combat Turtle AI class (or its full class name)
+        match (int) -- match ID
+        slot (int) -- player index within the match
+
+    Accepts the following optional keyword arguments:
+        host (str) ["127.0.0.1"] -- TCP host address of the server
+        port (int) [None] -- TCP port of the server
+        path (str) [None] -- Unix domain socket path of the server, which is
+            used instead of TCP if given
+
+    The AI is run by a remote.Pilot, so it behaves just as it would in a
+    local game. Returns the (result, iterations) tuple from the server's END
+    message, where result is 1 for a win, 0 for a tie, and -1 for a loss.
+    """
+
+    if path != None:
+        (reader, writer) = await asyncio.open_unix_connection(path)
+    else:
+        (reader, writer) = await asyncio.open_connection(host, port)
+
+    try:
+        # Claim the slot and build the AI
+        name = cls if type(cls) == str else cls.class_name()
+        writer.write(remote.frame(remote.pack_hello(match, slot, name)))
+        pilot = remote.Pilot(cls, remote.unpack_setup(
+            await _read_message(reader)))
+
+        # Answer each observation until the match ends
+        while True:
+            payload = await _read_message(reader)
+            kind = remote.message_type(payload)
+            if kind == remote.OBS:
+                obs = remote.unpack_observation(payload)
+                (speed, turn_speed, shoot) = pilot.act(obs)
+                writer.write(remote.frame(remote.pack_action(
+                    obs.time, speed, turn_speed, shoot)))
+            elif kind == remote.END:
+                return remote.unpack_end(payload)
+    finally:
+        writer.close()
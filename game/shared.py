@@ -0,0 +1,819 @@
+"""Defines shared memory observation buffers for multi-process matches.
+
+A SharedMatchBuffer lets AIs running in worker processes play a headless
+match without any per-step pickling. The engine writes each step's turtle
+and missile state into a ring of fixed-layout frames in a block of shared
+memory, and each worker reads its turtle's observation straight out of the
+block and writes back a small action record.
+
+The block is laid out as follows (all fields little-endian):
+    header -- magic number, player count, missile slots, ring depth, and
+        setup record size
+    status -- sequence number of the latest frame, game over flag, and the
+        result of each player
+    setup records -- one SETUP message per player (see game.remote)
+    action records -- one per player, each holding the step time, speed,
+        turn speed, and shooting flag, followed by a second copy of the time
+    frames -- a ring of frames, each holding its sequence number, the game
+        iteration, and the missile count, followed by one OBS message per
+        player (see game.remote) and a fixed number of missile slots
+
+Frames are published with a sequence lock. The engine clears a frame's
+sequence number before writing it and sets it afterwards, so a reader that
+finds the same sequence number before and after reading a frame knows that
+it was not overwritten in between. Action records are checked the same way
+using their two copies of the time.
+
+Workers should be started using the multiprocessing module from the process
+which created the buffer, so that the shared memory is cleaned up by that
+process.
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+from . import remote
+
+#=============================================================================
+
+# Block layouts
+_MAGIC = b"CTSM"
+_HEADER = struct.Struct("<4sHHHI") # magic, players, missile slots, depth,
+    # setup record size
+_STATUS = struct.Struct("<QB") # latest sequence number, game over flag
+_SETUP_LENGTH = struct.Struct("<I") # length of a setup record's payload
+_ACTION = struct.Struct("<IiiBI") # time, speed, turn speed, shoot, time
+_FRAME = struct.Struct("<QII") # sequence number, iteration, missile count
+_MISSILE = struct.Struct("<ddhhh") # x, y, heading, exploding, shooter slot
+_NO_STEP = 0xFFFFFFFF # time of an action record that answers no step
+
+# Limits of the pause between polls of the buffer (s)
+_MIN_PAUSE = 0.00001
+_MAX_PAUSE = 0.001
+
+#=============================================================================
+
+class SharedMatchBuffer:
+    """Shared memory match buffer class.
+
+    Holds the shared state of a single headless match. The engine side
+    creates the buffer from a game and publishes a frame between the missile
+    and turtle phases of each step, and worker processes attach to it by
+    name to read observations and write actions.
+
+    The following public methods are used by the engine:
+        publish(game) -- writes a new frame describing the game
+        action(slot, time) -- returns a player's action for a given step
+        finish(game) -- marks the match as over and records the results
+        close() -- detaches from the shared memory
+        unlink() -- destroys the shared memory
+
+    The following public methods are used by workers:
+        attach(name) -- (static method) attaches to an existing buffer
+        setup(slot) -- returns a player's unpacked SETUP message
+        latest() -- returns the sequence number of the latest frame
+        view(slot[, seq]) -- returns a read-only view of a player's turtle
+        write_action(slot, time, speed, turn_speed, shoot) -- writes a
+            player's action
+    """
+
+    #=========================================================================
+
+    def __init__(self, game=None, missiles=64, depth=4, name=None):
+        """SharedMatchBuffer([game], [missiles], [depth], [name]) ->
+        SharedMatchBuffer
+        Shared memory match buffer constructor.
+
+        Accepts the following optional keyword arguments:
+            game (TurtleCombatGame) [None] -- game to create a new buffer for
+            missiles (int) [64] -- number of missile slots in each frame
+            depth (int) [4] -- number of frames in the ring
+            name (str) [None] -- name of an existing buffer to attach to,
+                which is used instead of creating a new buffer if given
+
+        Missiles beyond the number of slots are left out of the frames.
+        """
+
+        # Attach to an existing buffer
+        if name != None:
+            self._owner = False
+            try:
+                self._shm = shared_memory.SharedMemory(name=name,
+                                                       track=False)
+            except TypeError:
+                self._shm = shared_memory.SharedMemory(name=name)
+            (magic, self.players, self.missiles, self.depth,
+             self._setup_size) = _HEADER.unpack_from(self._shm.buf, 0)
+            if magic != _MAGIC:
+                raise ValueError("not a Combat Turtles match buffer")
+            self._layout()
+            return None
+
+        # Otherwise create a new buffer for the given game
+        self._owner = True
+        self.players = len(game._players)
+        self.missiles = missiles
+        self.depth = depth
+        setups = [b"" if game._players[i] == None else
+                  remote.pack_setup(game._players[i], i)
+                  for i in range(self.players)]
+        self._setup_size = _SETUP_LENGTH.size + max(len(s) for s in setups)
+        self._layout()
+        self._shm = shared_memory.SharedMemory(create=True, size=self._size)
+        buf = self._shm.buf
+        buf[:self._size] = bytes(self._size)
+        _HEADER.pack_into(buf, 0, _MAGIC, self.players, self.missiles,
+                          self.depth, self._setup_size)
+        for i in range(self.players):
+            off = self._setup_offset + i*self._setup_size
+            _SETUP_LENGTH.pack_into(buf, off, len(setups[i]))
+            off += _SETUP_LENGTH.size
+            buf[off:off+len(setups[i])] = setups[i]
+        for i in range(self.players):
+            # Mark each action record as answering no step
+            _ACTION.pack_into(buf, self._action_offset + i*_ACTION.size,
+                              _NO_STEP, 0, 0, 0, _NO_STEP)
+        self._seq = 0 # sequence number of the latest frame
+
+    #-------------------------------------------------------------------------
+
+    def attach(name):
+        """SharedMatchBuffer.attach(name) -> SharedMatchBuffer
+        Static method to attach to an existing buffer by name.
+        """
+
+        return SharedMatchBuffer(name=name)
+
+    #-------------------------------------------------------------------------
+
+    def _layout(self):
+        """SharedMatchBuffer._layout() -> None
+        Computes the offsets of each section of the buffer.
+        """
+
+        self._status_offset = _HEADER.size
+        self._setup_offset = self._status_offset + _STATUS.size + self.players
+        self._action_offset = (self._setup_offset +
+                               self.players*self._setup_size)
+        self._frame_offset = self._action_offset + self.players*_ACTION.size
+        self._frame_size = (_FRAME.size + self.players*remote._OBS.size +
+                            self.missiles*_MISSILE.size)
+        self._size = self._frame_offset + self.depth*self._frame_size
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def name(self):
+        """SharedMatchBuffer.name -> str
+        Returns the name used by workers to attach to the buffer.
+        """
+
+        return self._shm.name
+
+    @name.setter
+    def name(self, value):
+        """Do-nothing name setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def over(self):
+        """SharedMatchBuffer.over -> bool
+        Returns whether the match has ended.
+        """
+
+        return _STATUS.unpack_from(self._shm.buf, self._status_offset)[1] == 1
+
+    @over.setter
+    def over(self, value):
+        """Do-nothing game over setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    def close(self):
+        """SharedMatchBuffer.close() -> None
+        Detaches from the shared memory.
+        """
+
+        self._shm.close()
+
+    #-------------------------------------------------------------------------
+
+    def unlink(self):
+        """SharedMatchBuffer.unlink() -> None
+        Destroys the shared memory (only allowed for the buffer's creator).
+        """
+
+        if self._owner == True:
+            self._shm.unlink()
+
+    #-------------------------------------------------------------------------
+
+    def publish(self, game):
+        """SharedMatchBuffer.publish(game) -> int
+        Writes a new frame describing the game and returns its sequence
+        number.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- game to describe
+
+        This should be called between the missile and turtle phases of a step
+        (see TurtleCombatGame._step()), so that each observation contains
+        exactly what the turtle's step() method would see.
+        """
+
+        buf = self._shm.buf
+        self._seq += 1
+        off = self._frame_offset + (self._seq % self.depth)*self._frame_size
+
+        # Clear the frame's sequence number while it is being written
+        _FRAME.pack_into(buf, off, 0, 0, 0)
+        pos = off + _FRAME.size
+
+        # Write each turtle's observation (empty slots are left blank)
+        slots = {} # player index of each turtle
+        for i in range(self.players):
+            t = game._players[i]
+            if t == None:
+                buf[pos:pos+remote._OBS.size] = bytes(remote._OBS.size)
+            else:
+                slots[t] = i
+                buf[pos:pos+remote._OBS.size] = remote.pack_observation(t)
+            pos += remote._OBS.size
+
+        # Write as many missiles as there are slots for
+        count = 0
+        for t in game._turtles:
+            for m in t._missiles:
+                if count >= self.missiles:
+                    break
+                _MISSILE.pack_into(buf, pos, m.x, m.y, int(m.heading),
+                                   m.exploding, slots.get(m.shooter, -1))
+                pos += _MISSILE.size
+                count += 1
+
+        # Publish the frame
+        _FRAME.pack_into(buf, off, self._seq, game.iteration, count)
+        _STATUS.pack_into(buf, self._status_offset, self._seq, 0)
+        return self._seq
+
+    #-------------------------------------------------------------------------
+
+    def finish(self, game):
+        """SharedMatchBuffer.finish(game) -> None
+        Marks the match as over and records each player's result.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- finished game
+
+        Each player's result is 1 for a win, 0 for a tie, or -1 for a loss.
+        """
+
+        buf = self._shm.buf
+        off = self._status_offset + _STATUS.size
+        for i in range(self.players):
+            t = game._players[i]
+            result = -1
+            if game.winner == None:
+                result = 0
+            elif t != None and game.winner == t._team:
+                result = 1
+            struct.pack_into("<b", buf, off + i, result)
+        _STATUS.pack_into(buf, self._status_offset, self._seq, 1)
+
+    #-------------------------------------------------------------------------
+
+    def result(self, slot):
+        """SharedMatchBuffer.result(slot) -> int
+        Returns a player's result (only meaningful once the match is over).
+        """
+
+        off = self._status_offset + _STATUS.size + slot
+        return struct.unpack_from("<b", self._shm.buf, off)[0]
+
+    #-------------------------------------------------------------------------
+
+    def setup(self, slot):
+        """SharedMatchBuffer.setup(slot) -> remote.Setup
+        Returns a player's unpacked SETUP message.
+        """
+
+        off = self._setup_offset + slot*self._setup_size
+        length = _SETUP_LENGTH.unpack_from(self._shm.buf, off)[0]
+        off += _SETUP_LENGTH.size
+        return remote.unpack_setup(bytes(self._shm.buf[off:off+length]))
+
+    #-------------------------------------------------------------------------
+
+    def latest(self):
+        """SharedMatchBuffer.latest() -> int
+        Returns the sequence number of the latest frame (0 if none).
+        """
+
+        return _STATUS.unpack_from(self._shm.buf, self._status_offset)[0]
+
+    #-------------------------------------------------------------------------
+
+    def view(self, slot, seq=None):
+        """SharedMatchBuffer.view(slot[, seq]) -> SharedTurtleView
+        Returns a read-only view of a player's turtle in a given frame.
+
+        Requires the following positional arguments:
+            slot (int) -- player index
+
+        Accepts the following optional keyword arguments:
+            seq (int) [None] -- frame sequence number (defaults to latest)
+
+        Returns None if the frame has already been overwritten.
+        """
+
+        if seq == None:
+            seq = self.latest()
+        buf = self._shm.buf
+        off = self._frame_offset + (seq % self.depth)*self._frame_size
+        if _FRAME.unpack_from(buf, off)[0] != seq:
+            return None
+
+        # Copy out the player's observation and all missiles
+        (_, iteration, count) = _FRAME.unpack_from(buf, off)
+        obs = remote.unpack_observation(
+            buf[off + _FRAME.size + slot*remote._OBS.size:][:remote._OBS.size])
+        pos = off + _FRAME.size + self.players*remote._OBS.size
+        missiles = [_MISSILE.unpack_from(buf, pos + i*_MISSILE.size)
+                    for i in range(count)]
+
+        # Make sure the frame was not overwritten while it was being read
+        if _FRAME.unpack_from(buf, off)[0] != seq:
+            return None
+        return SharedTurtleView(obs, missiles, iteration)
+
+    #-------------------------------------------------------------------------
+
+    def write_action(self, slot, time, speed, turn_speed, shoot):
+        """SharedMatchBuffer.write_action(slot, time, speed, turn_speed,
+        shoot) -> None
+        Writes a player's action for a given step.
+
+        Requires the following positional arguments:
+            slot (int) -- player index
+            time (int) -- time of the observation being answered
+            speed (int) -- movement speed (px/step, negative for backwards)
+            turn_speed (int) -- CCW turning speed (deg/step, negative for CW)
+            shoot (bool) -- whether to attempt to shoot
+        """
+
+        _ACTION.pack_into(self._shm.buf, self._action_offset +
+                          slot*_ACTION.size, time, int(speed),
+                          int(turn_speed), 1 if shoot == True else 0, time)
+
+    #-------------------------------------------------------------------------
+
+    def action(self, slot, time):
+        """SharedMatchBuffer.action(slot, time) -> tuple
+        Returns a player's action for a given step.
+
+        Requires the following positional arguments:
+            slot (int) -- player index
+            time (int) -- time of the observation being answered
+
+        Returns a tuple of the form (speed, turn_speed, shoot), or None if
+        no complete action has been written for the given step.
+        """
+
+        (t1, speed, turn_speed, shoot, t2) = _ACTION.unpack_from(
+            self._shm.buf, self._action_offset + slot*_ACTION.size)
+        if t1 != time or t2 != time:
+            return None
+        return (speed, turn_speed, shoot == 1)
+
+#=============================================================================
+
+class SharedTurtleView:
+    """Shared memory turtle view class.
+
+    A read-only snapshot of one turtle's observation, read from a
+    SharedMatchBuffer frame. Its attributes have the same names and meanings
+    as the corresponding TurtleParent attributes, so that code written
+    against a turtle's own state can be reused in worker processes.
+
+    The following read-only attributes are available:
+        x, y, position, heading, health, cooldown, can_shoot, time -- own
+            attributes (see TurtleParent)
+        other_x, other_y, other_position, other_heading, other_speed,
+            other_turn_speed, other_health, other_cooldown,
+            other_can_shoot -- opponent attributes (None if the turtle has
+            no opponent)
+        missiles -- list of (x, y, heading, exploding, shooter) tuples for
+            all missiles in the frame, where shooter is a player index
+        iteration -- game iteration of the frame
+        observation -- the underlying remote.Observation
+    """
+
+    #=========================================================================
+
+    def __init__(self, obs, missiles, iteration):
+        """SharedTurtleView(obs, missiles, iteration) -> SharedTurtleView
+        Shared memory turtle view constructor.
+        """
+
+        self.observation = obs
+        self.missiles = missiles
+        self.iteration = iteration
+
+    #-------------------------------------------------------------------------
+
+    def _other(self, value):
+        """SharedTurtleView._other(value) -> object
+        Returns an opponent attribute, or None if there is no opponent.
+        """
+
+        if self.observation.has_other == 0:
+            return None
+        return value
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def x(self):
+        """SharedTurtleView.x -> int
+        Returns the turtle's x-coordinate (px).
+        """
+
+        return self.observation.x
+
+    @x.setter
+    def x(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def y(self):
+        """SharedTurtleView.y -> int
+        Returns the turtle's y-coordinate (px).
+        """
+
+        return self.observation.y
+
+    @y.setter
+    def y(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def position(self):
+        """SharedTurtleView.position -> tuple
+        Returns the turtle's coordinates.
+        """
+
+        return (self.observation.x, self.observation.y)
+
+    @position.setter
+    def position(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def heading(self):
+        """SharedTurtleView.heading -> int
+        Returns the turtle's heading (degrees).
+        """
+
+        return self.observation.heading
+
+    @heading.setter
+    def heading(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def health(self):
+        """SharedTurtleView.health -> int
+        Returns the turtle's health.
+        """
+
+        return self.observation.health
+
+    @health.setter
+    def health(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def cooldown(self):
+        """SharedTurtleView.cooldown -> int
+        Returns the turtle's shooting cooldown (steps).
+        """
+
+        return self.observation.cooldown
+
+    @cooldown.setter
+    def cooldown(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def can_shoot(self):
+        """SharedTurtleView.can_shoot -> bool
+        Returns whether the turtle can shoot.
+        """
+
+        return self.observation.cooldown == 0
+
+    @can_shoot.setter
+    def can_shoot(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def time(self):
+        """SharedTurtleView.time -> int
+        Returns the turtle's step number.
+        """
+
+        return self.observation.time
+
+    @time.setter
+    def time(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_x(self):
+        """SharedTurtleView.other_x -> int
+        Returns the opponent's x-coordinate (px).
+        """
+
+        return self._other(self.observation.other_x)
+
+    @other_x.setter
+    def other_x(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_y(self):
+        """SharedTurtleView.other_y -> int
+        Returns the opponent's y-coordinate (px).
+        """
+
+        return self._other(self.observation.other_y)
+
+    @other_y.setter
+    def other_y(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_position(self):
+        """SharedTurtleView.other_position -> tuple
+        Returns the opponent's coordinates.
+        """
+
+        return self._other((self.observation.other_x,
+                            self.observation.other_y))
+
+    @other_position.setter
+    def other_position(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_heading(self):
+        """SharedTurtleView.other_heading -> int
+        Returns the opponent's heading (degrees).
+        """
+
+        return self._other(self.observation.other_heading)
+
+    @other_heading.setter
+    def other_heading(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_speed(self):
+        """SharedTurtleView.other_speed -> int
+        Returns the opponent's speed (px/step).
+        """
+
+        return self._other(self.observation.other_speed)
+
+    @other_speed.setter
+    def other_speed(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_turn_speed(self):
+        """SharedTurtleView.other_turn_speed -> int
+        Returns the opponent's turning speed (deg/step).
+        """
+
+        return self._other(self.observation.other_turn_speed)
+
+    @other_turn_speed.setter
+    def other_turn_speed(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_health(self):
+        """SharedTurtleView.other_health -> int
+        Returns the opponent's health.
+        """
+
+        return self._other(self.observation.other_health)
+
+    @other_health.setter
+    def other_health(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_cooldown(self):
+        """SharedTurtleView.other_cooldown -> int
+        Returns the opponent's shooting cooldown (steps).
+        """
+
+        return self._other(self.observation.other_cooldown)
+
+    @other_cooldown.setter
+    def other_cooldown(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def other_can_shoot(self):
+        """SharedTurtleView.other_can_shoot -> bool
+        Returns whether the opponent can shoot.
+        """
+
+        return self._other(self.observation.other_cooldown == 0)
+
+    @other_can_shoot.setter
+    def other_can_shoot(self, value):
+        """Do-nothing attribute setter to prevent overwriting."""
+
+        pass
+
+#=============================================================================
+
+def serve_match(game, buffer, timeout=0.05):
+    """serve_match(game, buffer[, timeout]) -> TurtleCombatGame
+    Plays a headless match whose remote players run in worker processes.
+
+    Requires the following positional arguments:
+        game (TurtleCombatGame) -- headless game, with a remote.RemoteTurtle
+            for each player controlled by a worker
+        buffer (SharedMatchBuffer) -- buffer created for the game
+
+    Accepts the following optional keyword arguments:
+        timeout (float) [0.05] -- time to wait for actions each step (s)
+
+    Each step a frame is published after the missile phase, and then the
+    buffer is polled for each remote turtle's action until the deadline. A
+    worker that misses the deadline stands still for the step. Returns the
+    finished game.
+    """
+
+    seats = [(i, game._players[i]) for i in range(len(game._players))
+             if isinstance(game._players[i], remote.RemoteTurtle)]
+
+    while game.over == False:
+        game._step_missiles()
+        buffer.publish(game)
+
+        # Poll for actions until all have arrived or the deadline passes
+        alive = set(game._alive)
+        waiting = [(i, t) for (i, t) in seats if t in alive]
+        deadline = time.perf_counter() + timeout
+        pause = 0 # time to sleep before the next poll (s)
+        while len(waiting) > 0 and time.perf_counter() < deadline:
+            for (i, t) in list(waiting):
+                action = buffer.action(i, t.time)
+                if action != None:
+                    t._action = action
+                    waiting.remove((i, t))
+                    pause = 0
+            if len(waiting) > 0:
+                time.sleep(pause)
+                pause = _backoff(pause)
+
+        game._step_turtles()
+
+    buffer.finish(game)
+    return game
+
+#-----------------------------------------------------------------------------
+
+def run_worker(cls, name, slot, idle=10.0):
+    """run_worker(cls, name, slot[, idle]) -> int
+    Plays a local Combat Turtle AI in a shared memory match.
+
+    Requires the following positional arguments:
+        cls (str or class) -- Combat Turtle AI class (or its full class name)
+        name (str) -- name of the match's SharedMatchBuffer
+        slot (int) -- player index within the match
+
+    Accepts the following optional keyword arguments:
+        idle (float) [10.0] -- time to wait for a new frame before giving up
+            on the match (s)
+
+    Meant to be run as the target of a multiprocessing.Process. The AI is run
+    by a remote.Pilot, so it behaves just as it would in a local game.
+    Returns the player's result (1 for a win, 0 for a tie, -1 for a loss, or
+    None if the match was abandoned).
+    """
+
+    buffer = SharedMatchBuffer.attach(name)
+    try:
+        pilot = remote.Pilot(cls, buffer.setup(slot))
+        seen = 0 # sequence number of the last frame answered
+        last = time.perf_counter() # time at which the last frame arrived
+        pause = 0 # time to sleep before the next poll (s)
+        while True:
+            seq = buffer.latest()
+            if seq == seen:
+                if buffer.over == True:
+                    return buffer.result(slot)
+                if time.perf_counter() - last > idle:
+                    return None
+                time.sleep(pause)
+                pause = _backoff(pause)
+                continue
+            (seen, last, pause) = (seq, time.perf_counter(), 0)
+
+            # Answer the frame (unless it has already been overwritten)
+            view = buffer.view(slot, seq)
+            if view == None:
+                continue
+            (speed, turn_speed, shoot) = pilot.act(view.observation)
+            buffer.write_action(slot, view.time, speed, turn_speed, shoot)
+    finally:
+        buffer.close()
+
+#-----------------------------------------------------------------------------
+
+def _backoff(pause):
+    """_backoff(pause) -> float
+    Returns the pause to use after polling the buffer in vain.
+
+    The first poll after any progress is followed by a bare yield (a pause
+    of 0), and each further failed poll doubles the pause up to a limit.
+    This answers quickly when the other side is fast, without keeping a CPU
+    busy while it is slow.
+    """
+
+    return min(_MAX_PAUSE, max(_MIN_PAUSE, 2*pause))
@@ -0,0 +1,473 @@
+"""Defines a parameter sweep runner for tuning Combat Turtle AIs.
+
+Many AIs define tunable numbers as attributes in their setup() methods (such
+as the shooting probability of ai.drunken). A sweep plays an AI with several
+different sets of attribute overrides against a fixed pool of opponents, in
+parallel across a process pool, and ranks the configurations by their
+results. For example, the following tries every combination of two of the
+drunken AI's parameters against two opponents on two arena layouts:
+
+    import game.sweep as sw
+
+    sweep = sw.Sweep("ai.drunken.CombatTurtle",
+                     ["ai.direct.CombatTurtle", "ai.wall.CombatTurtle"],
+                     layouts=[0, 3], rounds=10)
+    trials = sweep.run(sw.grid({"shoot_prob": [0.05, 0.1, 0.2, 0.4],
+                                "wander_amp": [0, 15, 30]}))
+    print(trials[0].params, trials[0].score)
+
+Overrides are applied at the end of the AI's own setup() method, so they
+replace the values of attributes defined there (attributes which setup()
+derives from other attributes are not recalculated).
+
+Matches are played in rounds. Each round plays every remaining configuration
+once against every opponent on every layout, alternating sides between
+rounds, and with the same random seed for every configuration so that all
+configurations face the same conditions. After each round, configurations
+that have fallen clearly behind the leader stop playing, so that most of the
+time is spent on the promising ones.
+
+Matches are played by a WorkerPool, a set of long-lived worker processes which
+are forked after the AI modules have been imported, so that each worker starts
+warm and plays many matches without importing anything. A pool is started for
+each run by default, but a single pool can be shared by several sweeps (or
+tournaments) to avoid starting workers more than once:
+
+    with sw.WorkerPool(["ai.drunken.CombatTurtle", "ai.direct.CombatTurtle",
+                        "ai.wall.CombatTurtle"]) as pool:
+        for layout in range(5):
+            sweep = sw.Sweep("ai.drunken.CombatTurtle",
+                             ["ai.direct.CombatTurtle", "ai.wall.CombatTurtle"],
+                             layouts=[layout], pool=pool)
+            ...
+"""
+
+import collections
+import gc
+import importlib
+import itertools
+import multiprocessing
+import random
+from .tcgame import TurtleCombatGame
+
+#=============================================================================
+
+# Outcome of a single match, from the point of view of the tuned AI, where
+# result is 1 for a win, 0 for a tie, or -1 for a loss, and margin is the
+# difference between its own health and its opponent's at the end
+Outcome = collections.namedtuple("Outcome", ["result", "margin",
+                                             "iterations"])
+
+# Results of one configuration of a sweep, where score is the mean match
+# result and stopped is whether the configuration was stopped early
+Trial = collections.namedtuple("Trial", ["params", "matches", "wins", "ties",
+                                         "losses", "score", "margin",
+                                         "stopped"])
+
+#=============================================================================
+
+def grid(space):
+    """grid(space) -> list
+    Returns every combination of a set of parameter values.
+
+    Requires the following positional arguments:
+        space (dict) -- list of values to try for each parameter name
+
+    Returns a list of parameter dictionaries, one for each combination.
+    """
+
+    names = sorted(space)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(space[n] for n in names))]
+
+#-----------------------------------------------------------------------------
+
+def sample(space, count, seed=None):
+    """sample(space, count[, seed]) -> list
+    Returns randomly chosen combinations of parameter values.
+
+    Requires the following positional arguments:
+        space (dict) -- values to draw from for each parameter name, given
+            either as a list (to choose from) or as a (low, high) tuple (to
+            draw uniformly from, as integers if both bounds are integers)
+        count (int) -- number of combinations to draw
+
+    Accepts the following optional keyword arguments:
+        seed (int) [None] -- random seed (for reproducible draws)
+
+    Returns a list of parameter dictionaries.
+    """
+
+    rng = random.Random(seed)
+    names = sorted(space)
+    configs = []
+    for i in range(count):
+        params = {}
+        for n in names:
+            values = space[n]
+            if type(values) == tuple:
+                (low, high) = values
+                if type(low) == int and type(high) == int:
+                    params[n] = rng.randint(low, high)
+                else:
+                    params[n] = rng.uniform(low, high)
+            else:
+                params[n] = rng.choice(values)
+        configs.append(params)
+    return configs
+
+#-----------------------------------------------------------------------------
+
+def _resolve(cls):
+    """_resolve(cls) -> class
+    Returns a Combat Turtle AI class given either the class or its full name.
+    """
+
+    if type(cls) != str:
+        return cls
+    (module, name) = cls.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+#-----------------------------------------------------------------------------
+
+def tuned(cls, params):
+    """tuned(cls, params) -> class
+    Returns a version of an AI class with attribute overrides.
+
+    Requires the following positional arguments:
+        cls (str or class) -- Combat Turtle AI class (or its full class name)
+        params (dict) -- attribute values to set at the end of setup()
+
+    The returned class is a subclass of the AI class whose setup() method
+    runs the AI's own setup() and then sets the given attributes.
+    """
+
+    cls = _resolve(cls)
+    if len(params) == 0:
+        return cls
+    params = dict(params)
+
+    def setup(self):
+        cls.setup(self)
+        for (name, value) in params.items():
+            setattr(self, name, value)
+
+    return type(cls.__name__, (cls,), {"setup": setup})
+
+#-----------------------------------------------------------------------------
+
+def run_match(cls, params, opponent, layout=0, seed=0, side=0, cutoff=3000,
+              rules=None):
+    """run_match(cls, params, opponent, [layout], [seed], [side], [cutoff],
+    [rules]) -> Outcome
+    Plays a single headless match of a tuned AI against an opponent.
+
+    Requires the following positional arguments:
+        cls (str or class) -- Combat Turtle AI class (or its full class name)
+        params (dict) -- attribute overrides for the AI (see tuned())
+        opponent (str or class) -- opponent AI class (or its full class name)
+
+    Accepts the following optional keyword arguments:
+        layout (int) [0] -- arena layout ID
+        seed (int) [0] -- seed of the random module for the match
+        side (int) [0] -- player index of the tuned AI (0 or 1)
+        cutoff (int) [3000] -- game time cutoff (negative for no limit)
+        rules (Rules) [None] -- rules of the game (see game.rules)
+
+    Classes should be given by name (or be importable module attributes) when
+    matches are run in other processes.
+    """
+
+    classes = [tuned(cls, params), _resolve(opponent)]
+    if side == 1:
+        classes.reverse()
+    random.seed(seed)
+    game = TurtleCombatGame(classes=classes, layout=layout, cutoff=cutoff,
+                            headless=True, rules=rules)
+    game.run()
+
+    own = game._players[side]
+    other = game._players[1-side]
+    if game.winner == None:
+        result = 0
+    else:
+        result = 1 if game.winner == own._team else -1
+    return Outcome(result, max(0, own.health) - max(0, other.health),
+                   game.iteration)
+
+#-----------------------------------------------------------------------------
+
+def _play(task):
+    """_play(task) -> tuple
+    Plays the match described by a task tuple in a worker process.
+
+    Returns a tuple of the task's configuration index and its Outcome.
+    """
+
+    (index, args) = task
+    return (index, run_match(*args))
+
+#-----------------------------------------------------------------------------
+
+def _warm(modules):
+    """_warm(modules) -> None
+    Prepares a new worker process by importing the AI modules.
+
+    Forked workers inherit the modules already imported by the parent, so
+    this only has an effect on platforms where workers are started afresh.
+    """
+
+    for m in modules:
+        importlib.import_module(m)
+
+#=============================================================================
+
+class WorkerPool:
+    """Warm worker pool class.
+
+    Wraps a pool of long-lived worker processes for playing matches. Before
+    the workers are started, the modules of the given AI classes are imported
+    by the parent process, and the workers are forked from it (where the
+    platform allows), so that every worker begins with the game and the AIs
+    already loaded. Each worker then plays many matches one after another.
+    Every match builds its own game and reseeds the random module (see
+    run_match()), so no state carries over between the matches of a worker.
+
+    Tasks are handed to the workers in chunks, so that the cost of sending
+    tasks and results between processes is shared by several matches.
+
+    A pool can be used as a context manager, which closes it on exit.
+
+    The following public attributes and methods can be used to play matches:
+        processes -- number of worker processes
+        play(tasks) -- plays a list of match tasks
+        close() -- waits for the workers to finish and shuts them down
+    """
+
+    #=========================================================================
+
+    def __init__(self, classes=(), processes=None):
+        """WorkerPool([classes], [processes]) -> WorkerPool
+        Warm worker pool constructor.
+
+        Accepts the following optional keyword arguments:
+            classes (list) [()] -- Combat Turtle AI classes (or their full
+                class names) whose modules the workers should preload
+            processes (int) [None] -- number of worker processes (None for
+                one per CPU)
+        """
+
+        modules = sorted(set(_resolve(c).__module__ for c in classes))
+        try:
+            context = multiprocessing.get_context("fork")
+        except ValueError:
+            context = multiprocessing.get_context()
+
+        # Freeze the parent's objects before forking, so that the workers'
+        # garbage collection never touches (and copies) the shared memory
+        gc.collect()
+        gc.freeze()
+        try:
+            self._pool = context.Pool(processes, _warm, (modules,))
+        finally:
+            gc.unfreeze()
+        self.processes = self._pool._processes
+
+    #-------------------------------------------------------------------------
+
+    def __enter__(self):
+        """WorkerPool.__enter__() -> WorkerPool
+        Returns the pool itself when used as a context manager.
+        """
+
+        return self
+
+    #-------------------------------------------------------------------------
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """WorkerPool.__exit__(exc_type, exc_value, traceback) -> None
+        Closes the pool at the end of a with block.
+        """
+
+        self.close()
+
+    #-------------------------------------------------------------------------
+
+    def play(self, tasks):
+        """WorkerPool.play(tasks) -> iterator
+        Plays a list of match tasks across the workers.
+
+        Requires the following positional arguments:
+            tasks (list (tuple)) -- (index, args) tuples, where args are the
+                positional arguments of run_match()
+
+        Returns an iterator of (index, Outcome) tuples in the order that the
+        matches finish.
+        """
+
+        chunk = max(1, len(tasks)//(4*self.processes))
+        return self._pool.imap_unordered(_play, tasks, chunk)
+
+    #-------------------------------------------------------------------------
+
+    def close(self):
+        """WorkerPool.close() -> None
+        Waits for the workers to finish and shuts them down.
+        """
+
+        self._pool.close()
+        self._pool.join()
+
+#=============================================================================
+
+class Sweep:
+    """Parameter sweep class.
+
+    Plays an AI with several configurations of parameter overrides against a
+    pool of opponents, and ranks the configurations by their mean match
+    result (1 for a win, 0 for a tie, and -1 for a loss).
+
+    A configuration is stopped early once it has played at least min_rounds
+    rounds and its score trails the leader's by more than margin, since
+    further matches are unlikely to make it the best.
+
+    The following public methods can be used to run the sweep:
+        run(configs) -- plays all configurations and returns their results
+    """
+
+    #=========================================================================
+
+    def __init__(self, cls, opponents, layouts=(0,), rounds=10, cutoff=3000,
+                 rules=None, processes=None, min_rounds=3, margin=0.5,
+                 seed=0, pool=None):
+        """Sweep(cls, opponents, [layouts], [rounds], [cutoff], [rules],
+        [processes], [min_rounds], [margin], [seed], [pool]) -> Sweep
+        Parameter sweep constructor.
+
+        Requires the following positional arguments:
+            cls (str or class) -- Combat Turtle AI class to tune (or its full
+                class name)
+            opponents (list) -- opponent AI classes (or their full class
+                names)
+
+        Accepts the following optional keyword arguments:
+            layouts (list (int)) [(0,)] -- arena layout IDs to play on
+            rounds (int) [10] -- maximum number of rounds to play
+            cutoff (int) [3000] -- game time cutoff of each match
+            rules (Rules) [None] -- rules of the game (see game.rules)
+            processes (int) [None] -- number of worker processes (None for
+                one per CPU, or 0 to play every match in this process)
+            min_rounds (int) [3] -- number of rounds that every configuration
+                plays before it can be stopped early
+            margin (float) [0.5] -- score deficit behind the leader at which a
+                configuration is stopped (None to never stop early)
+            seed (int) [0] -- base random seed of the matches
+            pool (WorkerPool) [None] -- worker pool to play the matches in
+                (None to start one for each run, in which case processes
+                gives its size)
+        """
+
+        self.cls = cls
+        self.opponents = list(opponents)
+        self.layouts = list(layouts)
+        self.rounds = rounds
+        self.cutoff = cutoff
+        self.rules = rules
+        self.processes = processes
+        self.min_rounds = min_rounds
+        self.margin = margin
+        self.seed = seed
+        self.pool = pool
+
+    #-------------------------------------------------------------------------
+
+    def _tasks(self, configs, active, round):
+        """Sweep._tasks(configs, active, round) -> list
+        Returns the match tasks of a round for the active configurations.
+
+        Every configuration plays the same matches, with the same seeds.
+        """
+
+        tasks = []
+        for i in range(len(self.opponents)):
+            for j in range(len(self.layouts)):
+                seed = hash((self.seed, round, i, j)) & 0x7fffffff
+                for k in active:
+                    tasks.append((k, (self.cls, configs[k], self.opponents[i],
+                                      self.layouts[j], seed, round % 2,
+                                      self.cutoff, self.rules)))
+        return tasks
+
+    #-------------------------------------------------------------------------
+
+    def run(self, configs):
+        """Sweep.run(configs) -> list
+        Plays all configurations and returns their results.
+
+        Requires the following positional arguments:
+            configs (list (dict)) -- parameter overrides of each configuration
+                (see grid() and sample())
+
+        Returns a list of Trial records, one for each configuration, sorted
+        from best to worst by score (with ties broken by health margin).
+        """
+
+        outcomes = [[] for c in configs] # outcomes of each configuration
+        active = list(range(len(configs))) # configurations still playing
+        stopped = set() # configurations stopped early
+
+        pool = self.pool
+        if pool == None and self.processes != 0:
+            pool = WorkerPool([self.cls] + self.opponents, self.processes)
+        try:
+            for r in range(self.rounds):
+                if len(active) == 0:
+                    break
+                tasks = self._tasks(configs, active, r)
+                if pool == None:
+                    results = map(_play, tasks)
+                else:
+                    results = pool.play(tasks)
+                for (k, outcome) in results:
+                    outcomes[k].append(outcome)
+
+                # Stop configurations which have fallen clearly behind
+                if r + 1 >= self.min_rounds and self.margin != None:
+                    scores = {k: _mean([o.result for o in outcomes[k]])
+                              for k in active}
+                    best = max(scores.values())
+                    for k in list(active):
+                        if scores[k] < best - self.margin:
+                            active.remove(k)
+                            stopped.add(k)
+        finally:
+            if pool != None and pool != self.pool:
+                pool.close()
+
+        trials = [_trial(configs[k], outcomes[k], k in stopped)
+                  for k in range(len(configs))]
+        trials.sort(key=lambda t: (-t.score, -t.margin))
+        return trials
+
+#=============================================================================
+
+def _mean(values):
+    """_mean(values) -> float
+    Returns the mean of a list of numbers (0.0 if the list is empty).
+    """
+
+    if len(values) == 0:
+        return 0.0
+    return sum(values)/len(values)
+
+#-----------------------------------------------------------------------------
+
+def _trial(params, outcomes, stopped):
+    """_trial(params, outcomes, stopped) -> Trial
+    Summarizes the outcomes of a configuration's matches.
+    """
+
+    results = [o.result for o in outcomes]
+    return Trial(dict(params), len(outcomes), results.count(1),
+                 results.count(0), results.count(-1), _mean(results),
+                 _mean([o.margin for o in outcomes]), stopped)
@@ -1,10 +1,16 @@
 """Defines the main game driver class."""
 
-import tkinter as tk
+import time
 import game.tcturtle
 import ai
 from .obj.arena import Arena
-from .obj.missile import Missile
+from .debugger import Debugger
+from .events import EventStream, END
+from .result import CUTOFF, KILL, TIE, MatchResult
+from .rules import DEFAULT_RULES
+from .util.canvas import ScaledCanvas, load_tkinter
+from .util.spatial import SpatialHash
+from .util.threat import ThreatMap
 
 class TurtleCombatGame:
     """A class to act as the main driver for a game of Turtle Combat.
@@ -13,143 +19,306 @@ class TurtleCombatGame:
     turtles), enforces the rules of the game, and implements the automatic
     timer that governs most objects' movement.
 
-    A step occurs every 33 ms (at a rate of approximately 30 steps/sec). At
-    the end of each step, this object calls the hidden _step() method of all
-    moving objects.
+    By default a step occurs every 33 ms (at a rate of approximately 30
+    steps/sec). During each step, this object calls the hidden _step() method
+    of all moving objects. Drawing is handled separately, and can be limited
+    to a fixed frame rate or to every few steps so that fast games are not
+    held back by the cost of redrawing the arena.
     """
 
+    # Display colors assigned to teams, in order
+    _colors = ["red", "blue", "green", "orange", "purple", "cyan", "magenta",
+               "gold"]
+
     #=========================================================================
 
-    def __init__(self, size=(800, 800), layout=0, class1=None, class2=None,
-                 cutoff=-1):
+    def __init__(self, size=None, layout=0, class1=None, class2=None,
+                 cutoff=-1, los_table=False, classes=None, teams=None,
+                 step_time=None, fps=None, render_every=1, headless=False,
+                 blocks=None, starts=None, sinks=None, master=None,
+                 scale=1.0, debug=False, rules=None):
         """TurtleCombatGame([size], [layout], [p1], [p2]) -> TurtleCombatGame
         Constructor for the Turtle Combat game.
 
         Sets up window, game variables, step timer, and all in-game objects,
         and then begins the game.
 
-        The turtle classes must be given as strings which give the full
-        submodule path, for example "tc.ai.direct.CombatTurtle".
+        The turtle classes must be given either as strings which give the full
+        submodule path, for example "tc.ai.direct.CombatTurtle", or as the
+        class objects themselves.
+
+        A standard game has two players, given by class1 and class2. Games
+        with any number of players can be set up by instead giving a list of
+        classes, along with an optional list of team IDs. By default every
+        player is on its own team (free-for-all). The game ends when at most
+        one team has any surviving turtles.
+
+        A headless game has no window and is not started automatically.
+        Instead its steps are driven by the caller, either all at once with
+        run() or one at a time (see game.server).
+
+        A game given a master widget is drawn inside that widget rather than
+        in a window of its own, and is also not started automatically, so
+        that several games can share a single window (see game.dashboard).
 
         Accepts the following optional keyword arguments:
-            size (tuple (int, int)) [(800, 800)] -- arena width/height (px)
+            size (tuple (int, int)) [None] -- arena width/height (px), which
+                overrides the size given by the rules
             layout (int) [0] -- arena obstacle layout ID (meanings of IDs
                 defined in Arena class)
             class1 (str) [None] -- full class name of first player object
             class2 (str) [None] -- full class name of second player object
             cutoff (int) [-1] -- game time cutoff (negative for no limit)
+            los_table (bool) [False] -- whether to answer line of sight
+                queries from a precomputed lookup table (see
+                game.util.visibility)
+            classes (list) [None] -- list of player classes, which overrides
+                class1 and class2 if given
+            teams (list) [None] -- list of team IDs for each player (defaults
+                to a separate team for each player)
+            step_time (int) [None] -- time per step (ms), or 0 to run steps
+                as fast as possible, which overrides the step time given by
+                the rules
+            fps (float) [None] -- maximum number of frames drawn per second
+                (None to draw according to render_every instead)
+            render_every (int) [1] -- number of steps per frame drawn (only
+                used if fps is None)
+            headless (bool) [False] -- whether to run without a window
+            blocks (list) [None] -- explicit list of block boundaries, which
+                replaces the blocks of the layout (see Arena)
+            starts (list) [None] -- explicit list of (coords, heading)
+                starting positions for each player, which replaces the
+                starting positions of the layout
+            sinks (list) [None] -- list of sinks to receive the game's events
+                (see game.events)
+            master (tkinter widget) [None] -- widget to draw the game in
+                (None to open a new window)
+            scale (float) [1.0] -- ratio of the displayed arena size to the
+                actual arena size
+            debug (bool) [False] -- whether to start the game paused, with
+                controls for stepping forwards and backwards through it (see
+                game.debugger)
+            rules (Rules) [None] -- rules of the game (see game.rules), or
+                None for the rules of the standard game
         """
 
+        # Gather the rules (with any overrides given separately)
+        if rules == None:
+            rules = DEFAULT_RULES
+        if size != None:
+            rules = rules._replace(size=tuple(size))
+        if step_time != None:
+            rules = rules._replace(step_time=step_time)
+        self._rules = rules # rules of the game
+
         # Initialize game constants
-        self._size = size # arena size
-        self._step_time = 33 # time per step (ms)
+        self._size = rules.size # arena size
+        self._step_time = rules.step_time # time per step (ms)
+        self._fps = fps # maximum frame rate (frames/sec)
+        self._render_every = max(1, render_every) # steps per frame
+        self._scale = scale # displayed size of arena relative to actual size
         self.cutoff = cutoff # maximum number of iterations
+        self._los_table = los_table # whether to use line of sight table
+        self.headless = headless # whether the game runs without a window
+        self._events = EventStream(sinks) # stream of match events
+
+        # Gather player classes (resolving any class name strings)
+        if classes == None:
+            classes = [class1, class2]
+        classes = [eval(c) if type(c) == str else c for c in classes]
+        if teams == None:
+            teams = list(range(len(classes)))
 
         # Get turtle names
-        self.p1_name = "Player 1" # name of player 1 turtle
-        if class1 != None:
-            self.p1_name = eval(class1 + ".class_name()")
-        self.p2_name = "Player 2" # name of player 2 turtle
-        if class2 != None:
-            self.p2_name = eval(class2 + ".class_name()")
+        self.names = ["Player " + str(i+1) for i in range(len(classes))]
+        for i in range(len(classes)):
+            if classes[i] != None:
+                self.names[i] = classes[i].class_name()
+        self.p1_name = self.names[0] # name of player 1 turtle
+        self.p2_name = self.names[1] if len(self.names) > 1 else "Player 2"
+            # name of player 2 turtle
+
+        # Assign colors by team, in order of first appearance
+        self._team_colors = {} # display color of each team
+        for t in teams:
+            if t not in self._team_colors:
+                self._team_colors[t] = TurtleCombatGame._colors[
+                    len(self._team_colors) % len(TurtleCombatGame._colors)]
+
+        # Set up Tkinter window (headless games have no window or canvas)
+        self.root = None # window root
+        self._canvas = None # arena canvas
+        if headless == False:
+            self._build_window(classes, teams, layout, master)
+
+        # Initialize arena
+        self._arena = Arena(self, size=self._size, layout=layout,
+                            players=len(classes), blocks=blocks)
+
+        # Initialize players (empty slots are left as None)
+        self._players = [] # player objects, in order
+        if starts == None:
+            starts = self._arena.get_starts(layout)
+        for i in range(len(classes)):
+            if classes[i] == None:
+                self._players.append(None)
+                continue
+            (coords, heading) = starts[i]
+            self._players.append(classes[i](self,
+                                            col=self._team_colors[teams[i]],
+                                            coords=coords, heading=heading,
+                                            name="Player " + str(i+1)))
+            self._players[-1]._set_team(teams[i])
+        self._turtles = [p for p in self._players if p != None]
+            # all turtles in the game
+        self._teams = set(t._team for t in self._turtles) # starting teams
+        self.p1 = self._players[0] # first player
+        self.p2 = self._players[1] if len(self._players) > 1 else None
+            # second player
+
+        # Index turtle positions for missile proximity and explosion tests
+        self._hash = SpatialHash(max(rules.missile_proximity,
+                                     rules.missile_radius))
+        self._update_hash()
+
+        # Missile threat map of the current step (built when first needed)
+        self._threats = None
+
+        # Give players pointers to their opponents
+        if len(self._turtles) == 2 and self.p1 != None and self.p2 != None:
+            self.p1._set_other(self.p2)
+            self.p2._set_other(self.p1)
+        elif len(self._turtles) > 2:
+            self._retarget()
+
+        # Set up health displays and keyboard controls
+        self._health_vars = [] # health strings of each player
+        self._shown_health = [] # health currently displayed for each player
+        self._idle = None # ID of the queued frame's idle callback (or None)
+        self.p1_health = None # player 1 health string
+        self.p2_health = None # player 2 health string
+        if headless == False:
+            self._build_displays()
+
+        # Run AI setup code
+        for p in self._turtles:
+            p.setup()
+
+        # Initialize game state
+        self.iteration = 0 # number of steps that the game has gone through
+        self.winner = None # winning team ID (None for a tie or unfinished)
+        self.over = False # whether the game has ended
+        self._timeout = False # whether the game ended at the cutoff
+        self._alive = list(self._turtles) # turtles in play during last step
+        self._clock = None # time at which the next step is due (s)
+        self._last_frame = 0 # iteration at which the last frame was drawn
+        self._next_frame = 0.0 # time at which the next frame is due (s)
+        self._announcement = [] # canvas items of the game over message
+
+        # Begin game (after a delay, to allow the arena to initialize)
+        if headless == False and master == None:
+            if debug == True:
+                self.root.after(500, Debugger(self)._tick)
+            else:
+                self.root.after(500, self.play_game)
+            self.root.mainloop()
+
+    #-------------------------------------------------------------------------
+
+    def _build_window(self, classes, teams, layout, master=None):
+        """TurtleCombatGame._build_window(classes, teams, layout[, master])
+        -> None
+        Sets up the game window, arena canvas, and player name displays.
+
+        If a master widget is given, everything is placed inside it (along
+        with a title label beneath the arena) rather than in a new window.
+        """
+
+        tk = load_tkinter()
 
         # Define window title
-        title = ("Turtle Combat: " + self.p1_name + " vs. " + self.p2_name +
+        title = ("Turtle Combat: " + " vs. ".join(self.names) +
                  "(" + Arena.get_names()[layout] + ")")
 
         # Set up Tkinter window
-        self.root = tk.Tk()
-        self.root.title(title)
-
-        # Set up arena canvas
-        self._canvas = tk.Canvas(self.root, width=size[0], height=size[1],
-                                 bg="white", bd=4, relief="sunken")
-        self._canvas.grid(column=1, rowspan=2, padx=8, pady=8)
-
-        # Set up name and health displays
-        p1_label = tk.Label(self.root, text=self.p1_name,
-                            font=("Helvetica", 16), fg="red")
-        p1_label.grid(column=0, row=0, padx=8, sticky="S")
-        p2_label = tk.Label(self.root, text=self.p2_name,
-                            font=("Helvetica", 16), fg="blue")
-        p2_label.grid(column=2, row=0, padx=8, sticky="S")
+        if master == None:
+            self.root = tk.Tk()
+            self.root.title(title)
+        else:
+            self.root = master
+
+        # Set up arena canvas (players are listed alternately to the left and
+        # right of the arena, with a name row and a health row for each)
+        rows = 2*max(1, (len(classes)+1)//2) # number of display rows
+        canvas = tk.Canvas(self.root, width=int(self._size[0]*self._scale),
+                           height=int(self._size[1]*self._scale), bg="white",
+                           bd=4, relief="sunken")
+        canvas.grid(column=1, row=0, rowspan=rows, padx=8, pady=8)
+        self._canvas = canvas
+        if self._scale != 1:
+            self._canvas = ScaledCanvas(canvas, self._scale)
+        if master != None:
+            tk.Label(self.root, text=title).grid(column=0, row=rows,
+                                                 columnspan=3)
+
+        # Set up name displays
+        for i in range(len(classes)):
+            label = tk.Label(self.root, text=self.names[i],
+                             font=("Helvetica", self._font_size(16)),
+                             fg=self._team_colors[teams[i]])
+            label.grid(column=2*(i % 2), row=2*(i//2), padx=8, sticky="S")
 
-        # Initialize arena
-        self._arena = Arena(self, size=size, layout=layout)
-
-        # Initialize players
-        self.p1 = None # first player
-        self.p2 = None # second player
-        if class1 != None:
-            coords = Arena.get_p1_coords(layout)
-            heading = Arena.get_p1_heading(layout)
-            argstring = ("(self, col=\"red\", coords=" + str(coords) +
-                         ", heading=" + str(heading) + ", name=\"Player 1\")")
-            self.p1 = eval(class1 + argstring)
-        if class2 != None:
-            coords = Arena.get_p2_coords(layout)
-            heading = Arena.get_p2_heading(layout)
-            argstring = ("(self, col=\"blue\", coords=" + str(coords) +
-                         ", heading=" + str(heading) + ", name=\"Player 2\")")
-            self.p2 = eval(class2 + argstring)
-
-        # Give players each others' pointers
-        if self.p1 != None and self.p2 != None:
-            self.p1._set_other(self.p2)
-            self.p2._set_other(self.p1)
+    #-------------------------------------------------------------------------
+
+    def _build_displays(self):
+        """TurtleCombatGame._build_displays() -> None
+        Sets up the player health displays and keyboard controls.
+        """
+
+        tk = load_tkinter()
 
         # Get players' health
-        self.p1_health = tk.StringVar(value="") # player 1 health string
-        self.p1_health_display = tk.Label(self.root)
-        if self.p1 != None:
-            self.p1_health.set(str(self.p1.health))
-            self.p1_health_display = tk.Label(self.root,
-                                              textvariable=self.p1_health,
-                                              font=("Helvetica", 12))
-        self.p1_health_display.grid(column=0, row=1, padx=8, sticky="N")
-        self.p2_health = tk.StringVar(value="") # player 2 health string
-        self.p2_health_display = tk.Label(self.root)
-        if self.p2 != None:
-            self.p2_health.set(str(self.p2.health))
-            self.p2_health_display = tk.Label(self.root,
-                                              textvariable=self.p2_health,
-                                              font=("Helvetica", 12))
-        self.p2_health_display.grid(column=2, row=1, padx=8, sticky="N")
+        for i in range(len(self._players)):
+            var = tk.StringVar(value="")
+            display = tk.Label(self.root)
+            shown = None
+            if self._players[i] != None:
+                shown = str(self._players[i].health)
+                var.set(shown)
+                display = tk.Label(self.root, textvariable=var,
+                                   font=("Helvetica", self._font_size(12)))
+            display.grid(column=2*(i % 2), row=2*(i//2)+1, padx=8,
+                         sticky="N")
+            self._health_vars.append(var)
+            self._shown_health.append(shown)
+        self.p1_health = self._health_vars[0]
+        self.p2_health = (self._health_vars[1] if len(self._health_vars) > 1
+                          else tk.StringVar(value=""))
         
         # Set up listeners for keyboard events (for KeyboardTurtle AI)
-        if class1 == "ai.keyboard.CombatTurtle":
-            self.root.bind("<Up>", lambda e : self.p1._keyboard_move(1))
-            self.root.bind("w", lambda e : self.p1._keyboard_move(1))
-            self.root.bind("<Down>", lambda e : self.p1._keyboard_move(-1))
-            self.root.bind("s", lambda e : self.p1._keyboard_move(-1))
-            self.root.bind("<Left>", lambda e : self.p1._keyboard_turn(1))
-            self.root.bind("a", lambda e : self.p1._keyboard_turn(1))
-            self.root.bind("<Right>", lambda e : self.p1._keyboard_turn(-1))
-            self.root.bind("d", lambda e : self.p1._keyboard_turn(-1))
-            self.root.bind("<space>", lambda e : self.p1._keyboard_shoot())
-        if class2 == "ai.keyboard.CombatTurtle":
-            self.root.bind("<Up>", lambda e : self.p2._keyboard_move(1))
-            self.root.bind("w", lambda e : self.p2._keyboard_move(1))
-            self.root.bind("<Down>", lambda e : self.p2._keyboard_move(-1))
-            self.root.bind("s", lambda e : self.p2._keyboard_move(-1))
-            self.root.bind("<Left>", lambda e : self.p2._keyboard_turn(1))
-            self.root.bind("a", lambda e : self.p2._keyboard_turn(1))
-            self.root.bind("<Right>", lambda e : self.p2._keyboard_turn(-1))
-            self.root.bind("d", lambda e : self.p2._keyboard_turn(-1))
-            self.root.bind("<space>", lambda e : self.p2._keyboard_shoot())
+        for p in self._turtles:
+            if hasattr(p, "_keyboard_move") == False:
+                continue
+            self.root.bind("<Up>", lambda e, p=p : p._keyboard_move(1))
+            self.root.bind("w", lambda e, p=p : p._keyboard_move(1))
+            self.root.bind("<Down>", lambda e, p=p : p._keyboard_move(-1))
+            self.root.bind("s", lambda e, p=p : p._keyboard_move(-1))
+            self.root.bind("<Left>", lambda e, p=p : p._keyboard_turn(1))
+            self.root.bind("a", lambda e, p=p : p._keyboard_turn(1))
+            self.root.bind("<Right>", lambda e, p=p : p._keyboard_turn(-1))
+            self.root.bind("d", lambda e, p=p : p._keyboard_turn(-1))
+            self.root.bind("<space>", lambda e, p=p : p._keyboard_shoot())
 
         self.root.update()
-        
-        # Run AI setup code
-        if self.p1 != None:
-            self.p1.setup()
-        if self.p2 != None:
-            self.p2.setup()
 
-        # Begin game (after a delay, to allow the arena to initialize)
-        self.iteration = 0 # number of steps that the game has gone through
-        self.root.after(500, self.play_game)
-        self.root.mainloop()
+    #-------------------------------------------------------------------------
+
+    def _font_size(self, size):
+        """TurtleCombatGame._font_size(size) -> int
+        Returns a display font size scaled to match the arena.
+        """
+
+        return max(8, int(round(size*self._scale)))
 
     #-------------------------------------------------------------------------
 
@@ -161,16 +330,32 @@ class TurtleCombatGame:
         """
 
         # Delete players
-        if self.p1 != None:
-            del self.p1
-        if self.p2 != None:
-            del self.p2
+        del self.p1
+        del self.p2
+        del self._players[:]
+        del self._turtles[:]
 
         # Delete arena
         del self._arena
 
     #-------------------------------------------------------------------------
 
+    @property
+    def rules(self):
+        """TurtleCombatGame.rules -> Rules
+        Returns the rules of the game (see game.rules).
+        """
+
+        return self._rules
+
+    @rules.setter
+    def rules(self, value):
+        """Do-nothing rules setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
     @property
     def step_time(self):
         """TurtleCombatGame.step_time -> int
@@ -225,7 +410,7 @@ class TurtleCombatGame:
         Returns a list of all Block objects in the arena.
         """
 
-        return self._arena.get_blocks()
+        return self._arena.blocks
 
     @blocks.setter
     def blocks(self, value):
@@ -235,6 +420,59 @@ class TurtleCombatGame:
 
     #-------------------------------------------------------------------------
 
+    @property
+    def turtles(self):
+        """TurtleCombatGame.turtles -> list
+        Returns a list of all turtles in the game (including destroyed ones).
+        """
+
+        return self._turtles
+
+    @turtles.setter
+    def turtles(self, value):
+        """Do-nothing turtle list setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def events(self):
+        """TurtleCombatGame.events -> EventStream
+        Returns the game's event stream (see game.events).
+        """
+
+        return self._events
+
+    @events.setter
+    def events(self, value):
+        """Do-nothing event stream setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
+    @property
+    def visibility(self):
+        """TurtleCombatGame.visibility -> VisibilityTable
+        Returns the arena's line of sight lookup table, if in use.
+
+        Returns None unless the game was created with the los_table option,
+        in which case the table is built on first access.
+        """
+
+        if self._los_table == False:
+            return None
+        return self._arena.visibility()
+
+    @visibility.setter
+    def visibility(self, value):
+        """Do-nothing visibility table setter to prevent overwriting."""
+
+        pass
+
+    #-------------------------------------------------------------------------
+
     @property
     def size(self):
         """TurtleCombatGame.size -> tuple
@@ -281,6 +519,45 @@ class TurtleCombatGame:
 
     #-------------------------------------------------------------------------
 
+    def block_rects(self):
+        """TurtleCombatGame.block_rects() -> list
+        Returns the boundaries of every block, as (left, right, bottom, top).
+        """
+
+        return self._arena.rects()
+
+    #-------------------------------------------------------------------------
+
+    def threats(self):
+        """TurtleCombatGame.threats() -> ThreatMap
+        Returns the map of predicted missile threats.
+
+        The map covers the predicted flight of every missile in play, with a
+        blast possible at every step of its path. This includes each team's
+        own missiles, since they explode as soon as they come close to an
+        enemy turtle (wherever it goes), and their blasts damage the shooter
+        too, so the same map serves every team. Missiles fired during the
+        current step are left out, so that every turtle sees the same
+        missiles no matter the order in which turtles move.
+
+        The map is built the first time that it is needed during a step, and
+        kept until the missiles next move.
+        """
+
+        if self._threats != None:
+            return self._threats
+
+        threats = ThreatMap(self.size)
+        lifespan = self._rules.missile_lifespan
+        for t in self._turtles:
+            for m in t._missiles:
+                if m.countdown < lifespan:
+                    threats.add(m._flight_path(), m.radius)
+        self._threats = threats
+        return threats
+
+    #-------------------------------------------------------------------------
+
     def _message_position(self):
         """TurtleCombatGame._message_position() -> tuple
         Determines the coordinates of messages to display on the arena canvas.
@@ -294,145 +571,448 @@ class TurtleCombatGame:
         turtle is the greatest.
         """
 
-        # Get turtle coordinates and center coordinates
-        (x1, y1) = self.p1.position
-        (x2, y2) = self.p2.position
+        # Get center coordinates
         (xc, yc) = (self.size[0]/2, self.size[1]/2)
 
         # Define safety margin for text box size
         (xr, yr) = (300, 80)
 
         # If the center is free, display there
-        if ((x1 < xc-xr or x1 > xc+xr) and (x2 < xc-xr or x2 > xc+xr)
-            and (y1 < yc-yr or y1 > yc+yr) and (y2 < yc-yr or y2 > yc+yr)):
+        free = True # whether all turtles are clear of the center
+        for t in self._turtles:
+            (x, y) = t.position
+            if not ((x < xc-xr or x > xc+xr) and (y < yc-yr or y > yc+yr)):
+                free = False
+        if free == True:
             return (xc, yc)
 
-        # Otherwise find the corner furthest from both turtles
+        # Otherwise find the corner furthest from all turtles
         corners = [(xr, yr), (self.size[0]-xr, yr), (xr, self.size[1]-yr),
                    (self.size[0]-xr, self.size[1]-yr)] # corner coordinates
-        dist = [self.p1.distance(corners[i]) + self.p2.distance(corners[i])
+        dist = [sum(t.distance(corners[i]) for t in self._turtles)
                 for i in range(len(corners))] # distances to all corners
         mi = dist.index(max(dist)) # index of maximum distance
         return corners[mi]
 
     #-------------------------------------------------------------------------
 
+    def _team_name(self, team):
+        """TurtleCombatGame._team_name(team) -> str
+        Returns the name used to announce a team's victory.
+
+        A team made up of a single turtle is referred to by the turtle's name.
+        """
+
+        members = [i for i in range(len(self._players))
+                   if self._players[i] != None and
+                   self._players[i]._team == team]
+        if len(members) == 1:
+            return str(self.names[members[0]])
+        return "Team " + str(team)
+
+    #-------------------------------------------------------------------------
+
+    def _announce(self, text, col):
+        """TurtleCombatGame._announce(text, col) -> None
+        Displays a game over message on the arena canvas.
+
+        Requires the following positional arguments:
+            text (str) -- message text
+            col (str) -- message color
+        """
+
+        pos = self._message_position()
+        self._announcement.append(self._canvas.create_text(
+            pos[0] + 2, pos[1] + 2, text=text, font=("Helvetica", 32, "bold"),
+            fill="gray"))
+        self._announcement.append(self._canvas.create_text(
+            pos[0], pos[1], text=text, font=("Helvetica", 32, "bold"),
+            fill=col))
+
+    #-------------------------------------------------------------------------
+
+    def _clear_announcement(self):
+        """TurtleCombatGame._clear_announcement() -> None
+        Removes any game over message from the arena canvas.
+        """
+
+        for item in self._announcement:
+            self._canvas.delete(item)
+        del self._announcement[:]
+
+    #-------------------------------------------------------------------------
+
+    def _update_hash(self):
+        """TurtleCombatGame._update_hash() -> None
+        Updates the spatial hash of surviving turtle positions.
+
+        Missile proximity and explosion tests query the hash rather than
+        measuring the distance to every turtle. The hash is updated in place,
+        so turtles which have stayed within the same grid cell cost only a
+        comparison, and destroyed turtles are dropped from it.
+        """
+
+        for t in self._turtles:
+            if t.health > 0:
+                self._hash.move(t, t.position)
+            else:
+                self._hash.remove(t)
+
+    #-------------------------------------------------------------------------
+
+    def _turtles_near(self, coords, radius):
+        """TurtleCombatGame._turtles_near(coords, radius) -> list
+        Returns the turtles that might be within a distance of a coordinate.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to search around
+            radius (float) -- search radius (px)
+
+        This is a broad phase test (see SpatialHash.near()), so callers
+        should still test the exact distance to each returned turtle.
+        """
+
+        return self._hash.near(coords, radius)
+
+    #-------------------------------------------------------------------------
+
+    def _retarget(self):
+        """TurtleCombatGame._retarget() -> None
+        Points each surviving turtle at its nearest surviving enemy.
+
+        In games with more than two players, each turtle's opponent (as seen
+        through its other_* attributes) is the closest surviving turtle from
+        another team. If no enemies remain, the previous opponent is kept.
+        """
+
+        for t in self._turtles:
+            if t.health <= 0:
+                continue
+            enemy = self._hash.nearest(t.position,
+                                       lambda o, t=t : o._team != t._team)
+            if enemy != None:
+                t._set_other(enemy)
+
+    #-------------------------------------------------------------------------
+
+    def _outcome(self):
+        """TurtleCombatGame._outcome() -> tuple
+        Determines whether the game has ended, and if so, who won.
+
+        Returns a tuple of the form (over, winner, timeout), where over
+        indicates whether the game has ended, winner is the winning team's ID
+        (or None in case of a tie), and timeout indicates whether the game
+        ended due to the iteration cutoff.
+
+        The game ends when at most one team has surviving turtles. If the
+        iteration cutoff is reached first, the team with the most total
+        remaining health wins.
+        """
+
+        # Find total health of each surviving team
+        health = {} # total health of each team
+        for t in self._turtles:
+            if t.health > 0:
+                health[t._team] = health.get(t._team, 0) + t.health
+
+        # Decide whether the game is over
+        if len(health) < min(2, len(self._teams)):
+            # No surviving team or a single surviving team
+            if len(health) == 1:
+                return (True, list(health)[0], False)
+            return (True, None, False)
+        elif self.cutoff > 0 and self.iteration >= self.cutoff:
+            # Time limit cutoff
+            best = max(health.values(), default=0)
+            leaders = [t for t in health if health[t] == best]
+            if len(leaders) == 1:
+                return (True, leaders[0], True)
+            return (True, None, True)
+
+        return (False, None, False)
+
+    #-------------------------------------------------------------------------
+
     def play_game(self):
         """TurtleCombatGame.play_game() -> None
         Main gameplay loop of Turtle Combat.
 
         Implemented as a handler for a timer event.
 
-        The main loop mostly consists of iteratively evaluating the step
-        events of all in-game objects, creating and destroying objects as
-        needed, and evaluating when the game has been won.
+        Each call runs every simulation step that is currently due (see
+        _step()), draws a frame if one is due, and then resets the timer.
+        Simulation and drawing run on separate clocks:
+            step_time -- steps are due once every step_time ms, or as fast as
+                possible if step_time is 0
+            fps / render_every -- a frame is drawn at most fps times per
+                second if fps is set, and otherwise after every render_every
+                steps
+
+        If the simulation falls behind its step clock (for example because
+        of an expensive AI), it runs at most about 100 ms worth of steps per
+        call before drawing and resynchronizing the clock, so the game slows
+        down rather than freezing the window.
+        """
+
+        start = time.perf_counter()
+        if self._clock == None:
+            self._clock = start
+
+        # Run all steps that are due
+        now = start
+        while self.over == False:
+            self._step()
+            now = time.perf_counter()
+            if self._step_time > 0:
+                # Fixed step rate
+                self._clock += self._step_time/1000
+                if self._clock > now:
+                    break
+                if now - start >= 0.1:
+                    self._clock = now
+                    break
+            elif self._frame_due(now) == True or now - start >= 0.1:
+                # Unlimited step rate (yield to the window once per frame)
+                break
+
+        # Draw a frame if one is due (always draw the final frame)
+        if self.over == True or self._frame_due(now) == True:
+            self._redraw(now)
+
+        # Continue loop by resetting timer
+        if self.over == False:
+            delay = 1 # delay until next call (ms)
+            if self._step_time > 0:
+                delay = max(0, int(1000*(self._clock - time.perf_counter())))
+            self.root.after(delay, self.play_game)
+            return None
+
+        self._finish()
+
+    #-------------------------------------------------------------------------
+
+    def _finish(self):
+        """TurtleCombatGame._finish() -> None
+        Announces the result of a finished game on the arena canvas.
+        """
+
+        # Draw any queued frame first, so that the announcement stays on top
+        self._draw()
+
+        if self.winner == None:
+            text = "Tie!"
+            col = "yellow"
+        else:
+            text = self._team_name(self.winner) + " wins!"
+            col = self._team_colors[self.winner]
+        if self._timeout == True:
+            text = "Out of time!" + ("" if self.winner == None else
+                                     "\n" + text)
+        self._announce(text, col)
+
+    #-------------------------------------------------------------------------
+
+    def run(self):
+        """TurtleCombatGame.run() -> None
+        Plays a headless game through to the end.
+
+        Steps are run back to back, with nothing drawn. The result can then
+        be read with result().
+        """
+
+        while self.over == False:
+            self._step()
+
+    #-------------------------------------------------------------------------
+
+    def result(self):
+        """TurtleCombatGame.result() -> MatchResult
+        Returns a record of the result of the game (see game.result).
+
+        This may be called at any time, including after the game window has
+        been closed. If the game has not ended, the record's winner and
+        reason are None and its statistics are those so far.
+        """
+
+        reason = None
+        if self.over == True:
+            if self._timeout == True:
+                reason = CUTOFF
+            elif self.winner == None:
+                reason = TIE
+            else:
+                reason = KILL
+        winners = [t.__class__.class_name() for t in self._turtles
+                   if self.winner != None and t._team == self.winner]
+        return MatchResult(self.winner, winners, reason, self.iteration,
+                           [t._result() for t in self._turtles])
+
+    #-------------------------------------------------------------------------
+
+    def _step(self):
+        """TurtleCombatGame._step() -> None
+        Runs a single simulation step.
+
+        The step mostly consists of iteratively evaluating the step events of
+        all in-game objects, creating and destroying objects as needed, and
+        evaluating when the game has been won. Nothing is drawn here (see
+        _redraw()).
+
+        Each step is split into a missile phase and a turtle phase (see
+        _step_missiles() and _step_turtles()), which drivers that need to act
+        between the two may call separately.
+        """
+
+        self._step_missiles()
+        self._step_turtles()
+
+    #-------------------------------------------------------------------------
+
+    def _step_missiles(self):
+        """TurtleCombatGame._step_missiles() -> None
+        Runs the first phase of a step, which moves all missiles.
+
+        Afterwards every turtle's state is exactly what its step() method
+        will observe during the turtle phase.
         """
 
         self.iteration += 1
+
+        # Only turtles which survived the previous step take part in this one
+        self._alive = [t for t in self._turtles if t.health > 0]
+
+        # Bring the index of surviving turtles up to date for this step's
+        # missile tests (keyboard-controlled turtles may move between steps)
+        self._update_hash()
         
-        # Activate the step event of all missiles
-        if self.p1 != None:
-            for m in self.p1._missiles:
-                m._step()
-        if self.p2 != None:
-            for m in self.p2._missiles:
+        # Activate the step event of all missiles (including missiles whose
+        # shooter has been destroyed)
+        for t in self._turtles:
+            for m in list(t._missiles):
                 m._step()
 
-        # Activate the step event of all turtles
-        if self.p1 != None:
-            self.p1._step()
-        if self.p2 != None:
-            self.p2._step()
+        # Forget the threat map of the previous step
+        self._threats = None
+
+    #-------------------------------------------------------------------------
+
+    def _step_turtles(self):
+        """TurtleCombatGame._step_turtles() -> None
+        Runs the second phase of a step, which moves all surviving turtles.
+
+        Also updates each turtle's view of its opponent and decides whether
+        the game has ended.
+        """
+
+        # Activate the step event of all surviving turtles
+        for t in self._alive:
+            t._step()
+
+        self._end_step()
+
+    #-------------------------------------------------------------------------
+
+    def _end_step(self):
+        """TurtleCombatGame._end_step() -> None
+        Completes a step once all surviving turtles have moved.
+
+        Updates each turtle's view of its opponent and decides whether the
+        game has ended.
+        """
 
         # Update other attributes
-        if self.p1 != None:
-            self.p1._get_other_attributes()
-        if self.p2 != None:
-            self.p2._get_other_attributes()
-
-        # Update player health displays
-        hp1 = 1 # current player 1 health
-        if self.p1 != None:
-            hp1 = max(self.p1.health, 0)
-            self.p1_health.set(str(hp1))
-        hp2 = 1 # current player 2 health
-        if self.p2 != None:
-            hp2 = max(self.p2.health, 0)
-            self.p2_health.set(str(hp2))
+        if len(self._turtles) > 2:
+            self._update_hash()
+            self._retarget()
+        for t in self._turtles:
+            t._get_other_attributes()
+
+        # Count the turtles which can see their opponents, using the same
+        # test as their line_of_sight() queries (each answer is kept for the
+        # turtle's next step, see TurtleParent._step())
+        for t in self._alive:
+            o = t._other
+            if t._health <= 0 or o == None or o._health <= 0:
+                continue
+            if t.line_of_sight() == True:
+                t._sight_steps += 1
 
         # Decide whether to continue based on player health values
-        if hp1 <= 0 and hp2 <= 0:
-            # Tie
-            pos = self._message_position()
-            self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                     text="Tie!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="gray")
-            self._canvas.create_text(pos[0], pos[1],
-                                     text="Tie!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="yellow")
-        elif hp1 <= 0:
-            # Player 2 win
-            pos = self._message_position()
-            self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                     text=str(self.p2_name)+" wins!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="gray")
-            self._canvas.create_text(pos[0], pos[1],
-                                     text=str(self.p2_name)+" wins!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="blue")
-        elif hp2 <= 0:
-            # Player 1 win
-            pos = self._message_position()
-            self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                     text=str(self.p1_name)+" wins!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="gray")
-            self._canvas.create_text(pos[0], pos[1],
-                                     text=str(self.p1_name)+" wins!",
-                                     font=("Helvetica", 32, "bold"),
-                                     fill="red")
-        elif self.cutoff > 0 and self.iteration >= self.cutoff:
-            # Time limit cutoff
-            if hp1 < hp2:
-                # Player 1 win
-                pos = self._message_position()
-                self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                         text=("Out of time!\n"+
-                                               str(self.p1_name)+" wins!"),
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="gray")
-                self._canvas.create_text(pos[0], pos[1],
-                                         text=("Out of time!\n"+
-                                               str(self.p1_name)+" wins!"),
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="red")
-            elif hp2 < hp1:
-                # Player 2 win
-                pos = self._message_position()
-                self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                         text=("Out of time!\n"+
-                                               str(self.p2_name)+" wins!"),
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="gray")
-                self._canvas.create_text(pos[0], pos[1],
-                                         text=("Out of time!\n"+
-                                               str(self.p2_name)+" wins!"),
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="blue")
+        (self.over, self.winner, self._timeout) = self._outcome()
+        if self.over == True:
+            winners = [t.__class__.class_name() for t in self._turtles
+                       if self.winner != None and t._team == self.winner]
+            self._events.emit(END, self.iteration, winner=self.winner,
+                              timeout=self._timeout, winners=winners)
+
+    #-------------------------------------------------------------------------
+
+    def _frame_due(self, now):
+        """TurtleCombatGame._frame_due(now) -> bool
+        Determines whether it is time to draw another frame.
+
+        Requires the following positional arguments:
+            now (float) -- current time (s, from time.perf_counter())
+        """
+
+        if self._fps != None:
+            return now >= self._next_frame
+        return self.iteration - self._last_frame >= self._render_every
+
+    #-------------------------------------------------------------------------
+
+    def _redraw(self, now):
+        """TurtleCombatGame._redraw(now) -> None
+        Queues a frame showing the current state of the game.
+
+        Requires the following positional arguments:
+            now (float) -- current time (s, from time.perf_counter())
+
+        The frame itself is drawn by a single idle callback (see _draw()),
+        so that all of its sprite, missile, and health display changes are
+        made together just before the window is next redrawn. Any further
+        frames queued before then are drawn only once.
+        """
+
+        if self._idle == None:
+            self._idle = self.root.after_idle(self._draw)
+
+        # Restart frame clocks
+        self._last_frame = self.iteration
+        if self._fps != None:
+            self._next_frame = now + 1/self._fps
+
+    #-------------------------------------------------------------------------
+
+    def _draw(self):
+        """TurtleCombatGame._draw() -> None
+        Draws the frame queued by _redraw(), if any.
+
+        Implemented as a handler for an idle event, which is scheduled by
+        _redraw(). Updates the sprites of all turtles and missiles, and any
+        health displays whose values have changed. Turtles destroyed before
+        the latest step are removed from the arena.
+        """
+
+        if self._idle == None:
+            return None
+        self._idle = None
+
+        # Update turtle and missile sprites
+        alive = set(self._alive)
+        for t in self._turtles:
+            if t in alive:
+                t._redraw()
             else:
-                # Tie
-                pos = self._message_position()
-                self._canvas.create_text(pos[0] + 2, pos[1] + 2,
-                                         text="Out of time!",
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="gray")
-                self._canvas.create_text(pos[0], pos[1],
-                                         text="Out of time!",
-                                         font=("Helvetica", 32, "bold"),
-                                         fill="yellow")
-        else:
-            # Continue loop by resetting timer
-            self.root.after(self.step_time, self.play_game)
+                t._hide()
+            for m in t._missiles:
+                m._redraw()
+
+        # Update any changed health displays
+        for i in range(len(self._players)):
+            if self._players[i] == None:
+                continue
+            shown = str(max(self._players[i].health, 0))
+            if shown != self._shown_health[i]:
+                self._shown_health[i] = shown
+                self._health_vars[i].set(shown)
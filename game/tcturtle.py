@@ -1,11 +1,23 @@
 """Defines a parent turtle class using Tkinter."""
 
-import tkinter as tk
+import itertools
 import math
+from . import events
 from .obj.arena import Arena
 from .obj.block import Block
 from .obj.missile import Missile
+from .result import PlayerResult
 from .util.angles import Angle
+from .util.canvas import tcl_error
+from .util.trig import COS, SIN, cos_deg, sin_deg
+from .util.visibility import sampled_sight
+
+# Marks a query result missing from the query cache
+_MISSING = object()
+
+# Shape polygon vertex offsets of each turtle class, rotated to every integer
+# heading (see TurtleParent._rotations())
+_ROTATIONS = {}
 
 class TurtleParent:
     """Class to use as the parent of Combat Turtle classes.
@@ -122,6 +134,14 @@ class TurtleParent:
         line_of_sight([target]) -- returns whether there is a direct line of
             sight between this turtle and a target (aliases: line_of_sight,
             los)
+        visible_cells([target]) -- returns the center coordinates of all
+            coarse arena cells with line of sight to a target
+        other_trajectory([steps]) -- returns the predicted positions of the
+            opponent over the next few steps
+        intercept() -- returns the heading (deg) to fire at to hit the
+            opponent along its predicted path
+        is_safe(coord[, steps_ahead]) -- returns whether a coordinate is
+            predicted to be out of reach of missile explosions
     """
     
     #=========================================================================
@@ -203,10 +223,14 @@ class TurtleParent:
         self._canvas = game.canvas
         self._color = col
 
-        # Define constant attributes
-        self._max_speed = 4 # maximum movement speed (px/step)
-        self._max_turn_speed = 15 # maximum turning speed (deg/step)
-        self._shoot_delay = 60 # delay between missile shots (steps)
+        # Define constant attributes (from the rules of the game)
+        self._rules = game.rules # rules of the game
+        self._max_speed = self._rules.max_speed # maximum movement speed
+            # (px/step)
+        self._max_turn_speed = self._rules.max_turn_speed # maximum turning
+            # speed (deg/step)
+        self._shoot_delay = self._rules.shoot_delay # delay between missile
+            # shots (steps)
 
         # Define shape coordinates
         cs = self.__class__.class_shape()
@@ -222,12 +246,30 @@ class TurtleParent:
 
         # Define variable attributes
         self._other = None # opponent turtle object
+        self._team = None # team ID (turtles on the same team are allies)
         self._speed = 0 # target movement speed (px/step, negative for back)
         self._speed_turn = 0 # target CCW turn speed (deg/step, < 0 for CW)
-        self._health = 100 # health points (turtle dies when health is zero)
+        self._health = self._rules.health # health points (turtle dies when
+            # health is zero)
         self._cooldown = 0 # delay until able to shoot next (steps)
         self._shooting = False # whether the turtle is attempting to shoot
         self._time = 0 # current step number
+        self._queries = {} # query results cached until this turtle moves
+
+        # Initialize match statistics (see game.result)
+        self._shots = 0 # number of missiles fired
+        self._hits = 0 # number of missiles which damaged an enemy
+        self._damage_dealt = 0 # damage dealt to enemies
+        self._damage_taken = 0 # damage taken from any source
+        self._self_damage = 0 # damage taken from own missiles
+        self._explosions = {"enemy": 0, "block": 0, "wall": 0, "timer": 0}
+            # number of own missile explosions of each cause
+        self._sight_steps = 0 # steps ending in line of sight of the opponent
+        self._travelled = 0.0 # total distance moved (px)
+        self._step_travelled = 0.0 # distance moved during the current step
+        self._moves = [0]*(self.max_speed + 2) # number of steps moving each
+            # distance (rounded to the nearest px, with the last entry
+            # counting all greater distances)
 
         # Draw self
         self._redraw()
@@ -262,7 +304,7 @@ class TurtleParent:
             self._canvas.delete(self._sprite)
         except AttributeError:
             pass
-        except tk.TclError:
+        except tcl_error():
             pass
 
         # Delete all missile objects
@@ -345,7 +387,7 @@ class TurtleParent:
         in a straight line in the direction of fire.
         """
 
-        return Missile.get_speed()
+        return self._rules.missile_speed
 
     @missile_speed.setter
     def missile_speed(self, value):
@@ -369,7 +411,7 @@ class TurtleParent:
         speed and delay to calculate the resulting range.
         """
 
-        return Missile.get_speed() * Missile.get_lifespan()
+        return self._rules.missile_speed * self._rules.missile_lifespan
 
     @missile_range.setter
     def missile_range(self, value):
@@ -392,7 +434,7 @@ class TurtleParent:
         turtle.
         """
 
-        return Missile.get_proximity()
+        return self._rules.missile_proximity
 
     @missile_proximity.setter
     def missile_proximity(self, value):
@@ -417,7 +459,7 @@ class TurtleParent:
         that shot it).
         """
 
-        return Missile.get_radius()
+        return self._rules.missile_radius
 
     @missile_radius.setter
     def missile_radius(self, value):
@@ -440,7 +482,7 @@ class TurtleParent:
         explosive radius.
         """
 
-        return Missile.get_damage()
+        return self._rules.missile_damage
 
     @missile_damage.setter
     def missile_damage(self, value):
@@ -480,7 +522,7 @@ class TurtleParent:
             should overwrite -- no
         """
 
-        return int(self._canvas["width"])
+        return int(self._game.size[0])
 
     @arena_right.setter
     def arena_right(self, value):
@@ -520,7 +562,7 @@ class TurtleParent:
             should overwrite -- no
         """
 
-        return int(self._canvas["height"])
+        return int(self._game.size[1])
 
     @arena_top.setter
     def arena_top(self, value):
@@ -1008,6 +1050,60 @@ class TurtleParent:
 
         self._other = other
         self._get_other_attributes()
+
+    #-------------------------------------------------------------------------
+
+    def _set_team(self, team):
+        """TurtleParent._set_team(team) -> None
+        Sets the Combat Turtle's team ID.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Missiles are only triggered by proximity to turtles on other teams,
+        although their explosions damage every nearby turtle. This method is
+        meant to be called by the game driver after defining each player.
+        """
+
+        self._team = team
+
+    #-------------------------------------------------------------------------
+
+    def _identity(self, prefix=""):
+        """TurtleParent._identity([prefix]) -> dict
+        Returns the fields that identify this turtle in game events.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        The fields are the turtle's player name, AI name, and team ID, with
+        the given prefix added to each field name (see game.events).
+        """
+
+        return {prefix + "turtle": self._name,
+                prefix + "ai": self.__class__.class_name(),
+                prefix + "team": self._team}
+
+    #-------------------------------------------------------------------------
+
+    def _result(self):
+        """TurtleParent._result() -> PlayerResult
+        Returns this turtle's match statistics (see game.result).
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+        """
+
+        return PlayerResult(self._name, self.__class__.class_name(),
+                            self._team, max(0, self._health), self._shots,
+                            self._hits, self._damage_dealt,
+                            self._damage_taken, self._self_damage,
+                            dict(self._explosions), self._time,
+                            self._sight_steps, self._travelled,
+                            list(self._moves))
     
     #-------------------------------------------------------------------------
     
@@ -1106,18 +1202,47 @@ class TurtleParent:
         and rotated according to its heading.
         """
 
-        # Calculate new coordinates by rotating shape template and offsetting
-        coords = [0 for i in range(2*(len(self._shape_radius)+1))]
-        angle = math.radians(self.heading) # convert heading to rad
-        for i in range(len(self._shape_angle)):
-            coords[2*i] = int(self._x + (self._shape_radius[i]*
-                              math.cos(self._shape_angle[i]+angle)))
-            coords[2*i+1] = int(self._y - (self._shape_radius[i]*
-                                math.sin(self._shape_angle[i]+angle)))
-        coords[-2] = coords[0]
-        coords[-1] = coords[1]
+        # Offset the shape template rotated to the current heading
+        coords = []
+        for (dx, dy) in self._rotations()[self.heading % 360]:
+            coords.append(int(self._x + dx))
+            coords.append(int(self._y - dy))
+        coords.append(coords[0])
+        coords.append(coords[1])
 
         return coords
+
+    #-------------------------------------------------------------------------
+
+    def _rotations(self):
+        """TurtleParent._rotations() -> list
+        Returns the turtle's shape polygon rotated to every integer heading.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        The returned list contains, for each heading h in (-180,180] at
+        index h % 360, a tuple of the (x, y) offsets of the polygon's vertices
+        from the turtle's position (with y measured upwards). Since every
+        turtle of a class has the same shape, the rotations are calculated
+        once per class, the first time one of its turtles is drawn.
+        """
+
+        rotations = _ROTATIONS.get(self.__class__)
+        if rotations == None:
+            rotations = [None for i in range(360)]
+            for h in range(-179, 181):
+                angle = math.radians(h) # convert heading to rad
+                rotations[h % 360] = tuple(
+                    (self._shape_radius[i]*
+                     math.cos(self._shape_angle[i]+angle),
+                     self._shape_radius[i]*
+                     math.sin(self._shape_angle[i]+angle))
+                    for i in range(len(self._shape_angle)))
+            _ROTATIONS[self.__class__] = rotations
+
+        return rotations
     
     #-------------------------------------------------------------------------
 
@@ -1129,11 +1254,16 @@ class TurtleParent:
             should call -- no
             should overwrite -- no
 
-        This method is called at the end of each step to update the turtle
-        sprite's position on the screen. The existing sprite is deleted and a
-        new polygon is drawn at the new position and orientation.
+        This method is called by the game driver whenever it draws a frame
+        (by default at the end of each step) to update the turtle sprite's
+        position on the screen. The existing sprite is deleted and a new
+        polygon is drawn at the new position and orientation. Nothing is
+        drawn in headless games, which have no canvas.
         """
 
+        if self._canvas == None:
+            return None
+
         # Delete existing sprite (undefined during initial draw)
         try:
             self._canvas.delete(self._sprite)
@@ -1143,6 +1273,27 @@ class TurtleParent:
         # Draw new sprite
         self._sprite = self._canvas.create_polygon(self._poly(),
                                                    fill=self._color)
+
+    #-------------------------------------------------------------------------
+
+    def _hide(self):
+        """TurtleParent._hide() -> None
+        Removes the turtle's sprite from the canvas.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is called by the game driver to remove destroyed turtles from
+        the arena in games with more than two players.
+        """
+
+        try:
+            self._canvas.delete(self._sprite)
+        except AttributeError:
+            pass
+        except tcl_error():
+            pass
     
     #=========================================================================
     # Hidden step event methods
@@ -1171,6 +1322,16 @@ class TurtleParent:
         self._speed_turn = 0
         self._shooting = False
 
+        # Forget any queries cached before this step, except the line of sight
+        # to the opponent found by the engine at the end of the last step
+        # (which depends only on this turtle's position and the opponent's
+        # position, neither of which has been updated since)
+        key = ("line_of_sight", self.other_position)
+        sight = self._queries.get(key, _MISSING)
+        self._queries.clear()
+        if sight is not _MISSING:
+            self._queries[key] = sight
+
         # Reduce cooldown
         if self.cooldown > 0:
             self._cooldown -= 1
@@ -1178,6 +1339,24 @@ class TurtleParent:
         # Call the user-defined step method
         self.step()
 
+        # Carry out the chosen actions
+        self._apply()
+
+    #-------------------------------------------------------------------------
+
+    def _apply(self):
+        """TurtleParent._apply() -> None
+        Carries out the actions chosen during the current step.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the second half of the step event, which is called after the
+        step() method to turn and move the turtle, fire a missile if
+        requested, and advance the turtle's timer.
+        """
+
         # Turn turtle
         self._turn()
 
@@ -1186,9 +1365,6 @@ class TurtleParent:
 
         # Attempt to shoot
         self._shoot()
-
-        # Update sprite
-        self._redraw()
         
         # Increment timer
         self._time += 1
@@ -1289,42 +1465,106 @@ class TurtleParent:
         forward() and backward() methods (or their aliases).
         """
 
-        # Set new coordinates
-        self._x += int(self.speed*math.cos(math.radians(self.heading)))
-        self._y -= int(self.speed*math.sin(math.radians(self.heading)))
-        
-        # Bound coordinates to arena size
-        self._x = min(self.arena_right, max(self.arena_left, self._x))
-        self._y = min(self.arena_top, max(self.arena_bottom, self._y))
+        # Find new coordinates (bounded to the arena size)
+        x = self._x + int(self.speed*COS[self.heading])
+        y = self._y - int(self.speed*SIN[self.heading])
+        x = min(self.arena_right, max(self.arena_left, x))
+        y = min(self.arena_top, max(self.arena_bottom, y))
+        self._place((x, y))
+
+        # Record the distance moved during this step (including any moves
+        # made since the last step, such as by keyboard controls)
+        moved = self._step_travelled
+        self._step_travelled = 0.0
+        self._moves[min(len(self._moves) - 1, int(round(moved)))] += 1
+
+    #-------------------------------------------------------------------------
+
+    def _place(self, coords):
+        """TurtleParent._place(coords) -> None
+        Moves the turtle to new coordinates, outside of any blocks.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- destination coordinates
+
+        If the destination lies inside of any blocks, the turtle is pushed out
+        of each of them (see _push_out()) and a collision event is emitted.
+        Any cached queries are forgotten, and the distance moved is added to
+        the turtle's match statistics.
+        """
+
+        start = (self._x, self._y) # starting coordinates
+        (self._x, self._y) = coords
+
+        # Forget any queries cached at the old position
+        self._queries.clear()
 
         # Check whether the destination intersects any blocks
         blocks = self._game.intersections((self.x, self.y))
         if len(blocks) > 0:
             # If so, check all intersecting blocks and move to outside
             for b in blocks:
-                # Determine overlap on each side
-                overlap = [1000000 for i in range(4)] # ordered overlaps
-                if self.x >= b.left:
-                    overlap[0] = self.x - b.left
-                if self.x <= b.right:
-                    overlap[1] = b.right - self.x
-                if self.y >= b.bottom:
-                    overlap[2] = self.y - b.bottom
-                if self.y <= b.top:
-                    overlap[3] = b.top - self.y
-
-                # Find minimum nonzero overlap
-                mo = overlap.index(min(overlap))
-
-                # Reset coordinates based on minimum overlap
-                if mo == 0:
-                    self._x -= overlap[0] - 1
-                elif mo == 1:
-                    self._x += overlap[1] + 1
-                elif mo == 2:
-                    self._y -= overlap[2] - 1
-                else:
-                    self._y += overlap[3] + 1
+                (self._x, self._y) = self._push_out((self.x, self.y), b)
+                self._game.events.emit(events.COLLISION,
+                                       self._game.iteration, x=self.x,
+                                       y=self.y, left=b.left, right=b.right,
+                                       bottom=b.bottom, top=b.top,
+                                       **self._identity())
+
+        # Record the distance moved
+        moved = math.hypot(self._x - start[0], self._y - start[1])
+        self._travelled += moved
+        self._step_travelled += moved
+    
+    #-------------------------------------------------------------------------
+
+    def _push_out(self, coords, block):
+        """TurtleParent._push_out(coords, block) -> tuple
+        Returns the coordinates moved to just outside of a block.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinates inside of the block
+            block (Block) -- block to move out of
+
+        The coordinates are moved out of the nearest side of the block, which
+        is how turtles slide along blocks that they run into.
+        """
+
+        (x, y) = coords
+
+        # Determine overlap on each side
+        overlap = [1000000 for i in range(4)] # ordered overlaps
+        if x >= block.left:
+            overlap[0] = x - block.left
+        if x <= block.right:
+            overlap[1] = block.right - x
+        if y >= block.bottom:
+            overlap[2] = y - block.bottom
+        if y <= block.top:
+            overlap[3] = block.top - y
+
+        # Find minimum nonzero overlap
+        mo = overlap.index(min(overlap))
+
+        # Reset coordinates based on minimum overlap
+        if mo == 0:
+            x -= overlap[0] - 1
+        elif mo == 1:
+            x += overlap[1] + 1
+        elif mo == 2:
+            y -= overlap[2] - 1
+        else:
+            y += overlap[3] + 1
+
+        return (x, y)
     
     #=========================================================================
     # Turning methods
@@ -1408,8 +1648,8 @@ class TurtleParent:
 
         # If given a specific heading, generate a coordinate to turn towards
         if type(target) == int or type(target) == float:
-            target = (int(self.x + 10000*math.cos(math.radians(target))),
-                      int(self.y - 10000*math.sin(math.radians(target))))
+            target = (int(self.x + 10000*cos_deg(target)),
+                      int(self.y - 10000*sin_deg(target)))
 
         # Turn towards coordinates
         if type(target) == tuple:
@@ -1442,6 +1682,9 @@ class TurtleParent:
 
         # Change heading
         self._heading += int(self._speed_turn)
+
+        # Forget any queries cached at the old heading
+        self._queries.clear()
     
     #=========================================================================
     # Missile methods
@@ -1483,10 +1726,30 @@ class TurtleParent:
         if self._shooting == False or self.cooldown > 0:
             return None
 
-        # Otherwise create a missile object and add to the list
+        self._fire()
+
+    #-------------------------------------------------------------------------
+
+    def _fire(self):
+        """TurtleParent._fire() -> None
+        Fires a missile in the turtle's current direction.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Creates a Missile object and resets the shooting cooldown, regardless
+        of whether the turtle was ready to shoot. The shot is added to the
+        turtle's match statistics and emitted as an event.
+        """
+
         self._cooldown = self.shoot_delay # reset cooldown duration
         self._missiles.append(Missile(self._game, self, self._other,
                                       self.position, self.heading))
+        self._shots += 1
+        self._game.events.emit(events.SHOT, self._game.iteration, x=self.x,
+                               y=self.y, heading=self.heading,
+                               **self._identity())
     
     #-------------------------------------------------------------------------
 
@@ -1544,6 +1807,7 @@ class TurtleParent:
         """
 
         self._health -= hp
+        self._damage_taken += hp
     
     #=========================================================================
     # Query methods
@@ -1578,15 +1842,30 @@ class TurtleParent:
         if len(args) >= 2:
             coords1 = args[1]
 
-        # Calculate Euclidean distance
-        return math.sqrt((coords1[0]-coords2[0])**2 +
-                         (coords1[1]-coords2[1])**2)
+        return self._query("distance", self._distance, coords1, coords2)
     
     # Set aliases
     dist = distance
 
     #-------------------------------------------------------------------------
 
+    def _distance(self, coords1, coords2):
+        """TurtleParent._distance(coords1, coords2) -> float
+        Calculates the distance between a pair of coordinates (px).
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind distance().
+        """
+
+        # Calculate Euclidean distance
+        return math.sqrt((coords1[0]-coords2[0])**2 +
+                         (coords1[1]-coords2[1])**2)
+
+    #-------------------------------------------------------------------------
+
     def relative_position(self, target=None):
         """TurtleParent.relative_position -> tuple
         Returns position of a target coordinate relative to self.
@@ -1647,11 +1926,7 @@ class TurtleParent:
         if target == None:
             target = self.other_position
 
-        # Get position relative to target
-        (dx, dy) = self.relative_position(target)
-
-        # Calculate relative heading using arctan (Angle class mods result)
-        return int(math.degrees(Angle(math.atan2(-dy, dx))))
+        return self._query("heading_towards", self._heading_towards, target)
     
     # Set aliases
     heading_toward = heading_towards
@@ -1660,6 +1935,25 @@ class TurtleParent:
 
     #-------------------------------------------------------------------------
 
+    def _heading_towards(self, target):
+        """TurtleParent._heading_towards(target) -> int
+        Returns the heading (deg) towards a target coordinate.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind heading_towards().
+        """
+
+        # Get position relative to target
+        (dx, dy) = self.relative_position(target)
+
+        # Calculate relative heading using arctan (Angle class mods result)
+        return int(math.degrees(Angle(math.atan2(-dy, dx))))
+
+    #-------------------------------------------------------------------------
+
     def relative_heading_towards(self, target=None):
         """TurtleParent.relative_heading_towards([target]) -> int
         Returns the change in heading (deg) needed to turn towards a target.
@@ -1684,15 +1978,35 @@ class TurtleParent:
         relative_heading().
         """
 
+        # If no target, use opponent turtle's position
+        if target == None:
+            target = self.other_position
+
+        return self._query("relative_heading_towards",
+                           self._relative_heading_towards, target)
+    
+    # Set aliases
+    relative_heading_toward = relative_heading_towards
+
+    #-------------------------------------------------------------------------
+
+    def _relative_heading_towards(self, target):
+        """TurtleParent._relative_heading_towards(target) -> int
+        Returns the change in heading (deg) needed to turn towards a target.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind relative_heading_towards().
+        """
+
         # Calculate absolute heading towards target
         ah = Angle(self.heading_towards(target), "degrees")
 
         # Return difference in headings
         return int(ah - self.heading)
     
-    # Set aliases
-    relative_heading_toward = relative_heading_towards
-    
     #-------------------------------------------------------------------------
     
     def free_space(self, coord):
@@ -1750,9 +2064,45 @@ class TurtleParent:
         # If no target, use opponent turtle's position
         if target == None:
             target = self.other_position
+
+        return self._query("line_of_sight", self._line_of_sight, target)
+    
+    # Set aliases
+    los = line_of_sight
+
+    #-------------------------------------------------------------------------
+
+    def _line_of_sight(self, target):
+        """TurtleParent._line_of_sight(target) -> bool
+        Returns whether there is a clear line of sight to a target.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind line_of_sight().
+        """
+
+        # If the game uses a lookup table, skip the exact test for any pair
+        # of positions that the table can vouch for
+        table = self._game.visibility
+        if table != None:
+            if table.clear(self.position, target) == True:
+                return True
+            if table.blocked(self.position, target) == True:
+                return False
+
+        # Otherwise solve for the outcome directly, unless it depends on
+        # rounding error
+        heading = self.heading_towards(target)
+        sight = sampled_sight(self.position, target, heading,
+                              self._game.block_rects(), self._game.size,
+                              self.missile_speed)
+        if sight != None:
+            return sight
         
         # Get heading towards target
-        rh = math.radians(self.heading_towards(target))
+        rh = math.radians(heading)
         
         # Get initial signs of x- and y-direction differences
         sx = self._sign(target[0] - self.x) # x-direction sign
@@ -1787,9 +2137,244 @@ class TurtleParent:
             iter += 1
             if iter >= 100:
                 return False
+
+    #-------------------------------------------------------------------------
+
+    def visible_cells(self, target=None):
+        """TurtleParent.visible_cells([target]) -> list
+        Returns the coordinates of arena cells with line of sight to a target.
+
+        User visibility:
+            should call -- yes
+            should overwrite -- no
+
+        This method can be called in several different formats depending on
+        whether a target is specified:
+            None -- target becomes opponent turtle's coordinates
+            tuple (int, int) -- cells that can see the specified coordinate
+
+        The arena is divided into a coarse grid of square cells, and this
+        method returns a list of the center coordinates of every cell whose
+        center has a clear line of sight to the center of the target's cell.
+        This is meant for broad planning (for example finding cover from the
+        opponent) rather than precise aiming, for which line_of_sight()
+        should be used.
+
+        The grid is computed once per arena layout, so the first call may
+        take a moment, after which calls are fast.
+        """
+
+        # If no target, use opponent turtle's position
+        if target == None:
+            target = self.other_position
+
+        return self._game.arena.visibility().visible_cells(target)
+
+    #-------------------------------------------------------------------------
+
+    def other_trajectory(self, steps=1):
+        """TurtleParent.other_trajectory([steps]) -> tuple
+        Predicts the positions of the opponent over the next several steps.
+
+        User visibility:
+            should call -- yes
+            should overwrite -- no
+
+        Accepts the following optional positional arguments:
+            steps (int) [1] -- number of steps to predict
+
+        Returns a tuple of predicted opponent coordinates, one for the end of
+        each of the next few steps (beginning with the current step). The
+        prediction assumes that the opponent keeps moving and turning at its
+        current speed and turning speed, and follows the same movement rules
+        as every turtle, so that it stops at the arena's boundaries and
+        slides along any blocks that it runs into.
+
+        Returns None if there is no opponent.
+        """
+
+        if self._other == None:
+            return None
+
+        return self._query("other_trajectory", self._other_trajectory,
+                           steps)
     
-    # Set aliases
-    los = line_of_sight
+    #-------------------------------------------------------------------------
+
+    def _other_trajectory(self, steps):
+        """TurtleParent._other_trajectory(steps) -> tuple
+        Predicts the positions of the opponent over the next several steps.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind other_trajectory().
+        """
+
+        return tuple(itertools.islice(self._predict_other(), steps))
+    
+    #-------------------------------------------------------------------------
+
+    def _predict_other(self):
+        """TurtleParent._predict_other() -> generator
+        Generates the predicted positions of the opponent, one per step.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Positions are generated one step at a time for as long as they are
+        requested, so that callers which only need the first few steps of a
+        prediction pay only for those steps.
+        """
+
+        # Begin from the opponent's most recently observed state
+        (x, y) = self.other_position
+        h = self.other_heading
+        (speed, turn) = (self.other_speed, int(self.other_turn_speed))
+        (left, right) = (self.arena_left, self.arena_right)
+        (bottom, top) = (self.arena_bottom, self.arena_top)
+        intersections = self._game.intersections
+
+        while True:
+            # Turn (keeping the heading within (-180,180] degrees)
+            h = (h + turn + 179) % 360 - 179
+
+            # Move and bound coordinates to arena size
+            x = min(right, max(left, x + int(speed*COS[h])))
+            y = min(top, max(bottom, y - int(speed*SIN[h])))
+
+            # Move outside of any intersecting blocks
+            for b in intersections((x, y)):
+                (x, y) = self._push_out((x, y), b)
+
+            yield (x, y)
+    
+    #-------------------------------------------------------------------------
+
+    def intercept(self):
+        """TurtleParent.intercept() -> int
+        Returns the heading (deg) to fire at to intercept the opponent.
+
+        User visibility:
+            should call -- yes
+            should overwrite -- no
+
+        Rather than aiming at the opponent's current position, this leads the
+        target. The opponent's path is predicted (see other_trajectory()) and
+        the earliest predicted position that a missile fired from this
+        turtle's current position could reach in time is chosen as the aim
+        point. The returned heading is a value between -180 degrees and 180
+        degrees (as with heading_towards()), which can be used with
+        turn_towards() before shooting.
+
+        Returns None if there is no opponent, if the opponent is predicted to
+        stay out of missile range, or if a block lies in the missile's path to
+        the aim point.
+        """
+
+        if self._other == None:
+            return None
+
+        return self._query("intercept", self._intercept)
+    
+    #-------------------------------------------------------------------------
+
+    def _intercept(self):
+        """TurtleParent._intercept() -> int
+        Returns the heading (deg) to fire at to intercept the opponent.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        This is the uncached calculation behind intercept().
+        """
+
+        # A missile fired now moves for the first time at the start of the
+        # next step, and is then tested against the opponent's position at
+        # the end of the previous step, so after i moves it is compared with
+        # the i-th predicted position
+        spd = self.missile_speed
+        (x, y) = self.position
+        reach = 0 # distance travelled by the missile
+        for (px, py) in itertools.islice(self._predict_other(),
+                                         self._rules.missile_lifespan):
+            # Aim at the first position that a missile can reach in time
+            reach += spd
+            if reach*reach >= (px - x)**2 + (py - y)**2:
+                if self.line_of_sight((px, py)) == False:
+                    return None
+                return self.heading_towards((px, py))
+
+        return None
+    
+    #-------------------------------------------------------------------------
+
+    def is_safe(self, coord, steps_ahead=1):
+        """TurtleParent.is_safe(coord[, steps_ahead]) -> bool
+        Returns whether a coordinate is predicted to be safe from missiles.
+
+        User visibility:
+            should call -- yes
+            should overwrite -- no
+
+        Requires the following positional arguments:
+            coord (tuple (int, int)) -- position coordinates (px, px)
+
+        Accepts the following optional positional arguments:
+            steps_ahead (int) [1] -- number of steps ahead, where 1 means the
+                end of the current step (so is_safe(coord) tells whether it
+                is safe to move to the coordinate now)
+
+        Returns False if any missile in play could explode within reach of
+        the coordinate at that time, and True otherwise. Every missile may
+        explode anywhere along its path, including this turtle's own missiles
+        (and those of its teammates), which explode early if they pass close
+        to an enemy turtle.
+
+        The prediction is made on a coarse grid, so coordinates just outside
+        of a blast may be reported as unsafe, but never the other way around.
+        Missiles fired during the current step are not included. The grid is
+        shared by every turtle and built once per step, after which each
+        call costs only a lookup.
+        """
+
+        return self._game.threats().safe(coord, steps_ahead)
+    
+    #-------------------------------------------------------------------------
+    
+    def _query(self, name, method, *args):
+        """TurtleParent._query(name, method, *args) -> object
+        Returns the cached result of a query, calculating it if needed.
+
+        User visibility:
+            should call -- no
+            should overwrite -- no
+
+        Requires the following positional arguments:
+            name (str) -- query name
+            method (function) -- uncached query method
+
+        Any further arguments are passed to the query method, after any
+        defaults (such as the opponent's position) have been filled in.
+
+        Query results depend only on their arguments and on this turtle's
+        position and heading, so each result is cached until the turtle next
+        moves or turns, or until its next step begins. Queries with arguments
+        that cannot be used as dictionary keys (such as lists) are calculated
+        without caching.
+        """
+
+        key = (name,) + args
+        try:
+            value = self._queries.get(key, _MISSING)
+        except TypeError:
+            return method(*args)
+        if value is _MISSING:
+            value = self._queries[key] = method(*args)
+        return value
     
     #-------------------------------------------------------------------------
     
@@ -0,0 +1,390 @@
+"""Defines a columnar file format for per-step match telemetry.
+
+Telemetry files hold one row for every surviving turtle in every step of
+every recorded match, with the following columns:
+    step (I) -- game iteration
+    player (B) -- player index
+    x, y (d) -- turtle coordinates (px)
+    heading (h) -- turtle heading (degrees)
+    health (h) -- turtle health
+    cooldown (h) -- turtle shooting cooldown (steps)
+    missiles (H) -- number of missiles the turtle has in flight
+
+The letters give each column's array module type code. Each recorded match
+is appended as a row group, in which every column is stored as a separate
+zlib-compressed chunk of little-endian values. Each row group is followed
+by a JSON footer indexing the position of each of its chunks, along with its
+row count and match details, so that readers can load single columns of
+single matches without reading the rest of the file.
+
+The file is laid out as follows:
+    magic number
+    column chunks of row group 0, JSON footer 0, tail 0
+    column chunks of row group 1, JSON footer 1, tail 1
+    ...
+where each tail holds the footer length (8 bytes, little-endian) and magic
+number, and each footer also holds the position of the previous tail, so
+readers find every row group by following footers back from the end.
+
+Appending a row group only ever writes past the end of the last tail, and
+never changes what is already in the file. If a process dies partway
+through an append, readers (and the next append) skip back to the last
+intact tail, so only the match being written is lost.
+"""
+
+import array
+import json
+import os
+import struct
+import sys
+import zlib
+
+#=============================================================================
+
+# File constants
+_MAGIC = b"CTTL"
+_VERSION = 1
+_TAIL = struct.Struct("<Q4s") # footer length, magic
+_BLOCK = 1 << 16 # size of the blocks searched for the last intact tail
+
+# Column names and array type codes, in order
+COLUMNS = [("step", "I"), ("player", "B"), ("x", "d"), ("y", "d"),
+           ("heading", "h"), ("health", "h"), ("cooldown", "h"),
+           ("missiles", "H")]
+
+#=============================================================================
+
+class MatchRecorder:
+    """Match telemetry recorder class.
+
+    Collects the telemetry columns of a single match in memory, one sample
+    per step, ready to be appended to a telemetry file as a row group.
+
+    The following public methods can be used to record a match:
+        sample(game) -- adds a row for each surviving turtle
+        play(game) -- plays a headless game to the end, sampling each step
+    """
+
+    #=========================================================================
+
+    def __init__(self):
+        """MatchRecorder() -> MatchRecorder
+        Match telemetry recorder constructor.
+        """
+
+        self.columns = {name: array.array(code) for (name, code) in COLUMNS}
+
+    #-------------------------------------------------------------------------
+
+    def __len__(self):
+        """len(MatchRecorder) -> int
+        Returns the number of rows recorded.
+        """
+
+        return len(self.columns["step"])
+
+    #-------------------------------------------------------------------------
+
+    def sample(self, game):
+        """MatchRecorder.sample(game) -> None
+        Adds a row for each surviving turtle in the game's current state.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- game to sample
+        """
+
+        c = self.columns
+        for i in range(len(game._players)):
+            t = game._players[i]
+            if t == None or t.health <= 0:
+                continue
+            c["step"].append(game.iteration)
+            c["player"].append(i)
+            c["x"].append(t.x)
+            c["y"].append(t.y)
+            c["heading"].append(t.heading)
+            c["health"].append(t.health)
+            c["cooldown"].append(t.cooldown)
+            c["missiles"].append(len(t._missiles))
+
+    #-------------------------------------------------------------------------
+
+    def play(self, game):
+        """MatchRecorder.play(game) -> None
+        Plays a headless game to the end, sampling its starting state and the
+        state after every step.
+        """
+
+        self.sample(game)
+        while game.over == False:
+            game._step()
+            self.sample(game)
+
+#=============================================================================
+
+class TelemetryWriter:
+    """Telemetry file writer class.
+
+    Appends recorded matches to a telemetry file as row groups. The file is
+    created if it does not exist.
+
+    The following public methods can be used to write to the file:
+        append(recorder[, meta]) -- appends a recorded match
+        record(game[, meta]) -- plays and records a headless game, and then
+            appends it
+    """
+
+    #=========================================================================
+
+    def __init__(self, path, level=6):
+        """TelemetryWriter(path[, level]) -> TelemetryWriter
+        Telemetry file writer constructor.
+
+        Requires the following positional arguments:
+            path (str) -- telemetry file path
+
+        Accepts the following optional keyword arguments:
+            level (int) [6] -- zlib compression level
+        """
+
+        self.path = path
+        self.level = level
+
+    #-------------------------------------------------------------------------
+
+    def append(self, recorder, meta=None):
+        """TelemetryWriter.append(recorder[, meta]) -> None
+        Appends a recorded match to the file as a new row group.
+
+        Requires the following positional arguments:
+            recorder (MatchRecorder) -- recorded match
+
+        Accepts the following optional keyword arguments:
+            meta (dict) [None] -- JSON-serializable details of the match
+                (such as its players and arena), stored in the footer
+        """
+
+        # Open the file, or start a new one
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            mode = "r+b"
+        else:
+            mode = "wb"
+
+        with open(self.path, mode) as f:
+            # Find the end of the last intact tail (only the last footer is
+            # read, so appending takes the same time however long the file)
+            if mode == "wb":
+                f.write(_MAGIC)
+                prev = None
+            else:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError("not a Combat Turtles telemetry file")
+                prev = _last_tail(f)
+                f.seek(len(_MAGIC) if prev == None else prev)
+
+            # Write each column chunk after the last tail
+            chunks = {}
+            for (name, code) in COLUMNS:
+                values = recorder.columns[name]
+                if sys.byteorder != "little":
+                    values = array.array(code, values)
+                    values.byteswap()
+                data = zlib.compress(values.tobytes(), self.level)
+                chunks[name] = [f.tell(), len(data)]
+                f.write(data)
+
+            # Write the row group's footer and tail
+            footer = {"version": _VERSION, "columns": COLUMNS, "prev": prev,
+                      "row_groups": [{"rows": len(recorder),
+                                      "chunks": chunks,
+                                      "meta": meta or {}}]}
+            data = json.dumps(footer).encode("utf-8")
+            f.write(data)
+            f.write(_TAIL.pack(len(data), _MAGIC))
+            f.truncate()
+
+    #-------------------------------------------------------------------------
+
+    def record(self, game, meta=None):
+        """TelemetryWriter.record(game[, meta]) -> None
+        Plays and records a headless game, and then appends it to the file.
+        """
+
+        recorder = MatchRecorder()
+        recorder.play(game)
+        self.append(recorder, meta)
+
+#=============================================================================
+
+class TelemetryReader:
+    """Telemetry file reader class.
+
+    Reads the columns of a telemetry file lazily. Opening a file only reads
+    its footer, and each column chunk is read and decompressed only when it
+    is requested.
+
+    The following public attributes and methods can be used to read the
+    file:
+        row_groups -- list of the row count and match details of each row
+            group, in the form {"rows": ..., "meta": ...}
+        column(name, group) -- returns one column of one row group
+        columns(names, group) -- returns several columns of one row group
+        scan(name) -- yields one column of each row group in turn
+    """
+
+    #=========================================================================
+
+    def __init__(self, path):
+        """TelemetryReader(path) -> TelemetryReader
+        Telemetry file reader constructor.
+
+        Requires the following positional arguments:
+            path (str) -- telemetry file path
+        """
+
+        self.path = path
+        (self._footer, _) = _read_footer(path)
+        self._codes = dict((name, code) for (name, code)
+                           in self._footer["columns"])
+        self.row_groups = [{"rows": g["rows"], "meta": g["meta"]}
+                           for g in self._footer["row_groups"]]
+
+    #-------------------------------------------------------------------------
+
+    def __len__(self):
+        """len(TelemetryReader) -> int
+        Returns the number of row groups (matches) in the file.
+        """
+
+        return len(self.row_groups)
+
+    #-------------------------------------------------------------------------
+
+    def column(self, name, group):
+        """TelemetryReader.column(name, group) -> array.array
+        Returns one column of one row group.
+
+        Requires the following positional arguments:
+            name (str) -- column name
+            group (int) -- row group index
+        """
+
+        (offset, length) = self._footer["row_groups"][group]["chunks"][name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(length))
+        values = array.array(self._codes[name])
+        values.frombytes(data)
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    #-------------------------------------------------------------------------
+
+    def columns(self, names, group):
+        """TelemetryReader.columns(names, group) -> dict
+        Returns several columns of one row group, keyed by name.
+        """
+
+        return {name: self.column(name, group) for name in names}
+
+    #-------------------------------------------------------------------------
+
+    def scan(self, name):
+        """TelemetryReader.scan(name) -> generator
+        Yields one column of each row group in turn.
+
+        Only one row group's column is held in memory at a time, so entire
+        tournaments can be scanned without loading them all at once.
+        """
+
+        for group in range(len(self.row_groups)):
+            yield self.column(name, group)
+
+#=============================================================================
+
+def _read_footer(path):
+    """_read_footer(path) -> tuple
+    Reads the footers of a telemetry file.
+
+    Returns a tuple of the form (footer, end), where footer combines the row
+    groups of every footer in the file (in order) and end is the position
+    just after the last intact tail. If the first append to the file never
+    finished, there are no row groups and end is None. Raises ValueError if
+    the file is not a telemetry file.
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("not a Combat Turtles telemetry file")
+        end = _last_tail(f)
+        if end == None:
+            return ({"version": _VERSION, "columns": COLUMNS,
+                     "row_groups": []}, None)
+
+        # Follow the footers back to the start of the file
+        groups = []
+        pos = end
+        while pos != None:
+            footer = _footer_at(f, pos)
+            if footer == None:
+                raise ValueError("telemetry file footer is missing")
+            groups[:0] = footer["row_groups"]
+            pos = footer["prev"]
+    return ({"version": footer["version"], "columns": footer["columns"],
+             "row_groups": groups}, end)
+
+#-----------------------------------------------------------------------------
+
+def _last_tail(f):
+    """_last_tail(f) -> int
+    Returns the position just after the last intact tail of an open file.
+
+    If the file ends partway through an append, the file is searched
+    backwards (one block at a time) for the previous intact tail. Returns
+    None if there is none.
+    """
+
+    end = f.seek(0, os.SEEK_END)
+    if _footer_at(f, end) != None:
+        return end
+
+    # Search one block at a time, with consecutive blocks overlapping so that
+    # a magic number split between them is still found
+    stop = end
+    while stop > len(_MAGIC):
+        start = max(0, stop - _BLOCK)
+        f.seek(start)
+        data = f.read(stop - start)
+        pos = data.rfind(_MAGIC)
+        while pos >= 0 and start + pos > 0:
+            if _footer_at(f, start + pos + len(_MAGIC)) != None:
+                return start + pos + len(_MAGIC)
+            pos = data.rfind(_MAGIC, 0, pos)
+        stop = start + len(_MAGIC) - 1
+    return None
+
+#-----------------------------------------------------------------------------
+
+def _footer_at(f, end):
+    """_footer_at(f, end) -> dict
+    Reads the footer whose tail ends at a given position of an open file.
+
+    Returns None if no intact footer ends at that position.
+    """
+
+    if end < len(_MAGIC) + _TAIL.size:
+        return None
+    f.seek(end - _TAIL.size)
+    (length, magic) = _TAIL.unpack(f.read(_TAIL.size))
+    if magic != _MAGIC or length > end - _TAIL.size - len(_MAGIC):
+        return None
+    f.seek(end - _TAIL.size - length)
+    try:
+        footer = json.loads(f.read(length).decode("utf-8"))
+    except ValueError:
+        return None
+    if (type(footer) != dict or "row_groups" not in footer or
+        "prev" not in footer):
+        return None
+    return footer
@@ -0,0 +1,226 @@
+"""Defines game state snapshots and a rewindable game timeline.
+
+A snapshot captures everything needed to resume a game from a given step:
+the state of every turtle (including any attributes defined by its AI), the
+state of every missile in flight, the game's progress, and the state of the
+random module's generator (which several AIs use). Drawing objects such as
+canvas items are not captured, and are simply redrawn after a restore.
+
+Since games are deterministic, a game can be returned to any earlier step by
+restoring the nearest earlier snapshot and simulating forward again. The one
+exception is KeyboardTurtle, whose moves come from key presses that are not
+recorded.
+"""
+
+import collections
+import copy
+import random
+from .obj.missile import Missile
+
+#=============================================================================
+
+# Turtle attributes which are not part of a snapshot
+_TURTLE_SKIP = ("_sprite", "_missiles", "_queries")
+
+# Missile attributes which are not part of a snapshot
+_MISSILE_SKIP = ("sprite", "trail")
+
+# Snapshot of a game's state, as returned by capture()
+Snapshot = collections.namedtuple("Snapshot", ["iteration", "game", "alive",
+                                               "turtles", "missiles", "rng"])
+
+#=============================================================================
+
+def _shared(game):
+    """_shared(game) -> dict
+    Returns a deepcopy memo that leaves a game's shared objects uncopied.
+
+    The game object, its attributes (such as its canvas, arena, and event
+    stream), and its turtles are shared by all snapshots, so any references
+    to them within a turtle or missile are kept as references.
+    """
+
+    memo = {id(game): game}
+    for value in game.__dict__.values():
+        memo[id(value)] = value
+    for t in game._turtles:
+        memo[id(t)] = t
+    return memo
+
+#-----------------------------------------------------------------------------
+
+def capture(game):
+    """capture(game) -> Snapshot
+    Captures the current state of a game.
+
+    Requires the following positional arguments:
+        game (TurtleCombatGame) -- game to capture
+    """
+
+    memo = _shared(game)
+    turtles = [copy.deepcopy({k: v for (k, v) in t.__dict__.items()
+                              if k not in _TURTLE_SKIP}, memo)
+               for t in game._turtles]
+    missiles = [[copy.deepcopy({k: v for (k, v) in m.__dict__.items()
+                                if k not in _MISSILE_SKIP}, memo)
+                 for m in t._missiles] for t in game._turtles]
+    return Snapshot(game.iteration, (game.winner, game.over, game._timeout),
+                    list(game._alive), turtles, missiles, random.getstate())
+
+#-----------------------------------------------------------------------------
+
+def restore(game, snapshot):
+    """restore(game, snapshot) -> None
+    Returns a game to the state captured by a snapshot.
+
+    Requires the following positional arguments:
+        game (TurtleCombatGame) -- game to restore (the same game that the
+            snapshot was captured from)
+        snapshot (Snapshot) -- snapshot to restore
+
+    The snapshot itself is left unchanged, so it can be restored again. The
+    game is not redrawn here.
+    """
+
+    memo = _shared(game)
+    for i in range(len(game._turtles)):
+        t = game._turtles[i]
+        t.__dict__.update(copy.deepcopy(snapshot.turtles[i], memo))
+        t._queries = {}
+
+        # Replace the turtle's missiles (old sprites are deleted along with
+        # the old missile objects)
+        missiles = []
+        for state in snapshot.missiles[i]:
+            m = Missile.__new__(Missile)
+            m.__dict__.update(copy.deepcopy(state, memo))
+            missiles.append(m)
+        t._missiles = missiles
+
+    game.iteration = snapshot.iteration
+    (game.winner, game.over, game._timeout) = snapshot.game
+    game._alive = list(snapshot.alive)
+    game._update_hash()
+    game._threats = None
+    random.setstate(snapshot.rng)
+
+#=============================================================================
+
+class Timeline:
+    """Rewindable game timeline class.
+
+    Records snapshots of a game every few steps as it is played, so that the
+    game can later be returned to any earlier step (see seek()).
+
+    Snapshots are kept in least recently used order, and once the capacity
+    is reached the least recently used snapshot is discarded. The snapshot of
+    the game's starting state is always kept, so every step remains
+    reachable, although returning to a step long after the nearest remaining
+    snapshot may require simulating many steps.
+
+    Events emitted while simulating steps that have already been played once
+    are not delivered, so event sinks see each step's events only once.
+
+    The following public methods can be used to navigate the timeline:
+        record() -- captures a snapshot if one is due (call after each step)
+        seek(iteration) -- returns the game to a given step
+        back([steps]) -- returns the game to an earlier step
+    """
+
+    #=========================================================================
+
+    def __init__(self, game, every=50, capacity=64):
+        """Timeline(game, [every], [capacity]) -> Timeline
+        Rewindable game timeline constructor.
+
+        Requires the following positional arguments:
+            game (TurtleCombatGame) -- game to record (which should not have
+                begun yet)
+
+        Accepts the following optional keyword arguments:
+            every (int) [50] -- number of steps between snapshots
+            capacity (int) [64] -- maximum number of snapshots kept
+        """
+
+        self.game = game
+        self.every = max(1, every)
+        self.capacity = max(2, capacity)
+        self._snapshots = collections.OrderedDict() # snapshots by iteration
+        self._start = capture(game) # snapshot of the starting state
+        self._frontier = game.iteration # latest step ever simulated
+
+    #-------------------------------------------------------------------------
+
+    def __len__(self):
+        """len(Timeline) -> int
+        Returns the number of snapshots currently kept.
+        """
+
+        return len(self._snapshots) + 1
+
+    #-------------------------------------------------------------------------
+
+    def record(self):
+        """Timeline.record() -> None
+        Captures a snapshot of the game's current step, if one is due.
+        """
+
+        i = self.game.iteration
+        self._frontier = max(self._frontier, i)
+        if i % self.every != 0 or i in self._snapshots or i == 0:
+            return None
+        self._snapshots[i] = capture(self.game)
+        while len(self._snapshots) >= self.capacity:
+            self._snapshots.popitem(last=False)
+
+    #-------------------------------------------------------------------------
+
+    def seek(self, iteration):
+        """Timeline.seek(iteration) -> int
+        Returns the game to a given step.
+
+        Requires the following positional arguments:
+            iteration (int) -- step to seek (earlier or later than the
+                current step)
+
+        The game is restored from the latest snapshot at or before the given
+        step (if that is closer than the current step), and then simulated
+        forward. Seeking past the end of the game stops at the end. Returns
+        the step reached.
+        """
+
+        game = self.game
+        iteration = max(0, iteration)
+
+        # Restore the closest snapshot, unless the current step is closer
+        base = max([i for i in self._snapshots if i <= iteration],
+                   default=0)
+        if iteration < game.iteration or base > game.iteration:
+            if base == 0:
+                restore(game, self._start)
+            else:
+                self._snapshots.move_to_end(base)
+                restore(game, self._snapshots[base])
+
+        # Simulate forward (muting events for steps already played)
+        stream = game.events
+        while game.iteration < iteration and game.over == False:
+            subscribers = stream._subscribers
+            if game.iteration < self._frontier:
+                stream._subscribers = []
+            try:
+                game._step()
+            finally:
+                stream._subscribers = subscribers
+            self.record()
+
+        return game.iteration
+
+    #-------------------------------------------------------------------------
+
+    def back(self, steps=1):
+        """Timeline.back([steps]) -> int
+        Returns the game to an earlier step and returns the step reached.
+        """
+
+        return self.seek(self.game.iteration - steps)
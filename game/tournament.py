@@ -0,0 +1,290 @@
+"""Defines a successive-halving tournament scheduler for ranking many AIs.
+
+A full round robin of every AI against every other on every arena layout
+grows quadratically with the number of AIs. This scheduler instead plays the
+tournament in rounds. Each round pairs up the AIs still in contention at
+random, plays a few matches per pairing, and then eliminates any AI whose
+score is confidently below that of the leaders. Most of the matches are
+therefore spent separating the AIs near the top, and finding the best few of
+a large field costs a fraction of the full grid.
+
+For example, the following finds the top 4 of all AIs in the ai/ directory
+(other than the keyboard-controlled one):
+
+    import ai
+    import game.tournament as tm
+
+    names = ["ai." + m + ".CombatTurtle" for m in ai.__all__
+             if m != "keyboard"]
+    for s in tm.Tournament(names, keep=4).run():
+        print(s.name, s.rate, s.low, s.high)
+
+Each AI's score is its points rate, with 1 point for a win and 1/2 point for
+a tie, and is given along with a confidence interval (a Wilson score
+interval). An AI is eliminated once the upper bound of its interval falls
+below the lower bound of the keep-th best AI.
+"""
+
+import collections
+import math
+import random
+from .obj.arena import Arena
+from .sweep import WorkerPool, _play
+
+#=============================================================================
+
+# Tournament standing of a single AI, where rate is its points rate, low and
+# high are the bounds of its confidence interval, and eliminated is the round
+# in which it was eliminated (None if it was not)
+Standing = collections.namedtuple("Standing", ["name", "matches", "wins",
+                                               "ties", "losses", "rate",
+                                               "low", "high", "eliminated"])
+
+#=============================================================================
+
+def interval(points, matches, z=1.96):
+    """interval(points, matches[, z]) -> tuple
+    Returns a confidence interval for a points rate.
+
+    Requires the following positional arguments:
+        points (float) -- points scored (1 per win and 1/2 per tie)
+        matches (int) -- number of matches played
+
+    Accepts the following optional keyword arguments:
+        z (float) [1.96] -- number of standard deviations to cover (1.96 for
+            95% confidence)
+
+    Returns a (low, high) tuple bounding the true points rate, computed as a
+    Wilson score interval, which remains sensible for small numbers of
+    matches and for rates near 0 or 1. With no matches played the interval
+    is (0.0, 1.0).
+    """
+
+    if matches <= 0:
+        return (0.0, 1.0)
+    p = points/matches
+    zz = z*z/matches
+    center = (p + zz/2)/(1 + zz)
+    half = z*math.sqrt(p*(1 - p)/matches + zz/(4*matches))/(1 + zz)
+    # The interval always contains the observed rate (up to rounding error)
+    return (min(p, max(0.0, center - half)), max(p, min(1.0, center + half)))
+
+#=============================================================================
+
+class Tournament:
+    """Successive-halving tournament class.
+
+    Ranks a field of AIs using as few matches as possible (see the module
+    documentation). In each round the AIs still in contention are paired off
+    at random, and every pairing plays a fixed number of matches on randomly
+    chosen layouts (alternating sides). An AI left over from an odd field
+    sits the round out. As AIs are eliminated, the remaining matches are
+    played among the closely matched AIs near the top.
+
+    The tournament ends once no more than keep AIs remain in contention, or
+    once the maximum number of rounds has been played.
+
+    The following public attributes and methods can be used to run the
+    tournament:
+        matches -- total number of matches played so far
+        run() -- plays the tournament and returns the final standings
+    """
+
+    #=========================================================================
+
+    def __init__(self, entrants, keep=8, layouts=None, games=2,
+                 max_rounds=50, min_matches=6, z=1.96, cutoff=3000,
+                 rules=None, processes=None, seed=0, pool=None):
+        """Tournament(entrants, [keep], [layouts], [games], [max_rounds],
+        [min_matches], [z], [cutoff], [rules], [processes], [seed], [pool])
+        -> Tournament
+        Successive-halving tournament constructor.
+
+        Requires the following positional arguments:
+            entrants (list) -- Combat Turtle AI classes (or their full class
+                names)
+
+        Accepts the following optional keyword arguments:
+            keep (int) [8] -- number of top AIs to find
+            layouts (list (int)) [None] -- arena layout IDs to play on (None
+                for all layouts)
+            games (int) [2] -- number of matches per pairing in each round
+            max_rounds (int) [50] -- maximum number of rounds
+            min_matches (int) [6] -- number of matches that every AI plays
+                before it can be eliminated
+            z (float) [1.96] -- width of the confidence intervals (see
+                interval())
+            cutoff (int) [3000] -- game time cutoff of each match
+            rules (Rules) [None] -- rules of the game (see game.rules)
+            processes (int) [None] -- number of worker processes (None for
+                one per CPU, or 0 to play every match in this process)
+            seed (int) [0] -- random seed of the pairings and matches
+            pool (WorkerPool) [None] -- worker pool to play the matches in
+                (see game.sweep; None to start one for the tournament, in
+                which case processes gives its size)
+        """
+
+        self.entrants = list(entrants)
+        self.keep = keep
+        if layouts == None:
+            layouts = list(range(len(Arena.get_names())))
+        self.layouts = list(layouts)
+        self.games = games
+        self.max_rounds = max_rounds
+        self.min_matches = min_matches
+        self.z = z
+        self.cutoff = cutoff
+        self.rules = rules
+        self.processes = processes
+        self.pool = pool
+        self.matches = 0 # number of matches played
+
+        self._rng = random.Random(seed)
+        n = len(self.entrants)
+        self._record = [[0, 0, 0] for i in range(n)] # wins, ties, losses
+        self._eliminated = [None for i in range(n)] # round of elimination
+
+    #-------------------------------------------------------------------------
+
+    def _rate(self, i):
+        """Tournament._rate(i) -> float
+        Returns the points rate of an entrant (0.5 before any matches).
+        """
+
+        (w, t, l) = self._record[i]
+        if w + t + l == 0:
+            return 0.5
+        return (w + t/2)/(w + t + l)
+
+    #-------------------------------------------------------------------------
+
+    def _interval(self, i):
+        """Tournament._interval(i) -> tuple
+        Returns the confidence interval of an entrant's points rate.
+        """
+
+        (w, t, l) = self._record[i]
+        return interval(w + t/2, w + t + l, self.z)
+
+    #-------------------------------------------------------------------------
+
+    def _pairings(self, active):
+        """Tournament._pairings(active) -> list
+        Pairs off the active entrants at random.
+
+        Random pairings make each entrant's points rate an estimate of its
+        chances against the field still in contention, so rates remain
+        comparable between entrants. If there is an odd number of entrants
+        then the one that has played the most matches sits out.
+        """
+
+        order = list(active)
+        self._rng.shuffle(order)
+        order.sort(key=lambda i: sum(self._record[i]))
+        return [(order[k], order[k+1]) for k in range(0, len(order) - 1, 2)]
+
+    #-------------------------------------------------------------------------
+
+    def _tasks(self, pairs):
+        """Tournament._tasks(pairs) -> list
+        Returns the match tasks for a round's pairings.
+
+        Each task is indexed by the position of its pairing in the list, and
+        plays the pairing's first entrant against its second.
+        """
+
+        tasks = []
+        for k in range(len(pairs)):
+            (i, j) = pairs[k]
+            for g in range(self.games):
+                tasks.append((k, (self.entrants[i], {}, self.entrants[j],
+                                  self._rng.choice(self.layouts),
+                                  self._rng.getrandbits(31), g % 2,
+                                  self.cutoff, self.rules)))
+        return tasks
+
+    #-------------------------------------------------------------------------
+
+    def _eliminate(self, active, round):
+        """Tournament._eliminate(active, round) -> None
+        Eliminates entrants which are confidently behind the leaders.
+
+        An entrant which has played enough matches is eliminated if the upper
+        bound of its interval is below the keep-th highest lower bound among
+        the active entrants. No more entrants are eliminated than would bring
+        the field below keep.
+        """
+
+        if len(active) <= self.keep:
+            return None
+        lows = sorted((self._interval(i)[0] for i in active), reverse=True)
+        bar = lows[self.keep - 1]
+        losers = [i for i in active
+                  if sum(self._record[i]) >= self.min_matches and
+                  self._interval(i)[1] < bar]
+        losers.sort(key=lambda i: self._interval(i)[1])
+        for i in losers[:len(active) - self.keep]:
+            active.remove(i)
+            self._eliminated[i] = round
+
+    #-------------------------------------------------------------------------
+
+    def run(self):
+        """Tournament.run() -> list
+        Plays the tournament and returns the final standings.
+
+        Returns a list of Standing records for all entrants, with the AIs
+        still in contention first (ordered by points rate) followed by the
+        eliminated AIs (ordered by how long they lasted, then by points
+        rate).
+        """
+
+        active = list(range(len(self.entrants))) # entrants in contention
+
+        pool = self.pool
+        if pool == None and self.processes != 0:
+            pool = WorkerPool(self.entrants, self.processes)
+        try:
+            for r in range(self.max_rounds):
+                if len(active) <= self.keep:
+                    break
+                pairs = self._pairings(active)
+                tasks = self._tasks(pairs)
+                if pool == None:
+                    results = map(_play, tasks)
+                else:
+                    results = pool.play(tasks)
+                for (k, outcome) in results:
+                    (i, j) = pairs[k]
+                    self._record[i][1 - outcome.result] += 1
+                    self._record[j][1 + outcome.result] += 1
+                    self.matches += 1
+                self._eliminate(active, r)
+        finally:
+            if pool != None and pool != self.pool:
+                pool.close()
+
+        return self._standings()
+
+    #-------------------------------------------------------------------------
+
+    def _standings(self):
+        """Tournament._standings() -> list
+        Returns the current standings of all entrants (see run()).
+        """
+
+        standings = []
+        for i in range(len(self.entrants)):
+            (w, t, l) = self._record[i]
+            (low, high) = self._interval(i)
+            name = self.entrants[i]
+            if type(name) != str:
+                name = name.__module__ + "." + name.__name__
+            standings.append(Standing(name, w + t + l, w, t, l,
+                                      self._rate(i), low, high,
+                                      self._eliminated[i]))
+        standings.sort(key=lambda s: (s.eliminated == None,
+                                      -1 if s.eliminated == None
+                                      else s.eliminated, s.rate),
+                       reverse=True)
+        return standings
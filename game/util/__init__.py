@@ -1 +1,5 @@
 from . import angles
+from . import visibility
+from . import spatial
+from . import trig
+from . import threat
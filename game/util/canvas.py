@@ -0,0 +1,136 @@
+"""Defines a scaled drawing wrapper for Tkinter canvases."""
+
+# Tkinter TclError class, once Tkinter has been loaded (until then an empty
+# tuple, which matches no exception)
+_tcl_error = ()
+
+class ScaledCanvas:
+    """Scaled canvas class.
+
+    Wraps a Tkinter Canvas so that everything drawn on it is scaled by a
+    constant factor. Game objects draw in arena coordinates as usual, and the
+    wrapper converts them to canvas coordinates, which allows an arena to be
+    shown at a reduced size (for example in a dashboard of several games)
+    without any changes to the drawing code of turtles, missiles, or blocks.
+
+    The item creation methods used by the game objects scale their
+    coordinates (and any text font size). All other attributes and methods
+    are passed through to the wrapped canvas unchanged.
+    """
+
+    #=========================================================================
+
+    def __init__(self, canvas, scale):
+        """ScaledCanvas(canvas, scale) -> ScaledCanvas
+        Scaled canvas constructor.
+
+        Requires the following positional arguments:
+            canvas (tkinter.Canvas) -- canvas to draw on
+            scale (float) -- ratio of canvas coordinates to arena coordinates
+        """
+
+        self.canvas = canvas
+        self.scale = scale
+
+    #-------------------------------------------------------------------------
+
+    def __getattr__(self, name):
+        """ScaledCanvas.__getattr__(name) -> object
+        Passes any other attribute lookups through to the wrapped canvas.
+        """
+
+        return getattr(self.canvas, name)
+
+    #-------------------------------------------------------------------------
+
+    def _scaled(self, coords):
+        """ScaledCanvas._scaled(coords) -> list
+        Scales the coordinate arguments of an item creation method.
+
+        Coordinates may be given either as separate arguments or as a single
+        flat list or tuple.
+        """
+
+        if len(coords) == 1 and type(coords[0]) in (list, tuple):
+            coords = coords[0]
+        return [c*self.scale for c in coords]
+
+    #-------------------------------------------------------------------------
+
+    def create_line(self, *coords, **options):
+        """ScaledCanvas.create_line(*coords, **options) -> int
+        Draws a scaled line and returns its item ID.
+        """
+
+        return self.canvas.create_line(self._scaled(coords), **options)
+
+    #-------------------------------------------------------------------------
+
+    def create_oval(self, *coords, **options):
+        """ScaledCanvas.create_oval(*coords, **options) -> int
+        Draws a scaled oval and returns its item ID.
+        """
+
+        return self.canvas.create_oval(self._scaled(coords), **options)
+
+    #-------------------------------------------------------------------------
+
+    def create_polygon(self, *coords, **options):
+        """ScaledCanvas.create_polygon(*coords, **options) -> int
+        Draws a scaled polygon and returns its item ID.
+        """
+
+        return self.canvas.create_polygon(self._scaled(coords), **options)
+
+    #-------------------------------------------------------------------------
+
+    def create_rectangle(self, *coords, **options):
+        """ScaledCanvas.create_rectangle(*coords, **options) -> int
+        Draws a scaled rectangle and returns its item ID.
+        """
+
+        return self.canvas.create_rectangle(self._scaled(coords), **options)
+
+    #-------------------------------------------------------------------------
+
+    def create_text(self, *coords, **options):
+        """ScaledCanvas.create_text(*coords, **options) -> int
+        Draws scaled text and returns its item ID.
+
+        If the font is given as a tuple, its size is scaled as well.
+        """
+
+        font = options.get("font")
+        if type(font) == tuple and len(font) >= 2:
+            size = max(1, int(round(font[1]*self.scale)))
+            options["font"] = (font[0], size) + font[2:]
+        return self.canvas.create_text(self._scaled(coords), **options)
+
+#=============================================================================
+
+def load_tkinter():
+    """load_tkinter() -> module
+    Imports and returns the Tkinter module.
+
+    Tkinter is only imported by the code that builds windows, so that headless
+    games (such as those played by worker processes) never need to load it.
+    """
+
+    global _tcl_error
+    import tkinter
+    _tcl_error = tkinter.TclError
+    return tkinter
+
+#-----------------------------------------------------------------------------
+
+def tcl_error():
+    """tcl_error() -> class
+    Returns the Tkinter TclError class.
+
+    Game objects catch TclError when drawing on a window that has already been
+    closed. A TclError can only occur once a window has been built, so until
+    Tkinter has been loaded (see load_tkinter()) an empty tuple, which matches
+    no exception, is returned instead.
+    """
+
+    return _tcl_error
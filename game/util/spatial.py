@@ -0,0 +1,202 @@
+"""Defines a uniform grid spatial hash for proximity queries."""
+
+import math
+
+class SpatialHash:
+    """Spatial hash class.
+
+    Buckets objects into the square cells of a uniform grid according to
+    their coordinates, so that proximity queries only need to look at the
+    objects in the handful of cells near the query point, rather than every
+    object in the game.
+
+    The hash is meant to be kept up to date incrementally. Moving an object
+    only touches the grid if the object has crossed into a different cell, so
+    updating every object once per step costs time linear in the number of
+    objects, and each query costs time proportional to the number of objects
+    in the few cells it covers.
+
+    The following public methods can be used to maintain and query the hash:
+        clear() -- removes all objects
+        insert(obj, coords) -- adds an object at a given coordinate
+        move(obj, coords) -- updates the coordinate of an object (adding it
+            if it is not already stored)
+        remove(obj) -- removes an object (if it is stored)
+        near(coords, radius) -- returns all objects which might lie within a
+            given distance of a coordinate
+        nearest(coords[, accept]) -- returns the closest object to a
+            coordinate (optionally only considering accepted objects)
+    """
+
+    #=========================================================================
+
+    def __init__(self, cell):
+        """SpatialHash(cell) -> SpatialHash
+        Spatial hash constructor.
+
+        Requires the following positional arguments:
+            cell (int) -- width and height of each grid cell (px)
+
+        Queries are cheapest when the cell size is close to the typical query
+        radius.
+        """
+
+        self.cell = cell
+        self._cells = {} # dictionaries of object coordinates by cell
+        self._where = {} # cell of each stored object
+
+    #-------------------------------------------------------------------------
+
+    def __len__(self):
+        """len(SpatialHash) -> int
+        Returns the number of objects stored in the hash.
+        """
+
+        return len(self._where)
+
+    #-------------------------------------------------------------------------
+
+    def _key(self, coords):
+        """SpatialHash._key(coords) -> tuple
+        Returns the grid cell containing a given coordinate.
+        """
+
+        return (int(coords[0]//self.cell), int(coords[1]//self.cell))
+
+    #-------------------------------------------------------------------------
+
+    def clear(self):
+        """SpatialHash.clear() -> None
+        Removes all objects from the hash.
+        """
+
+        self._cells.clear()
+        self._where.clear()
+
+    #-------------------------------------------------------------------------
+
+    def insert(self, obj, coords):
+        """SpatialHash.insert(obj, coords) -> None
+        Adds an object to the hash.
+
+        Requires the following positional arguments:
+            obj (object) -- object to store
+            coords (tuple (int, int)) -- coordinate of the object
+
+        Inserting an object which is already stored moves it instead.
+        """
+
+        self.move(obj, coords)
+
+    #-------------------------------------------------------------------------
+
+    def move(self, obj, coords):
+        """SpatialHash.move(obj, coords) -> None
+        Updates the stored coordinate of an object.
+
+        Requires the following positional arguments:
+            obj (object) -- object to update
+            coords (tuple (int, int)) -- new coordinate of the object
+
+        The object is only moved between cells if its cell has changed. If
+        the object is not already stored, it is added.
+        """
+
+        key = self._key(coords)
+        old = self._where.get(obj)
+        if old != key:
+            if old != None:
+                bucket = self._cells[old]
+                del bucket[obj]
+                if len(bucket) == 0:
+                    del self._cells[old]
+            self._where[obj] = key
+        self._cells.setdefault(key, {})[obj] = coords
+
+    #-------------------------------------------------------------------------
+
+    def remove(self, obj):
+        """SpatialHash.remove(obj) -> None
+        Removes an object from the hash.
+
+        Requires the following positional arguments:
+            obj (object) -- object to remove
+
+        Removing an object which is not stored does nothing.
+        """
+
+        key = self._where.pop(obj, None)
+        if key != None:
+            bucket = self._cells[key]
+            del bucket[obj]
+            if len(bucket) == 0:
+                del self._cells[key]
+
+    #-------------------------------------------------------------------------
+
+    def near(self, coords, radius):
+        """SpatialHash.near(coords, radius) -> list
+        Returns all objects which might lie within a distance of a coordinate.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to search around
+            radius (float) -- search radius (px)
+
+        This is a broad phase test. The returned list contains every object
+        stored within the given distance, but may also contain some objects
+        that are slightly further away, so callers should perform their own
+        exact distance test on the results.
+        """
+
+        (x0, y0) = self._key((coords[0] - radius, coords[1] - radius))
+        (x1, y1) = self._key((coords[0] + radius, coords[1] + radius))
+        out = []
+        for i in range(x0, x1+1):
+            for j in range(y0, y1+1):
+                bucket = self._cells.get((i, j))
+                if bucket != None:
+                    out.extend(bucket)
+        return out
+
+    #-------------------------------------------------------------------------
+
+    def nearest(self, coords, accept=None):
+        """SpatialHash.nearest(coords[, accept]) -> object
+        Returns the stored object closest to a given coordinate.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to search around
+
+        Accepts the following optional keyword arguments:
+            accept (function) [None] -- predicate which returns True for
+                objects that should be considered (all objects by default)
+
+        Cells are searched in rings of increasing size around the given
+        coordinate, stopping as soon as no unsearched cell could contain a
+        closer object. Returns None if no accepted object is stored.
+        """
+
+        if len(self._cells) == 0:
+            return None
+
+        # Determine how many rings are needed to cover every occupied cell
+        (cx, cy) = self._key(coords)
+        reach = max(max(abs(i - cx), abs(j - cy)) for (i, j) in self._cells)
+
+        best = None # closest accepted object so far
+        best_dist = math.inf # distance to closest accepted object
+        for ring in range(reach+1):
+            # Every cell in this ring is at least (ring-1) cells away
+            if (ring - 1)*self.cell >= best_dist:
+                break
+            for i in range(cx-ring, cx+ring+1):
+                for j in range(cy-ring, cy+ring+1):
+                    if max(abs(i - cx), abs(j - cy)) != ring:
+                        continue
+                    for (obj, pos) in self._cells.get((i, j), {}).items():
+                        if accept != None and accept(obj) == False:
+                            continue
+                        d = math.hypot(pos[0] - coords[0], pos[1] - coords[1])
+                        if d < best_dist:
+                            (best, best_dist) = (obj, d)
+        return best
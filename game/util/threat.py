@@ -0,0 +1,109 @@
+"""Defines a coarse grid of predicted missile danger for dodging queries."""
+
+import math
+
+class ThreatMap:
+    """Missile threat map class.
+
+    Discretizes the arena into square cells and records, for each cell, the
+    upcoming steps during which a missile explosion could reach some part of
+    the cell. The record for each cell is a bitmask with one bit per step
+    ahead, so that a query only needs to look up a single cell.
+
+    Threats are added as predicted missile paths (see add()), and the map is
+    meant to be rebuilt every step. The map is conservative: a cell is marked
+    for a step if any point of the cell lies within the blast radius of the
+    missile's predicted position, so a coordinate reported as safe is always
+    out of reach of the predicted blasts, while coordinates near the edge of
+    a blast may be reported as unsafe.
+
+    The following public methods can be used to build and query the map:
+        add(path, radius[, last]) -- marks the blasts along a missile path
+        safe(coords[, steps]) -- returns whether a coordinate is safe a given
+            number of steps ahead
+    """
+
+    #=========================================================================
+
+    def __init__(self, size, cell=20):
+        """ThreatMap(size, [cell]) -> ThreatMap
+        Threat map constructor.
+
+        Requires the following positional arguments:
+            size (tuple (int, int)) -- arena width/height (px)
+
+        Accepts the following optional keyword arguments:
+            cell (int) [20] -- width and height of each cell (px)
+        """
+
+        self.size = size
+        self.cell_size = cell
+        self._cols = int(math.ceil(size[0]/cell)) # number of cell columns
+        self._rows = int(math.ceil(size[1]/cell)) # number of cell rows
+        self._cells = [0]*(self._cols*self._rows) # danger bitmask of cells
+
+    #-------------------------------------------------------------------------
+
+    def add(self, path, radius, last=False):
+        """ThreatMap.add(path, radius[, last]) -> None
+        Marks the blasts that could occur along a missile's predicted path.
+
+        Requires the following positional arguments:
+            path (list (tuple (float, float))) -- predicted missile positions,
+                one for each step ahead (beginning with 1 step ahead)
+            radius (float) -- blast radius (px)
+
+        Accepts the following optional keyword arguments:
+            last (bool) [False] -- whether to mark only the blast at the end
+                of the path (for missiles which can only explode there), or
+                otherwise a blast at every step of the path
+        """
+
+        first = max(0, len(path) - 1) if last == True else 0
+        for i in range(first, len(path)):
+            self._mark(path[i], radius, 1 << i)
+
+    #-------------------------------------------------------------------------
+
+    def _mark(self, coords, radius, bit):
+        """ThreatMap._mark(coords, radius, bit) -> None
+        Marks every cell that a blast reaches with a given bit.
+
+        Each row of cells within reach of the blast is marked between the
+        left and right edges of the blast at the row's closest point to the
+        blast center.
+        """
+
+        (x, y) = coords
+        c = self.cell_size
+        cols = self._cols
+        cells = self._cells
+        for row in range(max(0, int((y - radius)//c)),
+                         min(self._rows - 1, int((y + radius)//c)) + 1):
+            # Find the nearest vertical distance from the row to the center
+            dy = max(0, row*c - y, y - (row + 1)*c)
+            dx = math.sqrt(max(0, radius*radius - dy*dy))
+            start = row*cols
+            for col in range(max(0, int((x - dx)//c)),
+                             min(cols - 1, int((x + dx)//c)) + 1):
+                cells[start + col] |= bit
+
+    #-------------------------------------------------------------------------
+
+    def safe(self, coords, steps=1):
+        """ThreatMap.safe(coords, [steps]) -> bool
+        Returns whether a coordinate is out of reach of all predicted blasts.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to test (coordinates
+                outside of the arena are treated as the nearest cell)
+
+        Accepts the following optional keyword arguments:
+            steps (int) [1] -- number of steps ahead
+        """
+
+        if steps < 1:
+            return True
+        col = min(self._cols - 1, max(0, int(coords[0]//self.cell_size)))
+        row = min(self._rows - 1, max(0, int(coords[1]//self.cell_size)))
+        return (self._cells[row*self._cols + col] >> (steps - 1)) & 1 == 0
@@ -0,0 +1,51 @@
+"""Defines fast sine and cosine lookups for angles in degrees.
+
+Turtle and missile headings are always integers in (-180,180], so the sines
+and cosines of those angles are precomputed once, when this module is first
+imported, and give exactly the same results as math.cos(math.radians(h)) and
+math.sin(math.radians(h)).
+
+The tables can be used in two ways:
+    COS[h], SIN[h] -- dictionaries keyed by heading, which are the fastest
+        option when the angle is known to be a heading (such as self.heading)
+    cos_deg(angle), sin_deg(angle) -- functions which accept any angle,
+        using the tables when possible and calculating the result otherwise
+"""
+
+import math
+
+#=============================================================================
+
+# Cosine and sine of each integer heading in (-180,180]
+COS = {h: math.cos(math.radians(h)) for h in range(-179, 181)}
+SIN = {h: math.sin(math.radians(h)) for h in range(-179, 181)}
+
+#=============================================================================
+
+def cos_deg(angle):
+    """cos_deg(angle) -> float
+    Returns the cosine of an angle (deg).
+
+    Requires the following positional arguments:
+        angle (int or float) -- angle (deg)
+    """
+
+    try:
+        return COS[angle]
+    except KeyError:
+        return math.cos(math.radians(angle))
+
+#-----------------------------------------------------------------------------
+
+def sin_deg(angle):
+    """sin_deg(angle) -> float
+    Returns the sine of an angle (deg).
+
+    Requires the following positional arguments:
+        angle (int or float) -- angle (deg)
+    """
+
+    try:
+        return SIN[angle]
+    except KeyError:
+        return math.sin(math.radians(angle))
@@ -0,0 +1,545 @@
+"""Defines a precomputed line of sight lookup table for arena layouts."""
+
+import hashlib
+import math
+import os
+import os.path
+import tempfile
+
+class VisibilityTable:
+    """Visibility lookup table class.
+
+    Discretizes the arena into square cells and stores cell-to-cell
+    visibility as three compact bitsets, each containing one bit for every
+    ordered pair of cells:
+        clear -- set if every point of the first cell is certain to have line
+            of sight to every point of the second cell
+        blocked -- set if no point of the first cell can have line of sight to
+            any point of the second cell
+        sight -- set if the centers of the two cells can see each other
+
+    The clear bitset is conservative. A pair is only marked as clear if no
+    block comes within a safety margin of the straight path between the two
+    cells, and neither cell lies within that margin of the arena boundary.
+    This margin accounts for the sampling step and heading rounding used by
+    the exact line of sight test in TurtleParent, so whenever the table
+    reports a clear path the exact test would also have returned True.
+
+    The blocked bitset is conservative in the same way. A pair is only marked
+    as blocked if the exact test is certain to land a sample point inside a
+    block between every point of the two cells (see _certainly_blocked()).
+    Since the whole of both cells must be accounted for, this mostly catches
+    pairs on opposite sides of large blocks. Pairs in neither bitset are left
+    to sampled_sight(), which settles almost all of them for a single pair of
+    points, and then to the exact test.
+
+    The sight bitset is meant for coarse queries, such as a cover-seeking AI
+    looking for cells that cannot be seen from the opponent's position.
+
+    Building the table requires a pass over every pair of cells, so tables
+    are built once per layout and cached on disk, keyed by a hash of the
+    arena size and block coordinates.
+
+    The following public methods can be used to query the table:
+        cell(coords) -- returns the index of the cell containing a coordinate
+        cell_center(index) -- returns the center coordinates of a cell
+        clear(coords1, coords2) -- returns whether a pair of coordinates is
+            certain to have a clear line of sight
+        blocked(coords1, coords2) -- returns whether a pair of coordinates is
+            certain to have no line of sight
+        visible_cells(coords) -- returns the center coordinates of all cells
+            whose centers can see the center of a coordinate's cell
+    """
+
+    # File format version (increment to invalidate old cache files)
+    _version = 2
+
+    #=========================================================================
+
+    def __init__(self, size, blocks, spacing, samples=100, cell=40,
+                 cache_dir=None):
+        """VisibilityTable(size, blocks, spacing, [samples], [cell],
+        [cache_dir]) -> VisibilityTable
+        Visibility table constructor.
+
+        Requires the following positional arguments:
+            size (tuple (int, int)) -- arena width/height (px)
+            blocks (list (tuple (int, int, int, int))) -- list of block
+                boundaries, each given as (left, right, bottom, top)
+            spacing (int) -- distance between the sample points used by the
+                exact line of sight test (px)
+
+        Accepts the following optional keyword arguments:
+            samples (int) [100] -- maximum number of sample points tested by
+                the exact line of sight test
+            cell (int) [40] -- width and height of each cell (px)
+            cache_dir (str) [None] -- directory used to cache tables on disk
+                (defaults to a subdirectory of the system temp directory)
+
+        The table is loaded from the disk cache if a matching file exists, and
+        otherwise is built and then saved to the cache.
+        """
+
+        # Assign given attributes
+        self.size = size
+        self.cell_size = cell
+        self._blocks = [tuple(b) for b in blocks]
+        self._cols = int(math.ceil(size[0]/cell)) # number of cell columns
+        self._rows = int(math.ceil(size[1]/cell)) # number of cell rows
+        self._n = self._cols*self._rows # total number of cells
+        self._spacing = spacing
+
+        # The exact test only samples up to a maximum range, and its heading
+        # is truncated to an integer degree, so its sample points may stray
+        # from the straight path by up to one sample step along the path and
+        # about 1 degree across it
+        self._range = (samples - 5)*spacing # maximum trusted distance (px)
+        self._margin = (spacing + 1 +
+                        math.ceil(self._range*math.sin(math.radians(1))))
+
+        # Load the table from the disk cache, or build and cache it
+        if cache_dir == None:
+            cache_dir = os.path.join(tempfile.gettempdir(), "combat-turtles")
+        self._path = os.path.join(cache_dir, "los-" + self._key() + ".bin")
+        if self._load() == False:
+            self._build()
+            self._save()
+
+    #-------------------------------------------------------------------------
+
+    def _key(self):
+        """VisibilityTable._key() -> str
+        Returns a hash string identifying the table's layout and parameters.
+        """
+
+        key = repr((VisibilityTable._version, tuple(self.size),
+                    self.cell_size, self._range, self._margin,
+                    sorted(self._blocks)))
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    #-------------------------------------------------------------------------
+
+    def _load(self):
+        """VisibilityTable._load() -> bool
+        Attempts to load the table bitsets from the disk cache.
+
+        Returns True if the cache file exists and has the expected length,
+        and False otherwise.
+        """
+
+        nbytes = (self._n*self._n + 7)//8 # length of each bitset (bytes)
+        try:
+            with open(self._path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) != 3*nbytes:
+            return False
+        self._clear = bytearray(data[:nbytes])
+        self._blocked = bytearray(data[nbytes:2*nbytes])
+        self._sight = bytearray(data[2*nbytes:])
+        return True
+
+    #-------------------------------------------------------------------------
+
+    def _save(self):
+        """VisibilityTable._save() -> None
+        Writes the table bitsets to the disk cache.
+
+        The file is written under a temporary name and then moved into place,
+        so concurrent games never read a partially-written table. Failing to
+        write the cache is not an error, since the table can always be
+        rebuilt.
+        """
+
+        tmp = self._path + "." + str(os.getpid()) + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(self._clear)
+                f.write(self._blocked)
+                f.write(self._sight)
+            os.replace(tmp, self._path)
+        except OSError:
+            pass
+
+    #-------------------------------------------------------------------------
+
+    def _build(self):
+        """VisibilityTable._build() -> None
+        Builds all three bitsets by testing every pair of cells.
+        """
+
+        nbytes = (self._n*self._n + 7)//8
+        self._clear = bytearray(nbytes)
+        self._blocked = bytearray(nbytes)
+        self._sight = bytearray(nbytes)
+
+        # Blocks inflated by half a cell plus the safety margin (the convex
+        # hull of two equal cells is the path between their centers swept by
+        # one cell, so this reduces the cell-to-cell test to a segment test)
+        r = self.cell_size/2 + self._margin
+        inflated = [(b[0]-r, b[1]+r, b[2]-r, b[3]+r) for b in self._blocks]
+
+        # Determine which cells are far enough from the arena boundary
+        half = self.cell_size/2
+        centers = [self.cell_center(i) for i in range(self._n)]
+        interior = [(c[0]-half-self._margin >= 0 and
+                     c[0]+half+self._margin <= self.size[0] and
+                     c[1]-half-self._margin >= 0 and
+                     c[1]+half+self._margin <= self.size[1])
+                    for c in centers]
+
+        # Test each unordered pair once and set both ordered bits
+        reach = self._range - math.sqrt(2)*self.cell_size # max center gap
+        for i in range(self._n):
+            ci = centers[i]
+            for j in range(i, self._n):
+                cj = centers[j]
+                if not _segment_blocked(ci, cj, self._blocks):
+                    self._set(self._sight, i, j)
+                    if (interior[i] and interior[j] and
+                        math.hypot(cj[0]-ci[0], cj[1]-ci[1]) <= reach and
+                        not _segment_blocked(ci, cj, inflated)):
+                        self._set(self._clear, i, j)
+                else:
+                    # The blocked test depends on which end is the target
+                    for (k, a, b) in ((i*self._n + j, ci, cj),
+                                      (j*self._n + i, cj, ci)):
+                        if _certainly_blocked(a, b, self._blocks,
+                                              self._spacing, half):
+                            self._blocked[k >> 3] |= 1 << (k & 7)
+
+    #-------------------------------------------------------------------------
+
+    def _set(self, bits, i, j):
+        """VisibilityTable._set(bits, i, j) -> None
+        Sets the bits for both orderings of a pair of cells.
+        """
+
+        for k in (i*self._n + j, j*self._n + i):
+            bits[k >> 3] |= 1 << (k & 7)
+
+    #-------------------------------------------------------------------------
+
+    def _get(self, bits, i, j):
+        """VisibilityTable._get(bits, i, j) -> bool
+        Returns the bit for an ordered pair of cells.
+        """
+
+        k = i*self._n + j
+        return (bits[k >> 3] >> (k & 7)) & 1 == 1
+
+    #-------------------------------------------------------------------------
+
+    def cell(self, coords):
+        """VisibilityTable.cell(coords) -> int
+        Returns the index of the cell containing a given coordinate.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to locate
+
+        Returns None if the coordinate lies outside of the arena.
+        """
+
+        if (coords[0] < 0 or coords[0] > self.size[0] or
+            coords[1] < 0 or coords[1] > self.size[1]):
+            return None
+        col = min(int(coords[0]//self.cell_size), self._cols - 1)
+        row = min(int(coords[1]//self.cell_size), self._rows - 1)
+        return row*self._cols + col
+
+    #-------------------------------------------------------------------------
+
+    def cell_center(self, index):
+        """VisibilityTable.cell_center(index) -> tuple
+        Returns the center coordinates of a given cell.
+
+        Requires the following positional arguments:
+            index (int) -- cell index
+        """
+
+        (row, col) = divmod(index, self._cols)
+        return ((col + 0.5)*self.cell_size, (row + 0.5)*self.cell_size)
+
+    #-------------------------------------------------------------------------
+
+    def clear(self, coords1, coords2):
+        """VisibilityTable.clear(coords1, coords2) -> bool
+        Returns whether two coordinates are certain to have line of sight.
+
+        Requires the following positional arguments:
+            coords1 (tuple (int, int)) -- first coordinate
+            coords2 (tuple (int, int)) -- second coordinate
+
+        A return value of False means only that the table cannot vouch for
+        the pair, in which case the exact test should be used instead.
+        """
+
+        i = self.cell(coords1)
+        j = self.cell(coords2)
+        if i == None or j == None:
+            return False
+        return self._get(self._clear, i, j)
+
+    #-------------------------------------------------------------------------
+
+    def blocked(self, coords1, coords2):
+        """VisibilityTable.blocked(coords1, coords2) -> bool
+        Returns whether two coordinates are certain to have no line of sight.
+
+        Requires the following positional arguments:
+            coords1 (tuple (int, int)) -- first coordinate
+            coords2 (tuple (int, int)) -- second coordinate
+
+        A return value of False means only that the table cannot vouch for
+        the pair, in which case the exact test should be used instead.
+        """
+
+        i = self.cell(coords1)
+        j = self.cell(coords2)
+        if i == None or j == None:
+            return False
+        return self._get(self._blocked, i, j)
+
+    #-------------------------------------------------------------------------
+
+    def visible_cells(self, coords):
+        """VisibilityTable.visible_cells(coords) -> list
+        Returns the centers of all cells that can see a coordinate's cell.
+
+        Requires the following positional arguments:
+            coords (tuple (int, int)) -- coordinate to test
+
+        Visibility is measured between cell centers. Returns an empty list if
+        the coordinate lies outside of the arena.
+        """
+
+        i = self.cell(coords)
+        if i == None:
+            return []
+        return [self.cell_center(j) for j in range(self._n)
+                if self._get(self._sight, i, j)]
+
+#=============================================================================
+
+def sampled_sight(p, q, heading, rects, size, spacing, samples=100):
+    """sampled_sight(p, q, heading, rects, size, spacing, [samples]) -> bool
+    Returns the outcome of the exact line of sight test, without sampling.
+
+    Requires the following positional arguments:
+        p (tuple (int, int)) -- position of the viewer
+        q (tuple (int, int)) -- position of the target
+        heading (int) -- heading from the viewer towards the target (deg), as
+            returned by TurtleParent.heading_towards()
+        rects (list (tuple)) -- list of block boundaries, each given as
+            (left, right, bottom, top)
+        size (tuple (int, int)) -- arena width/height (px)
+        spacing (int) -- distance between the sample points used by the
+            exact line of sight test (px)
+
+    Accepts the following optional keyword arguments:
+        samples (int) [100] -- maximum number of sample points tested by the
+            exact line of sight test
+
+    The exact test in TurtleParent steps a sample point from the viewer along
+    the given heading until it either leaves free space (False), moves past
+    the target in either coordinate (True), or runs out of samples (False).
+    Since the sample points are evenly spaced along a line, the index of the
+    first one past the target and the range of indices inside each block can
+    be solved for directly, which is much faster than stepping through them.
+
+    Returns None if the answer depends on a sample point landing within
+    rounding error of a block edge, the arena boundary, or the target, in
+    which case the exact test should be used instead.
+    """
+
+    if p[0] == q[0] and p[1] == q[1]:
+        return True
+    rh = math.radians(heading)
+    step = (spacing*math.cos(rh), -spacing*math.sin(rh)) # sample step
+    eps = 1e-6 # rounding tolerance (px)
+
+    # Find the first sample that moves past the target
+    last = samples + 1
+    for (d, s, t) in zip(step, p, q):
+        if d == 0:
+            continue
+        if s == t:
+            # Any movement at all changes the sign of this coordinate
+            if abs(d) < eps:
+                return None
+            last = 1
+        else:
+            r = (t - s)/d
+            if r > 0 and r <= samples:
+                if abs(r - round(r))*abs(d) < eps:
+                    return None
+                last = min(last, math.ceil(r))
+    if last > samples:
+        return False
+
+    # Check the sample points up to that one for the arena boundary
+    for (d, s, hi) in zip(step, p, size):
+        for x in (s + d, s + last*d):
+            if x < -eps or x > hi + eps:
+                return False
+            if x < eps or x > hi - eps:
+                return None
+
+    # Check for a sample point inside any block, after skipping any block
+    # that lies entirely to one side of the sample points' bounding box
+    (x0, x1) = sorted((p[0] + step[0], p[0] + last*step[0]))
+    (y0, y1) = sorted((p[1] + step[1], p[1] + last*step[1]))
+    certain = True
+    for (left, right, bottom, top) in rects:
+        if (x1 < left - eps or x0 > right + eps or y1 < bottom - eps or
+            y0 > top + eps):
+            continue
+        if _sampled((left-eps, right+eps, bottom-eps, top+eps), p, step,
+                    last) == False:
+            continue
+        if _sampled((left+eps, right-eps, bottom+eps, top-eps), p, step,
+                    last) == True:
+            return False
+        certain = False
+    if certain == True:
+        return True
+    return None
+
+#-----------------------------------------------------------------------------
+
+def _sampled(rect, p, step, last):
+    """_sampled(rect, p, step, last) -> bool
+    Returns whether any of a sequence of sample points lies in a rectangle.
+
+    Requires the following positional arguments:
+        rect (tuple) -- closed rectangle, given as (left, right, bottom, top)
+        p (tuple (float, float)) -- starting point
+        step (tuple (float, float)) -- offset between consecutive points
+        last (int) -- number of points, which are p + k*step for k = 1, 2,
+            ..., last
+    """
+
+    (lo, hi) = (1, last) # range of sample indices within the rectangle
+    for (d, s, a, b) in ((step[0], p[0], rect[0], rect[1]),
+                         (step[1], p[1], rect[2], rect[3])):
+        if d == 0:
+            if s < a or s > b:
+                return False
+        else:
+            (ka, kb) = sorted(((a - s)/d, (b - s)/d))
+            lo = max(lo, ka)
+            hi = min(hi, kb)
+    return math.ceil(lo) <= hi
+
+#-----------------------------------------------------------------------------
+
+def _certainly_blocked(p, q, rects, spacing, spread=0.0):
+    """_certainly_blocked(p, q, rects, spacing, [spread]) -> bool
+    Returns whether the exact line of sight test is certain to find a block.
+
+    Requires the following positional arguments:
+        p (tuple (float, float)) -- position of the viewer
+        q (tuple (float, float)) -- position of the target
+        rects (list (tuple)) -- list of block boundaries, each given as
+            (left, right, bottom, top)
+        spacing (int) -- distance between the sample points used by the
+            exact line of sight test (px)
+
+    Accepts the following optional keyword arguments:
+        spread (float) [0.0] -- if positive, the result holds for every
+            viewer and target within this distance of p and q along each axis
+            (such as any two points of a pair of table cells)
+
+    A path is certainly blocked if it crosses a block shrunk by the heading
+    rounding error (plus the spread) for at least one sample step, so that
+    some sample point must land inside the block. The crossing must also end
+    far enough from the target in both coordinates that no earlier sample
+    point can appear to have moved past the target.
+
+    Unlike sampled_sight(), this does not need the rounded heading, so it can
+    vouch for pairs of regions rather than only pairs of points.
+    """
+
+    dx = q[0] - p[0]
+    dy = q[1] - p[1]
+    h = spread*math.sqrt(2) # maximum offset of the path's endpoints
+    length = math.hypot(dx, dy) - 2*h # minimum length of the path
+    gx = abs(dx) - 2*spread # minimum horizontal distance to the target
+    gy = abs(dy) - 2*spread # minimum vertical distance to the target
+    if gx <= 0 or gy <= 0 or length < spacing:
+        return False
+    e = (length + 4*h)*math.radians(1) + 1 # maximum sample point error
+    m = h + e
+    for (left, right, bottom, top) in rects:
+        if left + m > right - m or bottom + m > top - m:
+            continue
+        chord = _clip(p, q, (left+m, right-m, bottom+m, top-m))
+        if chord == None:
+            continue
+        (t0, t1) = chord
+        if ((t1 - t0)*length >= spacing and (1 - t1)*gx > e and
+            (1 - t1)*gy > e):
+            return True
+    return False
+
+#-----------------------------------------------------------------------------
+
+def _segment_blocked(p, q, rects):
+    """_segment_blocked(p, q, rects) -> bool
+    Returns whether a line segment intersects any of a list of rectangles.
+
+    Requires the following positional arguments:
+        p (tuple (float, float)) -- first endpoint of the segment
+        q (tuple (float, float)) -- second endpoint of the segment
+        rects (list (tuple)) -- list of closed rectangles, each given as
+            (left, right, bottom, top)
+
+    Skips any rectangle that lies entirely to one side of the segment's
+    bounding box, and clips the segment against the rest.
+    """
+
+    (xlo, xhi) = (p[0], q[0]) if q[0] >= p[0] else (q[0], p[0])
+    (ylo, yhi) = (p[1], q[1]) if q[1] >= p[1] else (q[1], p[1])
+    for r in rects:
+        if xhi < r[0] or xlo > r[1] or yhi < r[2] or ylo > r[3]:
+            continue
+        if _clip(p, q, r) != None:
+            return True
+    return False
+
+#-----------------------------------------------------------------------------
+
+def _clip(p, q, rect):
+    """_clip(p, q, rect) -> tuple
+    Returns the part of a line segment that lies within a rectangle.
+
+    Requires the following positional arguments:
+        p (tuple (float, float)) -- first endpoint of the segment
+        q (tuple (float, float)) -- second endpoint of the segment
+        rect (tuple) -- closed rectangle, given as (left, right, bottom, top)
+
+    Uses Liang-Barsky clipping, and returns the range (t0, t1) of the
+    segment's parameter (from 0 at p to 1 at q) within the rectangle, or None
+    if the segment misses it.
+    """
+
+    t0 = 0.0
+    t1 = 1.0
+    for (d, lo, hi, s) in ((q[0] - p[0], rect[0], rect[1], p[0]),
+                           (q[1] - p[1], rect[2], rect[3], p[1])):
+        if d == 0:
+            # Parallel to this pair of sides, so must start between them
+            if s < lo or s > hi:
+                return None
+        else:
+            ta = (lo - s)/d
+            tb = (hi - s)/d
+            if ta > tb:
+                (ta, tb) = (tb, ta)
+            t0 = max(t0, ta)
+            t1 = min(t1, tb)
+            if t0 > t1:
+                return None
+    return (t0, t1)
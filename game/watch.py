@@ -0,0 +1,287 @@
+"""Defines a watch mode for reloading and benchmarking AIs while writing them.
+
+A Watcher polls the files of the ai/ directory. Whenever one changes, it
+reloads only that module (with importlib.reload) and replays a fixed set of
+headless benchmark matches of the AI being written against a few opponents.
+After each run it prints the AI's results against each opponent, along with
+statistics of the time spent in its step() method, so that the effect of an
+edit can be seen within seconds and without restarting the game:
+
+    import game.watch as wt
+
+    wt.Watcher("ai.mine.CombatTurtle",
+               ["ai.direct.CombatTurtle", "ai.wall.CombatTurtle"],
+               layouts=[0, 3]).run()
+
+The same can be started from the command line with the --watch option of
+combatturtles.py. The watcher runs until interrupted (with Ctrl+C).
+
+Files are checked by their modification times, so no file system notification
+library is needed. A module that fails to reload (for example because of a
+syntax error) is reported, and the benchmark is not run again until the next
+change. AIs should be given by their full class names, so that the newest
+version of each class is used after a reload.
+"""
+
+import collections
+import glob
+import importlib
+import os.path
+import sys
+import time
+import traceback
+import ai
+from .sweep import run_match
+
+#=============================================================================
+
+# Benchmark results against a single opponent, where rate is the points rate
+# (1 point per win and 1/2 point per tie)
+Score = collections.namedtuple("Score", ["opponent", "matches", "wins",
+                                         "ties", "losses", "rate"])
+
+# Statistics of the time spent in an AI's step() method (ms)
+StepTimes = collections.namedtuple("StepTimes", ["steps", "mean", "median",
+                                                 "p95", "max"])
+
+#=============================================================================
+
+def _timed(cls, times):
+    """_timed(cls, times) -> class
+    Returns a version of an AI class which times its step() method.
+
+    Requires the following positional arguments:
+        cls (class) -- Combat Turtle AI class
+        times (list (float)) -- list to which the duration (s) of every call
+            to step() is appended
+    """
+
+    def step(self):
+        start = time.perf_counter()
+        cls.step(self)
+        times.append(time.perf_counter() - start)
+
+    return type(cls.__name__, (cls,), {"step": step})
+
+#-----------------------------------------------------------------------------
+
+def _step_times(times):
+    """_step_times(times) -> StepTimes
+    Summarizes a list of step durations (s) in milliseconds.
+    """
+
+    if len(times) == 0:
+        return StepTimes(0, 0.0, 0.0, 0.0, 0.0)
+    times = sorted(times)
+    n = len(times)
+    return StepTimes(n, 1000*sum(times)/n, 1000*times[n//2],
+                     1000*times[min(n - 1, (95*n)//100)], 1000*times[-1])
+
+#-----------------------------------------------------------------------------
+
+def _name(cls):
+    """_name(cls) -> str
+    Returns the full name of an AI class (given either the class or its name).
+    """
+
+    if type(cls) == str:
+        return cls
+    return cls.__module__ + "." + cls.__name__
+
+#=============================================================================
+
+class Watcher:
+    """AI watch mode class.
+
+    Watches the ai/ directory for changes, reloads changed modules, and
+    reruns a benchmark of one AI against a set of opponents (see the module
+    documentation).
+
+    The benchmark plays the AI against every opponent on every layout for a
+    number of rounds, alternating sides between rounds and seeding each round
+    the same way every time, so that consecutive runs can be compared. Its
+    matches are played one after another in this process, since that is
+    where the modules are reloaded.
+
+    The following public methods can be used to run the watcher:
+        benchmark() -- plays the benchmark and returns its results
+        report() -- plays the benchmark and prints its results
+        poll() -- reloads any changed modules and reruns the benchmark
+        run() -- reruns the benchmark after every change until interrupted
+    """
+
+    #=========================================================================
+
+    def __init__(self, cls, opponents, layouts=(0,), rounds=2, cutoff=3000,
+                 rules=None, interval=1.0):
+        """Watcher(cls, opponents, [layouts], [rounds], [cutoff], [rules],
+        [interval]) -> Watcher
+        AI watch mode constructor.
+
+        Requires the following positional arguments:
+            cls (str or class) -- Combat Turtle AI class to benchmark (or its
+                full class name)
+            opponents (list) -- opponent AI classes (or their full class
+                names)
+
+        Accepts the following optional keyword arguments:
+            layouts (list (int)) [(0,)] -- arena layout IDs to play on
+            rounds (int) [2] -- number of matches against each opponent on
+                each layout
+            cutoff (int) [3000] -- game time cutoff of each match
+            rules (Rules) [None] -- rules of the game (see game.rules)
+            interval (float) [1.0] -- time between checks for changes (s)
+        """
+
+        self.cls = _name(cls)
+        self.opponents = [_name(c) for c in opponents]
+        self.layouts = list(layouts)
+        self.rounds = rounds
+        self.cutoff = cutoff
+        self.rules = rules
+        self.interval = interval
+
+        self._dir = os.path.dirname(ai.__file__) # directory to watch
+        self._mtimes = self._scan() # modification times of watched files
+
+    #-------------------------------------------------------------------------
+
+    def _scan(self):
+        """Watcher._scan() -> dict
+        Returns the modification time of every module in the ai/ directory.
+        """
+
+        mtimes = {}
+        for f in glob.glob(os.path.join(self._dir, "*.py")):
+            try:
+                mtimes[f] = os.stat(f).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    #-------------------------------------------------------------------------
+
+    def _changed(self):
+        """Watcher._changed() -> list
+        Returns the names of the modules which changed since the last check.
+
+        New modules are included, but deleted modules are not.
+        """
+
+        mtimes = self._scan()
+        changed = [f for f in mtimes if self._mtimes.get(f) != mtimes[f]]
+        self._mtimes = mtimes
+        return ["ai." + os.path.splitext(os.path.basename(f))[0]
+                for f in sorted(changed)]
+
+    #-------------------------------------------------------------------------
+
+    def _reload(self, modules):
+        """Watcher._reload(modules) -> bool
+        Reloads (or first imports) a list of AI modules.
+
+        Returns True if every module loaded successfully. Otherwise the error
+        is printed and False is returned.
+        """
+
+        for m in modules:
+            try:
+                if m in sys.modules:
+                    importlib.reload(sys.modules[m])
+                    print("Reloaded " + m)
+                else:
+                    importlib.import_module(m)
+                    if m[3:] not in ai.__all__ and m[3] != "_":
+                        ai.__all__.append(m[3:])
+                    print("Loaded " + m)
+            except Exception:
+                traceback.print_exc()
+                print("Failed to load " + m + " (waiting for changes)")
+                return False
+        return True
+
+    #-------------------------------------------------------------------------
+
+    def benchmark(self):
+        """Watcher.benchmark() -> tuple
+        Plays the benchmark matches and returns their results.
+
+        Returns a tuple of a list of Score records (one for each opponent)
+        and a StepTimes record for the benchmarked AI over all matches.
+        """
+
+        (module, name) = self.cls.rsplit(".", 1)
+        times = []
+        cls = _timed(getattr(importlib.import_module(module), name), times)
+
+        scores = []
+        for opponent in self.opponents:
+            record = [0, 0, 0] # wins, ties, losses
+            for layout in self.layouts:
+                for r in range(self.rounds):
+                    outcome = run_match(cls, {}, opponent, layout, r, r % 2,
+                                        self.cutoff, self.rules)
+                    record[1 - outcome.result] += 1
+            (w, t, l) = record
+            scores.append(Score(opponent, w + t + l, w, t, l,
+                                (w + t/2)/max(1, w + t + l)))
+        return (scores, _step_times(times))
+
+    #-------------------------------------------------------------------------
+
+    def report(self):
+        """Watcher.report() -> None
+        Plays the benchmark matches and prints their results.
+        """
+
+        start = time.perf_counter()
+        (scores, times) = self.benchmark()
+        elapsed = time.perf_counter() - start
+
+        print("\nBenchmark of " + self.cls + ": " +
+              str(sum(s.matches for s in scores)) + " match(es) in " +
+              "{:.1f}".format(elapsed) + " s")
+        print("Opponent\t\t\tW\tT\tL\tRate")
+        print("-"*60)
+        for s in scores:
+            print(s.opponent.ljust(24) + "\t" + str(s.wins) + "\t" +
+                  str(s.ties) + "\t" + str(s.losses) + "\t" +
+                  "{:.2f}".format(s.rate))
+        print("Step time (ms) over " + str(times.steps) + " steps: " +
+              "mean {:.3f}, median {:.3f}, 95th {:.3f}, max {:.3f}".format(
+                  times.mean, times.median, times.p95, times.max))
+
+    #-------------------------------------------------------------------------
+
+    def poll(self):
+        """Watcher.poll() -> bool
+        Reloads any changed modules and reruns the benchmark.
+
+        Returns True if the benchmark was rerun, or False if nothing changed
+        (or a changed module failed to load).
+        """
+
+        modules = self._changed()
+        if len(modules) == 0 or self._reload(modules) == False:
+            return False
+        self.report()
+        return True
+
+    #-------------------------------------------------------------------------
+
+    def run(self):
+        """Watcher.run() -> None
+        Runs the benchmark, and then reruns it after every change to the ai/
+        directory until interrupted.
+        """
+
+        try:
+            self.report()
+            print("\nWatching " + self._dir + " for changes (Ctrl+C to " +
+                  "stop)...")
+            while True:
+                time.sleep(self.interval)
+                if self.poll() == True:
+                    print("\nWatching for changes...")
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
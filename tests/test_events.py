@@ -0,0 +1,124 @@
+"""Tests that the event stream agrees with the engine's match statistics."""
+
+import csv
+import json
+import random
+import pytest
+from game.events import (Aggregator, CsvSink, JsonLinesSink, QueuedSink,
+                         SHOT, EXPLOSION, DAMAGE, END, _CSV_FIELDS)
+from game.tcgame import TurtleCombatGame
+
+#=============================================================================
+
+# AIs of the players (all different, so that AI totals are player totals)
+_CLASSES = ["ai.direct.CombatTurtle", "ai.wall.CombatTurtle",
+            "ai.drunken.CombatTurtle", "ai.circles.CombatTurtle"]
+
+#=============================================================================
+
+@pytest.mark.parametrize("layout", range(6))
+@pytest.mark.parametrize("players", [2, 4])
+def test_counters(layout, players):
+    """The counters of each player's result match the events of the match,
+    both one by one and as totaled by an Aggregator."""
+
+    random.seed(layout)
+    events = []
+    agg = Aggregator()
+    g = TurtleCombatGame(classes=_CLASSES[:players],
+                         teams=[1, 2, 1, 2] if players == 4 else None,
+                         layout=layout, cutoff=1500, headless=True,
+                         sinks=[events.append, agg])
+    g.run()
+    result = g.result()
+    summary = agg.summary()
+    assert sum(p.shots for p in result.players) > 0
+
+    for p in result.players:
+        mine = [e for e in events if e.get("turtle") == p.name]
+        shots = [e for e in mine if e["event"] == SHOT]
+        damage = [e for e in mine if e["event"] == DAMAGE]
+        taken = [e for e in events if e["event"] == DAMAGE and
+                 e["target_turtle"] == p.name]
+        explosions = {}
+        for e in mine:
+            if e["event"] == EXPLOSION:
+                explosions[e["cause"]] = explosions.get(e["cause"], 0) + 1
+
+        assert p.shots == len(shots)
+        assert p.hits == len([e for e in damage if e["hit"] == True])
+        assert p.damage_dealt == sum(e["amount"] for e in damage
+                                     if e["target_team"] != p.team)
+        assert p.damage_taken == sum(e["amount"] for e in taken)
+        assert p.self_damage == sum(e["amount"] for e in taken
+                                    if e["turtle"] == p.name)
+        assert ({c: n for (c, n) in p.explosions.items() if n > 0} ==
+                explosions)
+
+        assert p.shots == summary["shots"].get(p.ai, 0)
+        assert p.hits == summary["hits"].get(p.ai, 0)
+        assert p.damage_dealt == summary["damage_dealt"].get(p.ai, 0)
+        assert p.damage_taken == summary["damage_taken"].get(p.ai, 0)
+
+    ends = [e for e in events if e["event"] == END]
+    assert len(ends) == 1 and summary["matches"] == 1
+    assert ends[0]["winner"] == result.winner
+    assert sorted(ends[0]["winners"]) == sorted(result.winners)
+
+    # Every field has a CSV column, so CsvSink does not drop any
+    assert all(set(e) <= set(_CSV_FIELDS) for e in events)
+
+#-----------------------------------------------------------------------------
+
+def test_queued_sink_error():
+    """An exception raised by a queued sink is reported exactly once, and
+    does not stop the remaining events from being passed on."""
+
+    seen = []
+    def sink(event):
+        seen.append(event["step"])
+        if event["step"] == 0:
+            raise RuntimeError("disk full")
+
+    queued = QueuedSink(sink, maxsize=2)
+    errors = []
+    for step in range(50):
+        try:
+            queued({"event": SHOT, "step": step})
+        except RuntimeError as e:
+            errors.append(step)
+    try:
+        queued.close()
+    except RuntimeError as e:
+        errors.append(None)
+    assert len(errors) == 1
+    assert seen[0] == 0
+
+    # Only an event whose call raised the exception was not queued
+    assert len(seen) == 50 - len([e for e in errors if e != None])
+
+#-----------------------------------------------------------------------------
+
+def test_file_sinks(tmp_path):
+    """File sinks append by default, overwrite in "w" mode, and reject other
+    modes."""
+
+    event = {"event": SHOT, "step": 3, "turtle": "Player 1", "team": (1, 2)}
+    for (cls, name) in ((JsonLinesSink, "e.jsonl"), (CsvSink, "e.csv")):
+        path = str(tmp_path/name)
+        for mode in ("w", "w", None, "a"):
+            sink = cls(path) if mode == None else cls(path, mode)
+            sink(event)
+            sink.close()
+        with pytest.raises(ValueError):
+            cls(path, "r")
+
+        with open(path, newline="") as f:
+            if cls == JsonLinesSink:
+                rows = [json.loads(line) for line in f]
+                assert rows == [dict(event, team=[1, 2])]*3
+            else:
+                rows = list(csv.DictReader(f))
+                assert len(rows) == 3
+                assert all(r["step"] == "3" and r["turtle"] == "Player 1"
+                           for r in rows)
@@ -0,0 +1,64 @@
+"""Tests for the match result records of game.result."""
+
+import json
+import pickle
+import random
+import pytest
+from game.result import MatchResult, PlayerResult, to_dict, from_dict
+from game.tcgame import TurtleCombatGame
+from game.tcturtle import TurtleParent
+
+#=============================================================================
+
+@pytest.mark.parametrize("layout", [0, 2, 5])
+def test_round_trip(layout):
+    """Records survive conversion to dictionaries, JSON, and pickles."""
+
+    random.seed(layout)
+    g = TurtleCombatGame(classes=["ai.direct.CombatTurtle",
+                                  "ai.circles.CombatTurtle",
+                                  "ai.wall.CombatTurtle",
+                                  "ai.drunken.CombatTurtle"],
+                         teams=[1, 2, 1, 2], layout=layout, cutoff=600,
+                         headless=True)
+    g.run()
+    result = g.result()
+    assert sum(p.shots for p in result.players) > 0
+
+    d = to_dict(result)
+    assert d["players"][0]["name"] == result.players[0].name
+    assert from_dict(d) == result
+    restored = from_dict(json.loads(json.dumps(d)))
+    assert restored == result
+    assert type(restored) == MatchResult
+    assert all(type(p) == PlayerResult for p in restored.players)
+    assert pickle.loads(pickle.dumps(result)) == result
+
+#-----------------------------------------------------------------------------
+
+def test_unfinished():
+    """Records of games that have not ended round trip as well."""
+
+    result = MatchResult(None, [], None, 0, [])
+    assert from_dict(json.loads(json.dumps(to_dict(result)))) == result
+
+#-----------------------------------------------------------------------------
+
+def test_sight_steps_reuse(monkeypatch):
+    """Counting sight steps costs no line of sight tests beyond those that
+    the turtles would make anyway."""
+
+    calls = []
+    original = TurtleParent._line_of_sight
+    def counted(self, target):
+        calls.append(target)
+        return original(self, target)
+    monkeypatch.setattr(TurtleParent, "_line_of_sight", counted)
+
+    random.seed(0)
+    g = TurtleCombatGame(classes=["ai.direct.CombatTurtle",
+                                  "ai.direct.CombatTurtle"],
+                         layout=2, cutoff=300, headless=True)
+    g.run()
+    assert len(calls) <= 2*(g.iteration + 1)
+    assert sum(p.sight_steps for p in g.result().players) > 0
@@ -0,0 +1,85 @@
+"""Tests for the spatial hash of game.util.spatial."""
+
+import math
+import random
+from game.util.spatial import SpatialHash
+
+#=============================================================================
+
+def _filled(rng, n, cell=50):
+    """_filled(rng, n, [cell]) -> tuple
+    Returns a spatial hash of random objects and a dictionary of their
+    coordinates, after moving every object at least once.
+    """
+
+    grid = SpatialHash(cell)
+    where = {}
+    for obj in range(n):
+        where[obj] = (rng.uniform(-100, 900), rng.uniform(-100, 900))
+        grid.insert(obj, where[obj])
+    for obj in range(n):
+        where[obj] = (where[obj][0] + rng.uniform(-80, 80),
+                      where[obj][1] + rng.uniform(-80, 80))
+        grid.move(obj, where[obj])
+    return (grid, where)
+
+#=============================================================================
+
+def test_maintenance():
+    """Objects can be inserted, moved, and removed."""
+
+    grid = SpatialHash(50)
+    grid.insert("a", (10, 10))
+    grid.insert("b", (20, 20))
+    grid.insert("a", (500, 500))
+    assert len(grid) == 2
+    assert grid.near((10, 10), 5) == ["b"]
+    assert grid.near((500, 500), 5) == ["a"]
+
+    grid.move("c", (0, 0))
+    grid.remove("b")
+    grid.remove("b")
+    assert len(grid) == 2
+    assert sorted(grid.near((10, 10), 20)) == ["c"]
+
+    grid.clear()
+    assert len(grid) == 0
+    assert grid.near((0, 0), 1000) == []
+    assert grid.nearest((0, 0)) == None
+
+#-----------------------------------------------------------------------------
+
+def test_near():
+    """Every object within the radius is returned."""
+
+    rng = random.Random(0)
+    (grid, where) = _filled(rng, 300)
+    for i in range(200):
+        coords = (rng.uniform(0, 800), rng.uniform(0, 800))
+        radius = rng.choice([0, 10, 50, 120, 400])
+        found = grid.near(coords, radius)
+        assert len(found) == len(set(found))
+        for (obj, pos) in where.items():
+            if math.hypot(pos[0] - coords[0], pos[1] - coords[1]) <= radius:
+                assert obj in found, (obj, coords, radius)
+
+#-----------------------------------------------------------------------------
+
+def test_nearest():
+    """The nearest accepted object matches a brute force search."""
+
+    rng = random.Random(1)
+    (grid, where) = _filled(rng, 100)
+    for i in range(200):
+        coords = (rng.uniform(-200, 1000), rng.uniform(-200, 1000))
+        accept = None
+        if i % 2 == 1:
+            accept = lambda obj: obj % 7 == 0
+        best = grid.nearest(coords, accept)
+        dist = [math.hypot(pos[0] - coords[0], pos[1] - coords[1])
+                for (obj, pos) in where.items()
+                if accept == None or accept(obj) == True]
+        pos = where[best]
+        assert (math.hypot(pos[0] - coords[0], pos[1] - coords[1]) ==
+                min(dist))
+    assert grid.nearest((0, 0), lambda obj: False) == None
@@ -0,0 +1,117 @@
+"""Tests for the telemetry files of game.telemetry."""
+
+import random
+import pytest
+import game.telemetry
+from game.tcgame import TurtleCombatGame
+from game.telemetry import (COLUMNS, MatchRecorder, TelemetryReader,
+                            TelemetryWriter, _MAGIC)
+
+#=============================================================================
+
+@pytest.fixture(scope="module")
+def recorders():
+    """Returns the recordings of a few short headless matches."""
+
+    out = []
+    for layout in range(3):
+        random.seed(layout)
+        r = MatchRecorder()
+        r.play(TurtleCombatGame(classes=["ai.direct.CombatTurtle",
+                                         "ai.circles.CombatTurtle"],
+                                layout=layout, cutoff=300, headless=True))
+        out.append(r)
+    return out
+
+#-----------------------------------------------------------------------------
+
+def _check(path, recorders):
+    """_check(path, recorders) -> None
+    Checks that a file holds exactly a given list of recorded matches.
+    """
+
+    reader = TelemetryReader(path)
+    assert len(reader) == len(recorders)
+    for (i, r) in enumerate(recorders):
+        assert reader.row_groups[i] == {"rows": len(r), "meta": {"match": i}}
+        for (name, code) in COLUMNS:
+            assert reader.column(name, i) == r.columns[name]
+
+#=============================================================================
+
+def test_round_trip(recorders, tmp_path):
+    """Appended matches read back unchanged."""
+
+    path = str(tmp_path/"t.cttl")
+    writer = TelemetryWriter(path)
+    for (i, r) in enumerate(recorders):
+        writer.append(r, {"match": i})
+        _check(path, recorders[:i+1])
+
+    reader = TelemetryReader(path)
+    assert list(reader.scan("x")) == [r.columns["x"] for r in recorders]
+    assert reader.columns(["step", "health"], 1) == {
+        "step": recorders[1].columns["step"],
+        "health": recorders[1].columns["health"]}
+
+#-----------------------------------------------------------------------------
+
+def test_append_cost(recorders, tmp_path, monkeypatch):
+    """Appending reads only the last footer, however many the file holds."""
+
+    path = str(tmp_path/"t.cttl")
+    writer = TelemetryWriter(path)
+    for (i, r) in enumerate(recorders[:2]):
+        writer.append(r, {"match": i})
+
+    calls = []
+    footer_at = game.telemetry._footer_at
+    def counted(f, end):
+        calls.append(end)
+        return footer_at(f, end)
+    monkeypatch.setattr(game.telemetry, "_footer_at", counted)
+    writer.append(recorders[2], {"match": 2})
+    assert len(calls) == 1
+    monkeypatch.undo()
+    _check(path, recorders)
+
+#-----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("block", [5, 64, 1 << 16])
+def test_torn_append(recorders, tmp_path, monkeypatch, block):
+    """A partial append loses only the match being written, and the next
+    append picks up where the last intact one left off."""
+
+    monkeypatch.setattr(game.telemetry, "_BLOCK", block)
+    path = str(tmp_path/"t.cttl")
+    writer = TelemetryWriter(path)
+    sizes = [len(_MAGIC)]
+    for (i, r) in enumerate(recorders):
+        writer.append(r, {"match": i})
+        with open(path, "rb") as f:
+            sizes.append(len(f.read()))
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for i in range(len(recorders)):
+        for cut in range(sizes[i] + 1, sizes[i+1], 97):
+            with open(path, "wb") as f:
+                f.write(data[:cut])
+            _check(path, recorders[:i])
+            writer.append(recorders[i], {"match": i})
+            _check(path, recorders[:i+1])
+            with open(path, "rb") as f:
+                assert f.read() == data[:sizes[i+1]]
+
+#-----------------------------------------------------------------------------
+
+def test_not_telemetry(tmp_path):
+    """Other files are rejected."""
+
+    path = tmp_path/"t.cttl"
+    path.write_bytes(b"not a telemetry file")
+    with pytest.raises(ValueError):
+        TelemetryReader(str(path))
+    with pytest.raises(ValueError):
+        TelemetryWriter(str(path)).append(MatchRecorder())
+    assert path.read_bytes() == b"not a telemetry file"
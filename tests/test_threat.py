@@ -0,0 +1,71 @@
+"""Tests for the missile threat map of game.util.threat."""
+
+import math
+import random
+from game.util.threat import ThreatMap
+
+#=============================================================================
+
+def _path(rng, steps):
+    """_path(rng, steps) -> list
+    Returns a random straight missile path.
+    """
+
+    (x, y) = (rng.uniform(-50, 850), rng.uniform(-50, 850))
+    angle = rng.uniform(0, 2*math.pi)
+    speed = rng.uniform(0, 15)
+    return [(x + k*speed*math.cos(angle), y + k*speed*math.sin(angle))
+            for k in range(1, steps + 1)]
+
+#=============================================================================
+
+def test_empty():
+    """An empty map is safe everywhere."""
+
+    threat = ThreatMap((800, 800))
+    for coords in ((0, 0), (400, 400), (800, 800), (-50, 900)):
+        for steps in range(1, 6):
+            assert threat.safe(coords, steps) == True
+
+#-----------------------------------------------------------------------------
+
+def test_conservative():
+    """Every coordinate within reach of a blast is unsafe at its step, and
+    every coordinate well out of reach of all blasts is safe."""
+
+    rng = random.Random(0)
+    for trial in range(20):
+        cell = rng.choice([10, 20, 40])
+        threat = ThreatMap((800, 800), cell)
+        radius = rng.uniform(5, 60)
+        blasts = [[] for i in range(12)] # blast centers of each step
+        for i in range(5):
+            path = _path(rng, 12)
+            last = rng.random() < 0.3
+            threat.add(path, radius, last)
+            for k in range(11 if last == True else 0, 12):
+                blasts[k].append(path[k])
+
+        for i in range(1000):
+            coords = (rng.uniform(0, 800), rng.uniform(0, 800))
+            for steps in range(1, 13):
+                dist = min([math.hypot(b[0] - coords[0], b[1] - coords[1])
+                            for b in blasts[steps-1]] + [math.inf])
+                if dist <= radius:
+                    assert threat.safe(coords, steps) == False
+                elif dist > radius + 2*cell:
+                    assert threat.safe(coords, steps) == True
+
+#-----------------------------------------------------------------------------
+
+def test_edges():
+    """Coordinates outside of the arena use the nearest cell, and queries
+    for the current step are always safe."""
+
+    threat = ThreatMap((800, 800))
+    threat.add([(0, 0), (790, 790)], 5)
+    assert threat.safe((-30, -30), 1) == False
+    assert threat.safe((-30, -30), 2) == True
+    assert threat.safe((900, 900), 2) == False
+    assert threat.safe((0, 0), 0) == True
+    assert threat.safe((400, 400), 1) == True
@@ -0,0 +1,42 @@
+"""Tests for the confidence intervals of game.tournament."""
+
+import pytest
+from game.tournament import interval
+
+#=============================================================================
+
+def test_known_values():
+    """Intervals match published Wilson score intervals."""
+
+    assert interval(5, 10) == pytest.approx((0.2366, 0.7634), abs=1e-4)
+    assert interval(0, 10) == pytest.approx((0.0, 0.2775), abs=1e-4)
+    assert interval(10, 10) == pytest.approx((0.7225, 1.0), abs=1e-4)
+    assert interval(81, 263) == pytest.approx((0.2553, 0.3662), abs=1e-4)
+
+#-----------------------------------------------------------------------------
+
+def test_no_matches():
+    """With no matches played the interval covers every rate."""
+
+    assert interval(0, 0) == (0.0, 1.0)
+
+#-----------------------------------------------------------------------------
+
+def test_properties():
+    """Intervals contain the observed rate, are symmetric between the two
+    sides, and shrink as more matches are played or less confidence is
+    needed."""
+
+    for matches in (1, 2, 5, 20, 100):
+        for half_points in range(2*matches + 1):
+            points = half_points/2
+            (low, high) = interval(points, matches)
+            assert 0.0 <= low <= points/matches <= high <= 1.0
+            (low2, high2) = interval(matches - points, matches)
+            assert low == pytest.approx(1 - high2)
+            assert high == pytest.approx(1 - low2)
+            (low3, high3) = interval(points, matches, z=1.0)
+            assert low <= low3 and high3 <= high
+
+            (low4, high4) = interval(4*points, 4*matches)
+            assert high4 - low4 < high - low
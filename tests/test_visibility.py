@@ -0,0 +1,192 @@
+"""Tests for the line of sight helpers of game.util.visibility."""
+
+import math
+import random
+import pytest
+from game.tcgame import TurtleCombatGame
+from game.util.visibility import (VisibilityTable, sampled_sight,
+                                  _certainly_blocked, _clip, _segment_blocked)
+
+#=============================================================================
+
+def _game(layout):
+    """_game(layout) -> TurtleCombatGame
+    Returns an unplayed headless game on a given layout.
+    """
+
+    random.seed(layout)
+    return TurtleCombatGame(classes=["ai.direct.CombatTurtle",
+                                     "ai.direct.CombatTurtle"],
+                            layout=layout, cutoff=1, headless=True)
+
+#-----------------------------------------------------------------------------
+
+def _exact(t, target):
+    """_exact(t, target) -> bool
+    Returns the outcome of the sampling loop of TurtleParent._line_of_sight().
+    """
+
+    rh = math.radians(t.heading_towards(target))
+    sx = t._sign(target[0] - t.x)
+    sy = t._sign(target[1] - t.y)
+    if sx == 0 and sy == 0:
+        return True
+    pt = list(t.position)
+    spd = t.missile_speed
+    for i in range(100):
+        pt[0] += spd*math.cos(rh)
+        pt[1] -= spd*math.sin(rh)
+        if t.free_space(pt) == False:
+            return False
+        if (t._sign(target[0] - pt[0]) != sx or
+            t._sign(target[1] - pt[1]) != sy):
+            return True
+    return False
+
+#-----------------------------------------------------------------------------
+
+def _move(t, coords):
+    """_move(t, coords) -> None
+    Moves a turtle and forgets its cached queries.
+    """
+
+    (t._x, t._y) = coords
+    t._queries.clear()
+
+#-----------------------------------------------------------------------------
+
+def _pairs(rng, size, n):
+    """_pairs(rng, size, n) -> generator
+    Yields random pairs of coordinates, many of them sharing a coordinate.
+    """
+
+    for i in range(n):
+        p = (rng.randrange(size[0] + 1), rng.randrange(size[1] + 1))
+        if rng.random() < 0.2:
+            q = (p[0] + rng.choice([0, 1, -1]), rng.randrange(size[1] + 1))
+        elif rng.random() < 0.2:
+            q = (rng.randrange(size[0] + 1), p[1] + rng.choice([0, 1, -1]))
+        else:
+            q = (rng.randrange(size[0] + 1), rng.randrange(size[1] + 1))
+        yield (p, q)
+
+#=============================================================================
+
+def test_clip():
+    """Clipping returns the parameter range of the segment in the rect."""
+
+    rect = (10, 20, 10, 20)
+    assert _clip((0, 15), (30, 15), rect) == pytest.approx((1/3, 2/3))
+    assert _clip((15, 15), (16, 16), rect) == (0.0, 1.0)
+    assert _clip((0, 0), (30, 0), rect) == None
+    assert _clip((0, 0), (9, 30), rect) == None
+    assert _clip((10, 0), (10, 30), rect) == pytest.approx((1/3, 2/3))
+    assert _clip((0, 20), (10, 30), rect) == None
+    assert _clip((0, 10), (10, 20), rect) == (1.0, 1.0)
+
+#-----------------------------------------------------------------------------
+
+def test_segment_blocked():
+    """Segments are blocked by any rectangle they touch."""
+
+    rects = [(100, 200, 100, 200), (400, 500, 0, 50)]
+    assert _segment_blocked((0, 150), (300, 150), rects) == True
+    assert _segment_blocked((0, 0), (300, 0), rects) == False
+    assert _segment_blocked((450, 100), (450, 50), rects) == True
+    assert _segment_blocked((450, 100), (450, 51), rects) == False
+    assert _segment_blocked((150, 150), (150, 150), rects) == True
+    assert _segment_blocked((250, 250), (250, 250), rects) == False
+    assert _segment_blocked((0, 300), (300, 0), rects) == True
+    assert _segment_blocked((0, 300), (99, 201), rects) == False
+    assert _segment_blocked((0, 150), (300, 150), []) == False
+
+#-----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("layout", range(6))
+def test_segment_blocked_bounding_box(layout):
+    """The bounding box check never changes the result of clipping."""
+
+    g = _game(layout)
+    rects = g.block_rects()
+    rng = random.Random(layout)
+    for (p, q) in _pairs(rng, g.size, 3000):
+        expected = any(_clip(p, q, r) != None for r in rects)
+        assert _segment_blocked(p, q, rects) == expected, (p, q)
+
+    # Segments ending exactly on the block edges
+    for (left, right, bottom, top) in rects:
+        for p in ((left, bottom), (right, top), (left, top), (right, bottom)):
+            for q in ((left - 30, bottom - 30), (right + 30, top + 30),
+                      (p[0], p[1] - 30), (p[0] + 30, p[1])):
+                expected = any(_clip(p, q, r) != None for r in rects)
+                assert _segment_blocked(p, q, rects) == expected, (p, q)
+
+#-----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("layout", range(6))
+def test_sampled_sight(layout):
+    """The closed form agrees with the sampling loop whenever it answers."""
+
+    g = _game(layout)
+    t = g.p1
+    rects = g.block_rects()
+    rng = random.Random(layout)
+    answered = 0
+    for (p, q) in _pairs(rng, g.size, 3000):
+        _move(t, p)
+        sight = sampled_sight(p, q, t.heading_towards(q), rects, g.size,
+                              t.missile_speed)
+        if sight != None:
+            answered += 1
+            assert sight == _exact(t, q), (p, q)
+        assert t._line_of_sight(q) == _exact(t, q), (p, q)
+    assert answered > 2500
+
+#-----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("layout", range(6))
+def test_certainly_blocked(layout):
+    """Paths reported as certainly blocked fail the sampling loop."""
+
+    g = _game(layout)
+    t = g.p1
+    rects = g.block_rects()
+    rng = random.Random(layout)
+    for (p, q) in _pairs(rng, g.size, 3000):
+        if _certainly_blocked(p, q, rects, t.missile_speed) == True:
+            _move(t, p)
+            assert _exact(t, q) == False, (p, q)
+
+#-----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("layout", [1, 5])
+def test_table(layout, tmp_path):
+    """The table only vouches for pairs that the sampling loop agrees with,
+    and reloads identically from its cache.
+
+    Only layouts with large blocks have pairs of cells that are certainly
+    blocked.
+    """
+
+    g = _game(layout)
+    t = g.p1
+    rects = g.block_rects()
+    table = VisibilityTable(g.size, rects, t.missile_speed,
+                            cache_dir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    loaded = VisibilityTable(g.size, rects, t.missile_speed,
+                             cache_dir=str(tmp_path))
+    rng = random.Random(layout)
+    counts = [0, 0]
+    for (p, q) in _pairs(rng, g.size, 3000):
+        clear = table.clear(p, q)
+        blocked = table.blocked(p, q)
+        assert loaded.clear(p, q) == clear
+        assert loaded.blocked(p, q) == blocked
+        if clear == True or blocked == True:
+            assert clear != blocked
+            _move(t, p)
+            assert _exact(t, q) == clear, (p, q)
+            counts[blocked] += 1
+    assert counts[0] > 0 and counts[1] > 0
+    assert table.visible_cells((-1, -1)) == []